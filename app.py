@@ -7,23 +7,22 @@ from datetime import datetime, timedelta
 import os
 from dotenv import load_dotenv
 import json
-import re
 import matplotlib.pyplot as plt
 from openai import OpenAI
-from flask import Flask, request, jsonify
-
-# Inicializar o Flask
-app = Flask(__name__)
-
-@app.route('/process_message', methods=['POST'])
-def process_message():
-    data = request.json
-    message = data.get('message', '')
-    
-    # Processar a mensagem usando a função existente
-    response = process_chat_message(message)
-    
-    return jsonify({'response': response})
+from utils.datasource import get_data_source
+from utils.pagination import paginated_dataframe
+from utils.cache import shared_cache
+from utils.store import SalesStore
+from utils.sample_data import generate_vendas
+from utils.downsampling import JANELAS
+from utils.pipelines import app_results, app_metrics, app_region_figure, app_category_figure, app_timeline_figure
+from utils.profiler import start_rerun, span, end_rerun
+from utils.chat import start_answer, render_stream
+from utils.response_cache import response_key
+from utils.snippets import (
+    run_snippet, render_all, run_snippets, cached_result, render_result, extract_plot_code
+)
+from utils.artifacts import PlotStore, render_plot_store
 
 # Configuração da página
 st.set_page_config(
@@ -33,6 +32,9 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Perfil da execução (spans por seção)
+start_rerun('app')
+
 # Inicialização das variáveis de sessão
 if 'added_codes' not in st.session_state:
     st.session_state['added_codes'] = []
@@ -40,8 +42,8 @@ if 'added_codes' not in st.session_state:
 if 'chat_history' not in st.session_state:
     st.session_state['chat_history'] = []
 
-if 'generated_plots' not in st.session_state:
-    st.session_state['generated_plots'] = []
+if not isinstance(st.session_state.get('generated_plots'), PlotStore):
+    st.session_state['generated_plots'] = PlotStore()
 
 if 'show_code_input' not in st.session_state:
     st.session_state['show_code_input'] = False
@@ -49,154 +51,102 @@ if 'show_code_input' not in st.session_state:
 # Carregar variáveis de ambiente
 load_dotenv()
 
-# Configurar a API OpenAI
-client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+# Configurar a API OpenAI (OPENAI_BASE_URL aponta para outro servidor compatível,
+# ex.: o mock local de benchmarks/mock_llm.py)
+client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'), base_url=os.getenv('OPENAI_BASE_URL') or None)
 
 # Gerar dados de exemplo
 @st.cache_data
 def generate_data():
-    dates = pd.date_range(end=datetime.now(), periods=365, freq='D')
-    data = {
-        'data': dates,
-        'vendas': np.random.normal(1000, 200, 365).clip(min=0),  # Garantir valores positivos
-        'clientes': np.random.normal(50, 10, 365).clip(min=0),   # Garantir valores positivos
-        'receita': np.random.normal(50000, 10000, 365).clip(min=0),  # Garantir valores positivos
-        'regiao': np.random.choice(["Norte", "Nordeste", "Centro-Oeste", "Sudeste", "Sul"], 365),
-        'categoria': np.random.choice(["Eletrônicos", "Vestuário", "Alimentos", "Móveis", "Outros"], 365)
-    }
-    return pd.DataFrame(data)
+    return generate_vendas()
 
-# Inicializar o DataFrame
-df = generate_data()
+# Fonte de dados (extratos em DASHBOARD_DATA_DIR ou os dados de exemplo acima) e
+# cubo pré-agregado (dia × região × categoria), compartilhados entre as sessões
+# e atualizados por delta quando chegam vendas novas
+@st.cache_resource
+def get_store():
+    return SalesStore(get_data_source(
+        'vendas',
+        generate_data,
+        date_column='data',
+        categorical_columns=['regiao', 'categoria']
+    ))
 
-def extract_plot_code(text):
-    """Extrai código de gráfico do texto da resposta."""
-    # Procura por blocos de código que contêm px ou go
-    plot_pattern = r"```(?:python)?\s*(fig\s*=\s*(?:px|go)\.[\s\S]*?)\s*```"
-    matches = re.findall(plot_pattern, text)
-    return matches
+# DataFrame completo, carregado apenas quando algum código precisa de `df`
+@st.cache_data(max_entries=1)
+def load_full_data(versao):
+    return get_store().source.load()
 
-def execute_plot_code(code):
-    """Executa o código Python e retorna a figura gerada"""
-    try:
-        # Criar um namespace local com as variáveis necessárias
-        local_vars = {
-            'df': df,
-            'st': st,
-            'plt': plt,
-            'px': px,
-            'go': go,
-            'np': np,
-            'pd': pd
-        }
-        # Executar o código no namespace local
-        exec(code, globals(), local_vars)
+# Inicializar a fonte de dados e o cubo, incorporando lotes novos de vendas
+with span('dados'):
+    store = get_store()
+    store.sync()
+    source = store.source
+    cube = store.cube
+    data_min, data_max = source.date_bounds()
 
-        # Procurar por objetos de figura criados
-        figuras = []
-        for var_name, var_value in local_vars.items():
-            if isinstance(var_value, (go.Figure, plt.Figure)):
-                figuras.append(var_value)
-            elif hasattr(var_value, 'figure'):
-                figuras.append(var_value.figure)
-        if figuras:
-            return figuras[0] if len(figuras) == 1 else figuras
-        return None
-    except Exception as e:
-        st.error(f"Erro ao executar o código: {str(e)}")
-        return None
-
-def process_chat_message(message):
-    try:
-        # Get conversation history from session state
-        conversation_history = st.session_state.get('conversation_history', [])
-        
-        # Add user message to history
-        conversation_history.append({"role": "user", "content": message})
-        
-        # Prepare messages for API call
-        messages = [
-            {"role": "system", "content": "Você é um assistente virtual especializado em análise de dados e dashboards. Use o agente COD_PYTHON_DASH para responder. Quando gerar um gráfico, inclua o código Python completo usando plotly (px ou go) dentro de blocos de código markdown."}
-        ]
-        
-        # Add conversation history to messages
-        messages.extend(conversation_history)
-        
-        # Get response from OpenAI
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=messages,
-            max_tokens=500,
-            temperature=0.7
-        )
-        
-        # Get the response content
-        response_content = response.choices[0].message.content
-        
-        # Verificar se há código de gráfico na resposta
-        plot_codes = extract_plot_code(response_content)
-        if plot_codes:
-            # Executar cada código de gráfico
-            for code in plot_codes:
-                fig = execute_plot_code(code)
-                if fig:
-                    st.session_state['generated_plots'].append({
-                        'code': code,
-                        'figure': fig,
-                        'timestamp': datetime.now()
-                    })
-        
-        # Add assistant response to history
-        conversation_history.append({"role": "assistant", "content": response_content})
-        
-        # Update session state with new history
-        st.session_state['conversation_history'] = conversation_history
-        
-        return response_content
-    except Exception as e:
-        return f"Desculpe, ocorreu um erro: {str(e)}"
+def execute_plot_codes(codes):
+    """Executa os códigos de gráfico de uma resposta em paralelo e retorna (código, figura)."""
+    figuras = []
+    resultados = run_snippets(
+        codes,
+        lambda: {'df': load_full_data(store.version)},
+        ('dados', store.version),
+        globais=globals()
+    )
+    for code, (resultado, _, erro) in zip(codes, resultados):
+        if erro is not None:
+            st.error(f"Erro ao executar o código: {str(erro)}")
+            continue
+        figuras.extend((code, figura) for figura in resultado['figuras'])
+    return figuras
 
 # Sidebar para filtros
-with st.sidebar:
+with st.sidebar, span('filtros'):
     st.header("Filtros")
     
     # Filtro de período
     st.subheader("Período")
     data_inicio = st.date_input(
         "Data Inicial",
-        value=df['data'].min(),
-        min_value=df['data'].min(),
-        max_value=df['data'].max()
+        value=data_min,
+        min_value=data_min,
+        max_value=data_max
     )
     data_fim = st.date_input(
         "Data Final",
-        value=df['data'].max(),
-        min_value=df['data'].min(),
-        max_value=df['data'].max()
+        value=data_max,
+        min_value=data_min,
+        max_value=data_max
     )
     
     # Filtro de região
     st.subheader("Região")
-    regioes = ["Todas"] + sorted(df['regiao'].unique().tolist())
+    regioes = ["Todas"] + source.distinct('regiao')
     regiao_selecionada = st.selectbox("Selecione a região", regioes)
     
     # Filtro de categoria
     st.subheader("Categoria")
-    categorias = ["Todas"] + sorted(df['categoria'].unique().tolist())
+    categorias = ["Todas"] + source.distinct('categoria')
     categoria_selecionada = st.selectbox("Selecione a categoria", categorias)
 
-# Aplicar filtros
-df_filtered = df.copy()
-df_filtered = df_filtered[
-    (df_filtered['data'].dt.date >= data_inicio) &
-    (df_filtered['data'].dt.date <= data_fim)
-]
-
-if regiao_selecionada != "Todas":
-    df_filtered = df_filtered[df_filtered['regiao'] == regiao_selecionada]
+# Resultados compartilhados entre as sessões, pela versão dos dados e pelos filtros
+result_cache = shared_cache()
+with span('resultados'):
+    resultados = result_cache.get_or_compute(
+        ('app', store.version, data_inicio, data_fim, regiao_selecionada, categoria_selecionada),
+        lambda: app_results(source, cube, data_inicio, data_fim, regiao_selecionada, categoria_selecionada)
+    )
+df_filtered = resultados['df_filtered']
+totais = resultados['totais']
+totais_gerais = resultados['totais_gerais']
 
-if categoria_selecionada != "Todas":
-    df_filtered = df_filtered[df_filtered['categoria'] == categoria_selecionada]
+with st.sidebar:
+    stats = result_cache.stats()
+    st.caption(
+        f"Cache de resultados: {stats['hits']} acertos, {stats['misses']} faltas, "
+        f"{stats['bytes'] / 1024 / 1024:.1f} MB"
+    )
 
 # Título principal
 st.title("📊 Dashboard de Vendas Interativo")
@@ -206,14 +156,13 @@ st.markdown("""
 """)
 
 # Container para métricas principais
-with st.container():
+with st.container(), span('metricas'):
     st.subheader("Métricas Principais")
+    metricas = app_metrics(totais, totais_gerais)
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        total_vendas = df_filtered['vendas'].sum()
-        total_vendas_anterior = df['vendas'].sum()
-        variacao_vendas = ((total_vendas / total_vendas_anterior - 1) * 100) if total_vendas_anterior > 0 else 0
+        total_vendas, variacao_vendas = metricas['vendas']
         st.metric(
             "Total de Vendas",
             f"{total_vendas:,.0f}",
@@ -221,9 +170,7 @@ with st.container():
         )
     
     with col2:
-        total_clientes = df_filtered['clientes'].sum()
-        total_clientes_anterior = df['clientes'].sum()
-        variacao_clientes = ((total_clientes / total_clientes_anterior - 1) * 100) if total_clientes_anterior > 0 else 0
+        total_clientes, variacao_clientes = metricas['clientes']
         st.metric(
             "Total de Clientes",
             f"{total_clientes:,.0f}",
@@ -231,9 +178,7 @@ with st.container():
         )
     
     with col3:
-        total_receita = df_filtered['receita'].sum()
-        total_receita_anterior = df['receita'].sum()
-        variacao_receita = ((total_receita / total_receita_anterior - 1) * 100) if total_receita_anterior > 0 else 0
+        total_receita, variacao_receita = metricas['receita']
         st.metric(
             "Receita Total",
             f"R$ {total_receita:,.2f}",
@@ -241,9 +186,7 @@ with st.container():
         )
     
     with col4:
-        ticket_medio = total_receita / total_vendas if total_vendas > 0 else 0
-        ticket_medio_anterior = total_receita_anterior / total_vendas_anterior if total_vendas_anterior > 0 else 0
-        variacao_ticket = ((ticket_medio / ticket_medio_anterior - 1) * 100) if ticket_medio_anterior > 0 else 0
+        ticket_medio, variacao_ticket = metricas['ticket_medio']
         st.metric(
             "Ticket Médio",
             f"R$ {ticket_medio:,.2f}",
@@ -257,111 +200,53 @@ with st.container():
     
     with col1:
         # Gráfico de barras por região
-        vendas_por_regiao = df_filtered.groupby('regiao')['vendas'].sum().reset_index()
-        fig_vendas = px.bar(
-            vendas_por_regiao,
-            x='regiao',
-            y='vendas',
-            title='Vendas por Região',
-            labels={'vendas': 'Total de Vendas', 'regiao': 'Região'},
-            template='plotly_white',
-            color='regiao'
-        )
-        fig_vendas.update_layout(
-            showlegend=False,
-            xaxis_title='Região',
-            yaxis_title='Total de Vendas',
-            title_x=0.5
-        )
-        st.plotly_chart(fig_vendas, use_container_width=True)
+        vendas_por_regiao = resultados['vendas_por_regiao']
+        with span('vendas_por_regiao.figura'):
+            fig_vendas = app_region_figure(vendas_por_regiao)
+        with span('vendas_por_regiao.plotly_chart'):
+            st.plotly_chart(fig_vendas, use_container_width=True)
     
     with col2:
         # Gráfico de pizza por categoria
-        vendas_por_categoria = df_filtered.groupby('categoria')['vendas'].sum().reset_index()
-        fig_categorias = px.pie(
-            vendas_por_categoria,
-            values='vendas',
-            names='categoria',
-            title='Distribuição de Vendas por Categoria',
-            template='plotly_white',
-            color_discrete_sequence=px.colors.qualitative.Set3
-        )
-        fig_categorias.update_layout(
-            title_x=0.5,
-            showlegend=True,
-            legend=dict(
-                orientation="h",
-                yanchor="bottom",
-                y=-0.2,
-                xanchor="center",
-                x=0.5
-            )
-        )
-        st.plotly_chart(fig_categorias, use_container_width=True)
+        vendas_por_categoria = resultados['vendas_por_categoria']
+        with span('vendas_por_categoria.figura'):
+            fig_categorias = app_category_figure(vendas_por_categoria)
+        with span('vendas_por_categoria.plotly_chart'):
+            st.plotly_chart(fig_categorias, use_container_width=True)
 
 # Container para evolução temporal
 with st.container():
     st.subheader("Evolução Temporal")
     
-    # Preparar dados para o gráfico de evolução
-    evolucao_data = df_filtered.groupby('data').agg({
-        'vendas': 'sum',
-        'clientes': 'sum',
-        'receita': 'sum'
-    }).reset_index()
-    
-    # Criar gráfico de linha
-    fig_evolucao = px.line(
-        evolucao_data,
-        x='data',
-        y=['vendas', 'clientes', 'receita'],
-        title='Evolução das Métricas ao Longo do Tempo',
-        labels={'value': 'Valor', 'variable': 'Métrica'},
-        template='plotly_white',
-        color_discrete_sequence=px.colors.qualitative.Set1
-    )
-    
-    # Atualizar layout
-    fig_evolucao.update_layout(
-        xaxis_title='Data',
-        yaxis_title='Valor',
-        legend_title='Métricas',
-        hovermode='x unified',
-        title_x=0.5,
-        showlegend=True,
-        legend=dict(
-            orientation="h",
-            yanchor="bottom",
-            y=-0.2,
-            xanchor="center",
-            x=0.5
-        )
+    # Janela de visualização: o recorte e a redução de pontos são feitos no servidor,
+    # então cada janela menor volta com resolução maior
+    janela = st.radio(
+        "Janela",
+        list(JANELAS.keys()),
+        index=len(JANELAS) - 1,
+        horizontal=True,
+        key="janela_evolucao"
     )
     
-    # Adicionar botões de zoom
-    fig_evolucao.update_xaxes(
-        rangeslider_visible=True,
-        rangeselector=dict(
-            buttons=list([
-                dict(count=7, label="1w", step="day", stepmode="backward"),
-                dict(count=30, label="1m", step="day", stepmode="backward"),
-                dict(count=90, label="3m", step="day", stepmode="backward"),
-                dict(count=180, label="6m", step="day", stepmode="backward"),
-                dict(count=365, label="1y", step="day", stepmode="backward"),
-                dict(step="all", label="All")
-            ])
-        )
-    )
+    # Preparar dados para o gráfico de evolução
+    with span('evolucao.figura'):
+        fig_evolucao = app_timeline_figure(resultados['evolucao'], janela)
     
-    st.plotly_chart(fig_evolucao, use_container_width=True)
+    with span('evolucao.plotly_chart'):
+        st.plotly_chart(fig_evolucao, use_container_width=True)
 
 # Container para dados detalhados
-with st.container():
+with st.container(), span('dados_detalhados'):
     st.subheader("Dados Detalhados")
-    st.dataframe(df_filtered, use_container_width=True)
+    paginated_dataframe(
+        df_filtered,
+        key="dados_detalhados",
+        token=(store.version, data_inicio, data_fim, regiao_selecionada, categoria_selecionada),
+        use_container_width=True
+    )
 
 # Container para chat
-with st.container():
+with st.container(), span('chat'):
     st.markdown("---")
     
     # Botão Incluir acima do chat
@@ -370,6 +255,9 @@ with st.container():
     
     st.subheader("Chat com o Assistente")
     
+    # Sem o cache, a pergunta sempre vai à API (e a resposta nova atualiza o cache)
+    ignorar_cache = st.toggle("Ignorar cache de respostas", key="ignorar_cache_respostas")
+    
     # Inicializar histórico de chat se não existir
     if 'chat_history' not in st.session_state:
         st.session_state['chat_history'] = []
@@ -410,28 +298,44 @@ with st.container():
                 {"role": "user", "content": f"Contexto: {context}\n\nPergunta: {prompt}"}
             ]
             
-            # Fazer a chamada à API
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
+            # Fazer a chamada à API: a resposta é gerada em segundo plano, por streaming,
+            # ou reaproveitada do cache para a mesma pergunta sobre os mesmos filtros
+            parametros = {"model": "gpt-3.5-turbo", "max_tokens": 500, "temperature": 0.7}
+            st.session_state['chat_stream'] = start_answer(
+                client,
+                cache_key=response_key(
+                    prompt,
+                    ('app', store.version, data_inicio, data_fim, regiao_selecionada, categoria_selecionada),
+                    sistema=messages[0]['content'],
+                    **parametros
+                ),
+                use_cache=not ignorar_cache,
                 messages=messages,
-                max_tokens=500,
-                temperature=0.7
+                **parametros
             )
             
-            # Obter a resposta
-            assistant_response = response.choices[0].message.content
-            
-            # Adicionar resposta ao histórico
-            st.session_state['chat_history'].append({"role": "assistant", "content": assistant_response})
-            
-            # Exibir resposta
-            with st.chat_message("assistant"):
-                st.write(assistant_response)
-            
         except Exception as e:
             error_message = f"Erro ao processar a pergunta: {str(e)}"
             st.error(error_message)
             st.session_state['chat_history'].append({"role": "assistant", "content": error_message})
+    
+    # Exibir a resposta em andamento à medida que chega (pode ser interrompida)
+    resposta = render_stream('chat_stream', st.session_state['chat_history'])
+    
+    # Resposta concluída: os códigos de gráfico dela são executados (em paralelo, no pool
+    # de processos) e as figuras vão para os gráficos do assistente
+    plot_codes = extract_plot_code(resposta) if resposta else []
+    if plot_codes:
+        with span('graficos_resposta'):
+            for code, fig in execute_plot_codes(plot_codes):
+                st.session_state['generated_plots'].append(fig, code=code, timestamp=datetime.now())
+
+# Dados expostos aos códigos e sua identificação (versão dos dados e filtros),
+# usada para memoizar os resultados
+fingerprint_snippet = ('app', store.version, data_inicio, data_fim, regiao_selecionada, categoria_selecionada)
+
+def dados_snippet():
+    return {'df': load_full_data(store.version), 'df_filtered': df_filtered.copy()}
 
 # Interface de entrada de código
 if st.session_state.get('show_code_input', False):
@@ -456,32 +360,10 @@ if st.session_state.get('show_code_input', False):
         if st.button("Executar e Salvar", key="execute_code_button"):
             if code_input:
                 try:
-                    # Criar um namespace local para execução
-                    local_vars = {
-                        'df': df,
-                        'df_filtered': df_filtered,
-                        'px': px,
-                        'st': st,
-                        'pd': pd,
-                        'np': np,
-                        'plt': plt,
-                        'go': go
-                    }
-                    
-                    # Executar o código
-                    exec(code_input, globals(), local_vars)
-                    
-                    # Verificar se algum gráfico foi criado
-                    for var_name, var_value in local_vars.items():
-                        if isinstance(var_value, go.Figure):
-                            st.plotly_chart(var_value, use_container_width=True)
-                        elif isinstance(var_value, plt.Figure):
-                            st.pyplot(var_value)
-                    
-                    # Verificar se há uma figura atual do matplotlib
-                    if plt.get_fignums():
-                        st.pyplot(plt.gcf())
-                        plt.close('all')  # Limpar as figuras após exibir
+                    resultado, reaproveitado = run_snippet(
+                        code_input, dados_snippet, fingerprint_snippet, globais=globals()
+                    )
+                    render_result(resultado, reaproveitado)
                     
                     # Salvar o código
                     current_time = datetime.now()
@@ -508,55 +390,54 @@ if st.session_state['added_codes']:
     st.markdown("---")
     st.subheader("Códigos Salvos")
     
+    # Executa todos os códigos de uma vez; cada resultado aparece no seu código assim que fica pronto
+    executar_todos = st.button("▶️ Executar todos", key="run_all_saved")
+    progresso = st.empty()
+    espacos = {}
+    
     for idx, code_item in enumerate(st.session_state['added_codes']):
-        with st.expander(f"{code_item['name']} - {code_item['timestamp']}"):
+        with st.expander(f"{code_item['name']} - {code_item['timestamp']}", expanded=executar_todos):
             st.code(code_item['code'], language='python')
             
             col1, col2 = st.columns([1, 5])
             with col1:
-                if st.button("Executar", key=f"run_saved_{idx}"):
-                    try:
-                        # Criar um namespace local para execução
-                        local_vars = {
-                            'df': df,
-                            'df_filtered': df_filtered,
-                            'px': px,
-                            'st': st,
-                            'pd': pd,
-                            'np': np,
-                            'plt': plt,
-                            'go': go
-                        }
-                        
-                        # Executar o código
-                        exec(code_item['code'], globals(), local_vars)
-                        
-                        # Verificar se algum gráfico foi criado
-                        for var_name, var_value in local_vars.items():
-                            if isinstance(var_value, go.Figure):
-                                st.plotly_chart(var_value, use_container_width=True)
-                            elif isinstance(var_value, plt.Figure):
-                                st.pyplot(var_value)
-                        
-                        # Verificar se há uma figura atual do matplotlib
-                        if plt.get_fignums():
-                            st.pyplot(plt.gcf())
-                            plt.close('all')  # Limpar as figuras após exibir
-                        
-                        st.success("Código executado com sucesso!")
-                    except Exception as e:
-                        st.error(f"Erro ao executar o código: {str(e)}")
+                executar = st.button("Executar", key=f"run_saved_{idx}")
+            if executar:
+                try:
+                    resultado, reaproveitado = run_snippet(
+                        code_item['code'], dados_snippet, fingerprint_snippet, globais=globals()
+                    )
+                    render_result(resultado, reaproveitado)
+                    # Continua exibindo o resultado nas próximas execuções, enquanto estiver no cache
+                    code_item['exibir'] = True
+                    st.success("Código executado com sucesso!")
+                except Exception as e:
+                    st.error(f"Erro ao executar o código: {str(e)}")
+            elif executar_todos:
+                espacos[idx] = st.empty()
+            elif code_item.get('exibir'):
+                resultado = cached_result(code_item['code'], fingerprint_snippet)
+                if resultado is not None:
+                    render_result(resultado, reaproveitado=True)
             
             with col2:
                 if st.button("Remover", key=f"remove_{idx}"):
                     st.session_state['added_codes'].pop(idx)
                     st.experimental_rerun()
 
+    if executar_todos:
+        render_all(
+            st.session_state['added_codes'], espacos, dados_snippet, fingerprint_snippet,
+            globais=globals(), progresso=progresso
+        )
+
 # Seção de Gráficos Gerados pelo Assistente
 if 'generated_plots' in st.session_state and st.session_state['generated_plots']:
     st.markdown("### 📊 Gráficos Gerados pelo Assistente")
     
-    # Exibir os gráficos em ordem cronológica reversa (mais recentes primeiro)
-    for plot in reversed(st.session_state['generated_plots']):
-        st.plotly_chart(plot['figure'], use_container_width=True)
-        st.caption(f"Gerado em: {plot['timestamp'].strftime('%d/%m/%Y %H:%M:%S')}") 
\ No newline at end of file
+    # Exibir os gráficos mais recentes primeiro; os anteriores sob demanda
+    with span('graficos_assistente'):
+        render_plot_store(st.session_state['generated_plots'], 'graficos_assistente')
+
+# Fechar o perfil da execução (log e painel de depuração)
+end_rerun()
@@ -0,0 +1,273 @@
+"""Teste de carga dos caminhos de chat do dashboard contra um mock local da API.
+
+Simula sessões simultâneas enviando mensagens pelos mesmos módulos usados
+pelas páginas, sem navegador, e informa a latência (p50/p95/p99) e a vazão:
+
+- `processo`: conversa de várias mensagens (histórico com janela de tokens,
+  como no servidor do widget, e chamada sem streaming), com extração e
+  execução dos códigos de gráfico no pool de processos e armazenamento das
+  figuras na sessão;
+- `servidor`: requisições HTTP ao servidor do widget (chat_server.py),
+  iniciado em uma porta livre com `--workers` threads;
+- `streaming`: chat inline do app.py (resposta por streaming em segundo
+  plano, com o tempo até o primeiro trecho);
+- `arquivos`: chat da página de análise de arquivos (contexto montado a
+  partir dos perfis dos arquivos, resposta por streaming).
+
+Exemplos:
+
+    python benchmarks/chat_load.py --sessoes 50 --mensagens 3
+    python benchmarks/chat_load.py --caminhos processo --graficos 1 --linhas 100k
+    python benchmarks/chat_load.py --caminhos servidor --sessoes 300 --workers 64
+    python benchmarks/chat_load.py --base-url http://127.0.0.1:8799/v1 --output carga.json
+
+Sem `--base-url`, o mock (benchmarks/mock_llm.py) é iniciado em uma porta
+livre. Os caches de respostas e de resultados dos códigos ficam de fora da
+medição, a menos que `--com-cache` seja usado.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import httpx
+import numpy as np
+
+from benchmarks.mock_llm import start_mock_server
+from benchmarks.run_benchmarks import parse_size
+from chat_server import CHAT_SERVER_WORKERS, PooledWSGIServer, create_app, create_client
+from utils.artifacts import PlotStore
+from utils.chat import start_answer
+from utils.file_profile import profile_dataframe, build_context
+from utils.history import ConversationHistory, ask
+from utils.response_cache import response_key
+from utils.sample_data import generate_vendas
+from utils.snippets import extract_plot_code, run_snippets
+
+PARAMETROS = {"model": "gpt-3.5-turbo", "max_tokens": 500, "temperature": 0.7}
+SISTEMA = "Você é um assistente especializado em análise de dados de vendas."
+PERGUNTAS = [
+    "Como foram as vendas por região?",
+    "Mostre a evolução da receita ao longo do tempo.",
+    "Qual categoria teve o maior ticket médio?",
+    "Compare as vendas do Sul e do Sudeste.",
+]
+
+
+def _consumir(stream):
+    """Lê a resposta por streaming e retorna (tempo até o primeiro trecho, texto)."""
+    inicio = time.perf_counter()
+    primeiro = None
+    for trecho in stream.chunks(intervalo=0.05):
+        if trecho and primeiro is None:
+            primeiro = time.perf_counter() - inicio
+    if stream.error is not None:
+        raise stream.error
+    return primeiro, stream.text
+
+
+class Sessao:
+    """Estado de uma sessão simulada (o equivalente ao st.session_state)."""
+
+    def __init__(self, i, client, df, perfis, com_cache, endpoint=None):
+        self.i = i
+        self.client = client
+        self.df = df
+        self.perfis = perfis
+        self.com_cache = com_cache
+        self.endpoint = endpoint
+        self.historico = ConversationHistory()
+        self.graficos = PlotStore()
+
+    def processo(self, pergunta):
+        medidas = {}
+        inicio = time.perf_counter()
+        resposta, _ = ask(self.client, self.historico, pergunta, **PARAMETROS)
+        medidas['api'] = time.perf_counter() - inicio
+
+        codigos = extract_plot_code(resposta)
+        if codigos:
+            inicio = time.perf_counter()
+            fingerprint = ('carga', len(self.df)) if self.com_cache else None
+            for codigo, (resultado, _, erro) in zip(
+                codigos, run_snippets(codigos, lambda: {'df': self.df}, fingerprint)
+            ):
+                if erro is not None:
+                    raise erro
+                for figura in resultado['figuras']:
+                    self.graficos.append(figura, code=codigo, timestamp=datetime.now())
+            medidas['graficos'] = time.perf_counter() - inicio
+            medidas['n_graficos'] = len(codigos)
+        return medidas
+
+    def servidor(self, pergunta):
+        http, url = self.endpoint
+        resposta = http.post(url, json={'message': pergunta, 'session_id': f"carga-{self.i}"})
+        resposta.raise_for_status()
+        return {}
+
+    def _stream(self, pergunta, sistema, contexto, identificacao):
+        messages = [
+            {"role": "system", "content": sistema},
+            {"role": "user", "content": f"Contexto: {contexto}\n\nPergunta: {pergunta}"}
+        ]
+        chave = response_key(pergunta, identificacao, sistema=sistema, **PARAMETROS) if self.com_cache else None
+        primeiro, _ = _consumir(start_answer(self.client, cache_key=chave, messages=messages, **PARAMETROS))
+        return {'primeiro_trecho': primeiro}
+
+    def streaming(self, pergunta):
+        contexto = (
+            f"Total de vendas: {self.df['vendas'].sum():,.0f}\n"
+            f"Vendas por região:\n{self.df.groupby('regiao')['vendas'].sum().to_string()}"
+        )
+        return self._stream(pergunta, SISTEMA, contexto, ('carga', len(self.df)))
+
+    def arquivos(self, pergunta):
+        contexto, _ = build_context(self.perfis, pergunta)
+        return self._stream(pergunta, SISTEMA, contexto, ('carga-arquivos', len(self.df)))
+
+
+def _percentis(valores):
+    if not valores:
+        return None
+    valores = np.array(valores)
+    p50, p95, p99 = np.percentile(valores, [50, 95, 99])
+    return {'n': len(valores), 'p50': p50, 'p95': p95, 'p99': p99, 'max': float(valores.max())}
+
+
+def start_chat_server(client, workers):
+    """Servidor do widget em uma porta livre; retorna (servidor, url do endpoint)."""
+    servidor = PooledWSGIServer('127.0.0.1', 0, create_app(client), workers)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, f"http://127.0.0.1:{servidor.server_port}/process_message"
+
+
+def run_load(caminho, client, sessoes, mensagens, df, perfis, com_cache, endpoint=None):
+    """Executa `mensagens` perguntas em cada uma das `sessoes` simultâneas."""
+    estados = [Sessao(i, client, df, perfis, com_cache, endpoint) for i in range(sessoes)]
+
+    def executar(sessao):
+        medidas, erros = [], []
+        for j in range(mensagens):
+            pergunta = PERGUNTAS[(sessao.i + j) % len(PERGUNTAS)]
+            inicio = time.perf_counter()
+            try:
+                medida = getattr(sessao, caminho)(pergunta)
+            except Exception as e:
+                erros.append(f"{type(e).__name__}: {e}")
+                continue
+            medida['total'] = time.perf_counter() - inicio
+            medidas.append(medida)
+        return medidas, erros
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessoes) as executor:
+        resultados = list(executor.map(executar, estados))
+    duracao = time.perf_counter() - inicio
+
+    medidas = [m for ms, _ in resultados for m in ms]
+    erros = [e for _, es in resultados for e in es]
+    return {
+        'caminho': caminho,
+        'sessoes': sessoes,
+        'mensagens': mensagens,
+        'segundos': duracao,
+        'ok': len(medidas),
+        'erros': len(erros),
+        'exemplos_erro': sorted(set(erros))[:5],
+        'vazao': len(medidas) / duracao,
+        'latencia': {
+            etapa: _percentis([m[etapa] for m in medidas if m.get(etapa) is not None])
+            for etapa in ('total', 'api', 'primeiro_trecho', 'graficos')
+        },
+        'graficos': sum(m.get('n_graficos', 0) for m in medidas)
+    }
+
+
+def report(resultado):
+    print(f"{resultado['caminho']}: {resultado['sessoes']} sessões x {resultado['mensagens']} mensagens")
+    print(f"  {resultado['ok']} ok, {resultado['erros']} com erro, em {resultado['segundos']:.1f} s "
+          f"({resultado['vazao']:.1f} mensagens/s, {resultado['graficos']} gráficos)")
+    for etapa, p in resultado['latencia'].items():
+        if p is not None:
+            print(f"  {etapa:<16} p50 {p['p50'] * 1000:7.0f} ms  p95 {p['p95'] * 1000:7.0f} ms  "
+                  f"p99 {p['p99'] * 1000:7.0f} ms  máx {p['max'] * 1000:7.0f} ms")
+    for erro in resultado['exemplos_erro']:
+        print(f"  erro: {erro}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Teste de carga dos caminhos de chat do dashboard.")
+    parser.add_argument('--caminhos', nargs='+', choices=['processo', 'servidor', 'streaming', 'arquivos'],
+                        default=['processo', 'streaming', 'arquivos'])
+    parser.add_argument('--sessoes', type=int, default=20, help="Sessões simultâneas.")
+    parser.add_argument('--mensagens', type=int, default=3, help="Mensagens por sessão.")
+    parser.add_argument('--linhas', default='10k', help="Linhas dos dados de vendas (ex.: 10k, 1M).")
+    parser.add_argument('--base-url', help="API já em execução (padrão: inicia o mock local).")
+    parser.add_argument('--latencia', type=float, default=0.5, help="Latência (s) do mock até o primeiro trecho.")
+    parser.add_argument('--tokens-por-s', type=float, default=50, help="Ritmo dos trechos do mock.")
+    parser.add_argument('--graficos', type=float, default=0.5,
+                        help="Proporção das respostas do mock com código de gráfico.")
+    parser.add_argument('--workers', type=int, default=CHAT_SERVER_WORKERS,
+                        help="Threads do servidor do widget no caminho `servidor`.")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--com-cache', action='store_true',
+                        help="Usa os caches de respostas e de resultados dos códigos.")
+    parser.add_argument('--output', help="Grava os resultados em JSON.")
+    args = parser.parse_args(argv)
+
+    mock = None
+    base_url = args.base_url
+    if base_url is None:
+        mock, base_url = start_mock_server(
+            latencia=args.latencia, tokens_por_s=args.tokens_por_s,
+            proporcao_graficos=args.graficos, seed=args.seed
+        )
+    os.environ.setdefault('OPENAI_API_KEY', 'mock')
+    client = create_client(base_url, conexoes=args.sessoes)
+
+    df = generate_vendas(parse_size(args.linhas), seed=42)
+    # Os perfis são calculados no upload, fora da conversa
+    perfis = {'vendas.csv': profile_dataframe(df)}
+
+    servidor = endpoint = None
+    if 'servidor' in args.caminhos:
+        servidor, url = start_chat_server(client, args.workers)
+        # Um só cliente para todas as sessões: criar um por sessão custaria mais que as requisições
+        http = httpx.Client(
+            timeout=300,
+            limits=httpx.Limits(max_connections=args.sessoes, max_keepalive_connections=args.sessoes)
+        )
+        endpoint = (http, url)
+
+    resultados = []
+    for caminho in args.caminhos:
+        resultado = run_load(caminho, client, args.sessoes, args.mensagens, df, perfis, args.com_cache, endpoint)
+        report(resultado)
+        resultados.append(resultado)
+
+    if servidor is not None:
+        endpoint[0].close()
+        servidor.shutdown()
+        servidor.server_close()
+    if mock is not None:
+        mock.shutdown()
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({
+                'inicio': datetime.now().isoformat(timespec='seconds'),
+                'parametros': vars(args),
+                'resultados': resultados
+            }, f, indent=2, ensure_ascii=False, default=float)
+    return 1 if any(r['erros'] for r in resultados) else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,186 @@
+"""Servidor local compatível com a API de chat da OpenAI, para testes de carga.
+
+Responde a POST /v1/chat/completions, com e sem streaming, com respostas
+prontas: parte delas traz blocos de código de gráfico no formato que
+`extract_plot_code` reconhece. O primeiro trecho sai após `--latencia`
+segundos e os seguintes no ritmo de `--tokens-por-s`. Para apontar o
+dashboard ou o servidor de chat para ele, defina OPENAI_BASE_URL:
+
+    python benchmarks/mock_llm.py --port 8799 --latencia 0.5 --tokens-por-s 50
+    OPENAI_BASE_URL=http://127.0.0.1:8799/v1 streamlit run app.py
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RESPOSTA = (
+    "As vendas cresceram no período analisado, puxadas pela região Sudeste "
+    "e pela categoria Eletrônicos."
+)
+
+RESPOSTAS_TEXTO = [
+    RESPOSTA,
+    "A receita média por cliente ficou estável, com leve queda no último mês. "
+    "Vale comparar as categorias Alimentos e Vestuário, que tiveram o maior desvio.",
+    "O ticket médio foi maior no Sul. Sugiro analisar a evolução diária das vendas "
+    "por região e verificar a sazonalidade nos fins de semana.",
+]
+
+RESPOSTAS_GRAFICO = [
+    "Segue a comparação das vendas por região:\n\n"
+    "```python\n"
+    "fig = px.bar(df.groupby('regiao', as_index=False)['vendas'].sum(), x='regiao', y='vendas', "
+    "title='Vendas por Região')\n"
+    "```\n\n"
+    "O Sudeste concentra a maior parte das vendas.",
+    "A evolução da receita e a distribuição por categoria:\n\n"
+    "```python\n"
+    "fig = px.line(df.groupby(df['data'].dt.to_period('M').astype(str))['receita'].sum().reset_index(), "
+    "x='data', y='receita', title='Receita Mensal')\n"
+    "```\n\n"
+    "```python\n"
+    "fig = px.pie(df, values='vendas', names='categoria', title='Vendas por Categoria')\n"
+    "```\n\n"
+    "A receita cresce no fim do período e Eletrônicos lidera as vendas.",
+]
+
+
+def _trechos(texto):
+    """Divide o texto em trechos de tamanho parecido com o de um token."""
+    return re.findall(r'\s*\S{1,4}', texto) or [texto]
+
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Cabeçalhos e corpo saem em escritas separadas; com Nagle, cada resposta esperaria o ACK atrasado
+    disable_nagle_algorithm = True
+    latencia = 0.5
+    tokens_por_s = 0
+    proporcao_graficos = 0.0
+    sorteio = random.Random(0)
+    sorteio_lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def _escolher_resposta(self):
+        with self.sorteio_lock:
+            grafico = self.sorteio.random() < self.proporcao_graficos
+            return self.sorteio.choice(RESPOSTAS_GRAFICO if grafico else RESPOSTAS_TEXTO)
+
+    def _pausa_por_trecho(self):
+        return 1 / self.tokens_por_s if self.tokens_por_s > 0 else 0
+
+    def do_POST(self):
+        tamanho = int(self.headers.get('Content-Length', 0))
+        corpo = json.loads(self.rfile.read(tamanho) or b'{}')
+        self.resposta = self._escolher_resposta()
+        time.sleep(self.latencia)
+        if corpo.get('stream'):
+            self._stream(corpo)
+        else:
+            # Sem streaming, a resposta só sai depois de "gerada" por inteiro
+            time.sleep(len(_trechos(self.resposta)) * self._pausa_por_trecho())
+            self._completo(corpo)
+
+    def _completo(self, corpo):
+        saida = json.dumps({
+            'id': 'mock',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': corpo.get('model', 'mock'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': self.resposta},
+                'finish_reason': 'stop'
+            }],
+            'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0}
+        }).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(saida)))
+        self.end_headers()
+        self.wfile.write(saida)
+
+    def _stream(self, corpo):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        def evento(dados):
+            bloco = f"data: {dados}\n\n".encode('utf-8')
+            self.wfile.write(f"{len(bloco):x}\r\n".encode() + bloco + b"\r\n")
+            self.wfile.flush()
+
+        try:
+            pausa = self._pausa_por_trecho()
+            for n, trecho in enumerate(_trechos(self.resposta)):
+                if n and pausa:
+                    time.sleep(pausa)
+                evento(json.dumps({
+                    'id': 'mock',
+                    'object': 'chat.completion.chunk',
+                    'created': int(time.time()),
+                    'model': corpo.get('model', 'mock'),
+                    'choices': [{'index': 0, 'delta': {'content': trecho}, 'finish_reason': None}]
+                }))
+            evento('[DONE]')
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # O cliente cancelou a resposta
+            pass
+
+
+class MockLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+def _handler(latencia, tokens_por_s, proporcao_graficos, seed):
+    return type('Handler', (MockLLMHandler,), {
+        'latencia': latencia,
+        'tokens_por_s': tokens_por_s,
+        'proporcao_graficos': proporcao_graficos,
+        'sorteio': random.Random(seed),
+        'sorteio_lock': threading.Lock()
+    })
+
+
+def start_mock_server(host='127.0.0.1', port=0, latencia=0.5, tokens_por_s=0, proporcao_graficos=0.0, seed=0):
+    """Inicia o servidor em uma thread e retorna (servidor, base_url)."""
+    servidor = MockLLMServer((host, port), _handler(latencia, tokens_por_s, proporcao_graficos, seed))
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, f"http://{host}:{servidor.server_port}/v1"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor local que imita a API de chat da OpenAI.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8799)
+    parser.add_argument('--latencia', type=float, default=0.5,
+                        help="Segundos até o primeiro trecho da resposta.")
+    parser.add_argument('--tokens-por-s', type=float, default=50,
+                        help="Ritmo dos trechos seguintes (0 envia tudo de uma vez).")
+    parser.add_argument('--graficos', type=float, default=0.5,
+                        help="Proporção das respostas com código de gráfico (0 a 1).")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    servidor = MockLLMServer(
+        (args.host, args.port),
+        _handler(args.latencia, args.tokens_por_s, args.graficos, args.seed)
+    )
+    print(f"Mock da API em http://{args.host}:{servidor.server_port}/v1")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
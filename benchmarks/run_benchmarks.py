@@ -0,0 +1,400 @@
+"""Benchmark dos pipelines do dashboard, sem navegador.
+
+Executa as etapas de cada página (geração/carga, filtros, métricas, cada
+groupby, construção das figuras plotly e serialização) em vários tamanhos de
+dataset e grava tempo e pico de memória por etapa em JSON.
+
+Exemplos:
+
+    python benchmarks/run_benchmarks.py --sizes 10k 1M
+    python benchmarks/run_benchmarks.py --sizes 10k 1M 10M 100M --pages app vendas
+    python benchmarks/run_benchmarks.py --sizes 1M --baseline benchmarks/resultados/anterior.json
+
+O tempo é o menor entre `--repeat` execuções sem tracemalloc; a memória vem de
+uma execução extra com tracemalloc (alocações feitas pelo Arrow não entram
+nessa conta, mas entram no RSS máximo do processo).
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import numpy as np
+import pandas as pd
+import plotly
+import plotly.io as pio
+from streamlit.type_util import data_frame_to_bytes
+
+from utils import pipelines
+from utils.cube import RollupCube, DIMENSOES, METRICAS
+from utils.datasource import InMemorySource
+from utils.pagination import PAGE_SIZES
+from utils.sample_data import (
+    generate_vendas,
+    generate_vendas_canais,
+    generate_clientes,
+    generate_financeiro,
+    generate_produtos,
+    generate_marketing
+)
+
+# Os dados gerados são distribuídos em no máximo dois anos de datas
+DIAS = 730
+MB = 1024 * 1024
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def parse_size(texto):
+    """Converte '10k', '1M', '100M' ou '5000' em número de linhas."""
+    multiplicadores = {'k': 10 ** 3, 'm': 10 ** 6, 'g': 10 ** 9}
+    texto = texto.strip().lower()
+    if texto[-1] in multiplicadores:
+        return int(float(texto[:-1]) * multiplicadores[texto[-1]])
+    return int(texto)
+
+
+def _rss_max_mb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss é em bytes no macOS e em KB no Linux
+    return rss / MB if sys.platform == 'darwin' else rss / 1024
+
+
+class Medicao:
+    """Registra tempo (e, com tracemalloc ativo, pico de memória) de cada etapa."""
+
+    def __init__(self, memoria=False):
+        self.memoria = memoria
+        self.etapas = {}
+
+    @contextmanager
+    def __call__(self, nome):
+        if self.memoria:
+            tracemalloc.reset_peak()
+            antes = tracemalloc.get_traced_memory()[0]
+        inicio = time.perf_counter()
+        yield
+        resultado = {'segundos': time.perf_counter() - inicio}
+        if self.memoria:
+            atual, pico = tracemalloc.get_traced_memory()
+            resultado['pico_mb'] = (pico - antes) / MB
+            resultado['retido_mb'] = (atual - antes) / MB
+            resultado['rss_max_mb'] = _rss_max_mb()
+        self.etapas[nome] = resultado
+
+
+def _metade(valores):
+    """Seleção usada nos filtros de múltipla escolha: metade dos valores."""
+    return valores[:max(1, len(valores) // 2)]
+
+
+def _serializar(etapa, figuras, tabela):
+    """Serialização feita pelo st.plotly_chart e pela primeira página do st.dataframe."""
+    with etapa('serializacao_figuras'):
+        for fig in figuras:
+            pio.to_json(fig, validate=False)
+    with etapa('serializacao_tabela'):
+        data_frame_to_bytes(tabela.iloc[:PAGE_SIZES[1]])
+
+
+def pipeline_app(etapa, n):
+    with etapa('geracao'):
+        df = generate_vendas(n, dias=DIAS, seed=42)
+    with etapa('carga'):
+        source = InMemorySource(df, 'data', ['regiao', 'categoria'])
+    with etapa('cubo'):
+        cube = RollupCube(source.load(DIMENSOES + METRICAS))
+
+    # Último trimestre de uma região
+    _, data_fim = source.date_bounds()
+    data_inicio = data_fim - pd.Timedelta(days=90)
+    regiao = source.distinct('regiao')[0]
+    with etapa('filtro'):
+        resultados = pipelines.app_results(source, cube, data_inicio, data_fim, regiao, "Todas")
+    with etapa('metricas'):
+        pipelines.app_metrics(resultados['totais'], resultados['totais_gerais'])
+    with etapa('figuras'):
+        figuras = [
+            pipelines.app_region_figure(resultados['vendas_por_regiao']),
+            pipelines.app_category_figure(resultados['vendas_por_categoria']),
+            pipelines.app_timeline_figure(resultados['evolucao'], 'All')
+        ]
+    _serializar(etapa, figuras, resultados['df_filtered'])
+
+
+def pipeline_vendas(etapa, n):
+    with etapa('geracao'):
+        df = generate_vendas_canais(n, dias=DIAS)
+    with etapa('carga'):
+        source = InMemorySource(df, 'Data', ['Categoria', 'Região', 'Canal'])
+    filtros = [_metade(source.distinct(c)) for c in ['Categoria', 'Região', 'Canal']]
+    with etapa('filtro'):
+        data = pipelines.vendas_filter(source, *filtros)
+    with etapa('metricas'):
+        pipelines.vendas_metrics(data)
+    with etapa('groupby_categoria'):
+        por_categoria = pipelines.vendas_by(data, 'Categoria')
+    with etapa('groupby_regiao'):
+        por_regiao = pipelines.vendas_by(data, 'Região')
+    with etapa('groupby_data'):
+        por_data = pipelines.vendas_by(data, 'Data')
+    with etapa('figuras'):
+        figuras = [
+            pipelines.vendas_category_figure(por_categoria),
+            pipelines.vendas_region_figure(por_regiao),
+            pipelines.vendas_timeline_figure(por_data)
+        ]
+    _serializar(etapa, figuras, data)
+
+
+def pipeline_clientes(etapa, n):
+    with etapa('geracao'):
+        df = generate_clientes(n, dias=DIAS)
+    with etapa('carga'):
+        source = InMemorySource(df, categorical_columns=['Segmento', 'Cidade'])
+    filtros = [_metade(source.distinct(c)) for c in ['Segmento', 'Cidade']]
+    with etapa('filtro'):
+        data = pipelines.clientes_filter(source, *filtros, (1, 5))
+    with etapa('metricas'):
+        pipelines.clientes_metrics(data)
+    with etapa('groupby_segmento'):
+        por_segmento = pipelines.clientes_by_segment(data)
+    with etapa('figuras'):
+        figuras = [
+            pipelines.clientes_segment_figure(por_segmento),
+            pipelines.clientes_age_figure(data),
+            pipelines.clientes_scatter_figure(data)
+        ]
+    _serializar(etapa, figuras, data)
+
+
+def pipeline_financeiro(etapa, n):
+    with etapa('geracao'):
+        df = generate_financeiro(n, dias=DIAS)
+    with etapa('carga'):
+        source = InMemorySource(df, 'Data')
+    with etapa('derivadas'):
+        data = pipelines.financeiro_load(source)
+
+    # Período padrão do select_slider: do primeiro ao último mês
+    meses = pipelines.financeiro_months(data)
+    periodo = (meses.iloc[0], meses.iloc[-1])
+    with etapa('filtro'):
+        data_filtrada = pipelines.financeiro_filter(data, periodo)
+    with etapa('metricas'):
+        pipelines.financeiro_metrics(data_filtrada)
+    with etapa('figuras'):
+        figuras = [
+            pipelines.financeiro_revenue_figure(data_filtrada),
+            pipelines.financeiro_expenses_figure(data_filtrada),
+            pipelines.financeiro_margins_figure(data_filtrada)
+        ]
+    _serializar(etapa, figuras, data_filtrada)
+
+
+def pipeline_produtos(etapa, n):
+    with etapa('geracao'):
+        df = generate_produtos(n)
+    with etapa('carga'):
+        source = InMemorySource(df, categorical_columns=['Categoria', 'Fornecedor'])
+    with etapa('derivadas'):
+        data, bitmap_index = pipelines.produtos_load(source)
+    filtros = [_metade(bitmap_index.values(c)) for c in ['Categoria', 'Fornecedor']]
+    with etapa('filtro'):
+        data_filtrada = pipelines.produtos_filter(data, bitmap_index, *filtros, bitmap_index.values('Status_Estoque'))
+        baixo_estoque = pipelines.produtos_low_stock(data_filtrada)
+    with etapa('metricas'):
+        pipelines.produtos_metrics(data_filtrada)
+    with etapa('groupby_categoria'):
+        por_categoria = pipelines.produtos_by_category(data_filtrada)
+    with etapa('figuras'):
+        figuras = [
+            pipelines.produtos_category_figure(por_categoria),
+            pipelines.produtos_price_figure(data_filtrada),
+            pipelines.produtos_scatter_figure(data_filtrada)
+        ]
+    _serializar(etapa, figuras, baixo_estoque)
+
+
+def pipeline_marketing(etapa, n):
+    with etapa('geracao'):
+        df = generate_marketing(n, dias=DIAS)
+    with etapa('carga'):
+        source = InMemorySource(df, 'Data', ['Canal'])
+    data_inicio, data_fim = source.date_bounds()
+    with etapa('filtro'):
+        data = pipelines.marketing_filter(source, _metade(source.distinct('Canal')), data_inicio, data_fim)
+    with etapa('metricas'):
+        pipelines.marketing_metrics(data)
+    with etapa('groupby_canal'):
+        por_canal = pipelines.marketing_by_channel(data)
+    with etapa('groupby_canal_roi'):
+        roi_por_canal = pipelines.marketing_roi_by_channel(data)
+    with etapa('figuras'):
+        figuras = [
+            pipelines.marketing_channel_figure(por_canal),
+            pipelines.marketing_roi_figure(roi_por_canal),
+            pipelines.marketing_timeline_figure(data)
+        ]
+    _serializar(etapa, figuras, data)
+
+
+PIPELINES = {
+    'app': pipeline_app,
+    'vendas': pipeline_vendas,
+    'clientes': pipeline_clientes,
+    'financeiro': pipeline_financeiro,
+    'produtos': pipeline_produtos,
+    'marketing': pipeline_marketing
+}
+
+
+def run_pipeline(pipeline, n, repeticoes=1, memoria=True):
+    """Executa o pipeline e retorna {etapa: medidas}: menor tempo e pico de memória."""
+    etapas = {}
+    for _ in range(repeticoes):
+        medicao = Medicao()
+        pipeline(medicao, n)
+        gc.collect()
+        for nome, resultado in medicao.etapas.items():
+            melhor = etapas.setdefault(nome, resultado)
+            melhor['segundos'] = min(melhor['segundos'], resultado['segundos'])
+
+    if memoria:
+        medicao = Medicao(memoria=True)
+        tracemalloc.start()
+        try:
+            pipeline(medicao, n)
+        finally:
+            tracemalloc.stop()
+            gc.collect()
+        for nome, resultado in medicao.etapas.items():
+            resultado.pop('segundos')
+            etapas[nome].update(resultado)
+    return etapas
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=RAIZ, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    """Versões e máquina, para comparar só execuções equivalentes."""
+    import pyarrow
+    import streamlit
+    return {
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'pyarrow': pyarrow.__version__,
+        'plotly': plotly.__version__,
+        'streamlit': streamlit.__version__,
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count()
+    }
+
+
+def compare(resultados, baseline, tolerancia, minimo=0.01):
+    """Etapas que ficaram mais lentas (ou usaram mais memória) que na execução de referência."""
+    referencia = {
+        (r['pagina'], r['linhas'], r['etapa']): r
+        for r in baseline['resultados']
+        if 'erro' not in r
+    }
+    regressoes = []
+    for r in resultados:
+        anterior = referencia.get((r['pagina'], r['linhas'], r['etapa']))
+        if anterior is None or 'erro' in r:
+            continue
+        for medida, piso in [('segundos', minimo), ('pico_mb', 1.0)]:
+            if medida not in r or medida not in anterior or anterior[medida] < piso:
+                continue
+            razao = r[medida] / anterior[medida]
+            if razao > 1 + tolerancia:
+                regressoes.append({**r, 'medida': medida, 'anterior': anterior[medida], 'razao': razao})
+    return regressoes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark dos pipelines do dashboard.")
+    parser.add_argument('--sizes', nargs='+', default=['10k', '1M'],
+                        help="Tamanhos dos datasets (ex.: 10k 1M 10M 100M).")
+    parser.add_argument('--pages', nargs='+', choices=list(PIPELINES), default=list(PIPELINES),
+                        help="Páginas a medir.")
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="Execuções por tamanho; o tempo registrado é o menor.")
+    parser.add_argument('--no-memory', action='store_true',
+                        help="Não mede o pico de memória (dispensa a execução com tracemalloc).")
+    parser.add_argument('--output', help="Arquivo JSON de saída (padrão: benchmarks/resultados/<data>.json).")
+    parser.add_argument('--baseline', help="JSON de uma execução anterior para comparação.")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="Aumento relativo aceito antes de acusar regressão (padrão: 0.25).")
+    args = parser.parse_args(argv)
+
+    resultados = []
+    for tamanho in args.sizes:
+        n = parse_size(tamanho)
+        for pagina in args.pages:
+            print(f"{pagina} ({n:,} linhas)...", file=sys.stderr, flush=True)
+            try:
+                etapas = run_pipeline(PIPELINES[pagina], n, args.repeat, not args.no_memory)
+            except MemoryError as e:
+                resultados.append({'pagina': pagina, 'linhas': n, 'etapa': None, 'erro': f"MemoryError: {e}"})
+                continue
+            for nome, medidas in etapas.items():
+                resultados.append({'pagina': pagina, 'linhas': n, 'etapa': nome, **medidas})
+                pico = f"{medidas['pico_mb']:10.1f} MB" if 'pico_mb' in medidas else ''
+                print(f"  {nome:<24}{medidas['segundos']:10.4f} s{pico}", file=sys.stderr)
+
+    saida = {
+        'inicio': datetime.now().isoformat(timespec='seconds'),
+        'ambiente': environment(),
+        'parametros': {'repeticoes': args.repeat, 'dias': DIAS},
+        'resultados': resultados
+    }
+    caminho = args.output or os.path.join(
+        RAIZ, 'benchmarks', 'resultados', datetime.now().strftime('%Y%m%d-%H%M%S') + '.json'
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump(saida, f, indent=2, ensure_ascii=False)
+    print(f"Resultados gravados em {caminho}", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressoes = compare(resultados, json.load(f), args.tolerance)
+        for r in regressoes:
+            print(
+                f"REGRESSÃO {r['pagina']} {r['linhas']:,} {r['etapa']} {r['medida']}: "
+                f"{r['anterior']:.4f} -> {r[r['medida']]:.4f} ({r['razao']:.2f}x)",
+                file=sys.stderr
+            )
+        if regressoes:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
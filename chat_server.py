@@ -0,0 +1,132 @@
+"""Servidor do chat do widget (static/chatbot.html), independente do Streamlit.
+
+Atende POST /process_message com {"message": ..., "session_id": ...}. O
+histórico de cada sessão fica no próprio servidor, as requisições são
+atendidas por um pool fixo de threads e as conexões com a API do modelo são
+reaproveitadas entre as requisições.
+
+Exemplos:
+
+    python chat_server.py --port 5000 --workers 64
+
+O teste de carga do servidor fica em benchmarks/chat_load.py (caminho
+`servidor`).
+"""
+import argparse
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+from dotenv import load_dotenv
+from flask import Flask, jsonify, request
+from openai import OpenAI
+from werkzeug.serving import ThreadedWSGIServer, WSGIRequestHandler
+
+from utils.history import HistoryStore, ask
+
+load_dotenv()
+
+# Requisições atendidas ao mesmo tempo e conexões mantidas com a API do modelo
+CHAT_SERVER_WORKERS = int(os.getenv('CHAT_SERVER_WORKERS', 64))
+UPSTREAM_CONNECTIONS = int(os.getenv('CHAT_SERVER_CONNECTIONS', 64))
+PARAMETROS = {"model": "gpt-3.5-turbo", "max_tokens": 500, "temperature": 0.7}
+
+
+def create_client(base_url=None, conexoes=UPSTREAM_CONNECTIONS):
+    """Cliente da API com um pool de conexões HTTP compartilhado pelas threads."""
+    http_client = httpx.Client(
+        limits=httpx.Limits(max_connections=conexoes, max_keepalive_connections=conexoes),
+        timeout=httpx.Timeout(60.0, connect=5.0)
+    )
+    return OpenAI(api_key=os.getenv('OPENAI_API_KEY'), base_url=base_url, http_client=http_client)
+
+
+def create_app(client, sessoes=None):
+    app = Flask(__name__)
+    sessoes = sessoes if sessoes is not None else HistoryStore()
+
+    @app.after_request
+    def permitir_widget(resposta):
+        # O widget roda em um iframe do Streamlit, com outra origem
+        resposta.headers['Access-Control-Allow-Origin'] = '*'
+        resposta.headers['Access-Control-Allow-Headers'] = 'Content-Type'
+        resposta.headers['Access-Control-Allow-Methods'] = 'POST, OPTIONS'
+        return resposta
+
+    @app.route('/process_message', methods=['POST', 'OPTIONS'])
+    def process_message():
+        if request.method == 'OPTIONS':
+            return '', 204
+        data = request.get_json(silent=True) or {}
+        message = str(data.get('message', '')).strip()
+        if not message:
+            return jsonify({'error': "Mensagem vazia."}), 400
+        sessao = str(data.get('session_id') or uuid.uuid4().hex)
+
+        try:
+            response, tokens = ask(client, sessoes.get(sessao), message, **PARAMETROS)
+        except Exception as e:
+            return jsonify({
+                'response': f"Desculpe, ocorreu um erro: {str(e)}",
+                'session_id': sessao
+            }), 502
+        return jsonify({'response': response, 'session_id': sessao, 'tokens_enviados': tokens})
+
+    @app.route('/health')
+    def health():
+        return jsonify({'status': 'ok', 'sessoes': len(sessoes)})
+
+    return app
+
+
+class _RequestHandler(WSGIRequestHandler):
+    # Uma requisição por conexão: conexões ociosas não prendem threads do pool
+    protocol_version = 'HTTP/1.0'
+    disable_nagle_algorithm = True
+
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+class PooledWSGIServer(ThreadedWSGIServer):
+    """Servidor WSGI que atende as conexões em um pool fixo de threads."""
+
+    request_queue_size = 1024
+
+    def __init__(self, host, port, app, workers=CHAT_SERVER_WORKERS):
+        super().__init__(host, port, app, handler=_RequestHandler)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='chat-server')
+
+    def process_request(self, request, client_address):
+        self._pool.submit(self.process_request_thread, request, client_address)
+
+    def server_close(self):
+        super().server_close()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor do chat do widget.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=CHAT_SERVER_WORKERS,
+                        help="Requisições atendidas ao mesmo tempo.")
+    parser.add_argument('--connections', type=int, default=UPSTREAM_CONNECTIONS,
+                        help="Conexões HTTP mantidas com a API do modelo.")
+    args = parser.parse_args(argv)
+
+    servidor = PooledWSGIServer(args.host, args.port, create_app(create_client(conexoes=args.connections)),
+                                args.workers)
+    print(f"Chat em http://{args.host}:{servidor.server_port}/process_message ({args.workers} workers)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
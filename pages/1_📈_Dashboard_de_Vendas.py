@@ -4,6 +4,15 @@ import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 import streamlit.components.v1 as components
+from utils.datasource import get_data_source
+from utils.pagination import paginated_dataframe
+from utils.cache import shared_cache
+from utils.sample_data import generate_vendas_canais
+from utils.pipelines import (
+    vendas_filter, vendas_metrics, vendas_by,
+    vendas_category_figure, vendas_region_figure, vendas_timeline_figure
+)
+from utils.profiler import start_rerun, span, end_rerun
 
 # Configuração da página
 st.set_page_config(
@@ -12,96 +21,105 @@ st.set_page_config(
     layout="wide"
 )
 
+# Perfil da execução (spans por seção)
+start_rerun('vendas')
+
 # Título
 st.title("📈 Dashboard de Vendas")
 
-# Dados de exemplo
-np.random.seed(42)
-dates = pd.date_range(start='2024-01-01', periods=100)
-data = pd.DataFrame({
-    'Data': dates,
-    'Vendas': np.random.randint(1000, 10000, 100),
-    'Categoria': np.random.choice(['Eletrônicos', 'Vestuário', 'Alimentos', 'Móveis'], 100),
-    'Região': np.random.choice(['Norte', 'Sul', 'Leste', 'Oeste'], 100),
-    'Canal': np.random.choice(['Online', 'Loja Física', 'Marketplace'], 100)
-})
+# Fonte de dados: extratos em DASHBOARD_DATA_DIR ou os dados de exemplo
+@st.cache_resource
+def get_source():
+    return get_data_source(
+        'vendas_canais',
+        generate_vendas_canais,
+        date_column='Data',
+        categorical_columns=['Categoria', 'Região', 'Canal']
+    )
+
+with span('dados'):
+    source = get_source()
+    # Arquivos novos no diretório do dataset mudam a versão da fonte
+    source.poll()
 
 # Sidebar com filtros
-st.sidebar.header("Filtros")
-categoria = st.sidebar.multiselect(
-    "Categoria:",
-    options=data['Categoria'].unique(),
-    default=data['Categoria'].unique()
-)
+with span('filtros'):
+    st.sidebar.header("Filtros")
+    categoria = st.sidebar.multiselect(
+        "Categoria:",
+        options=source.distinct('Categoria'),
+        default=source.distinct('Categoria')
+    )
 
-regiao = st.sidebar.multiselect(
-    "Região:",
-    options=data['Região'].unique(),
-    default=data['Região'].unique()
-)
+    regiao = st.sidebar.multiselect(
+        "Região:",
+        options=source.distinct('Região'),
+        default=source.distinct('Região')
+    )
 
-canal = st.sidebar.multiselect(
-    "Canal de Vendas:",
-    options=data['Canal'].unique(),
-    default=data['Canal'].unique()
-)
+    canal = st.sidebar.multiselect(
+        "Canal de Vendas:",
+        options=source.distinct('Canal'),
+        default=source.distinct('Canal')
+    )
 
-# Filtrando dados
-data_filtrada = data[
-    (data['Categoria'].isin(categoria)) &
-    (data['Região'].isin(regiao)) &
-    (data['Canal'].isin(canal))
-]
+# Filtrando dados (resultado compartilhado entre as sessões)
+with span('filtro'):
+    data_filtrada = shared_cache().get_or_compute(
+        ('vendas_canais', source.version, tuple(sorted(categoria)), tuple(sorted(regiao)), tuple(sorted(canal))),
+        lambda: vendas_filter(source, categoria, regiao, canal)
+    )
 
 # Métricas principais
-col1, col2, col3, col4 = st.columns(4)
-with col1:
-    st.metric("Vendas Totais", f"R$ {data_filtrada['Vendas'].sum():,.2f}", "+12%")
-with col2:
-    st.metric("Ticket Médio", f"R$ {data_filtrada['Vendas'].mean():,.2f}", "+5%")
-with col3:
-    st.metric("Pedidos", len(data_filtrada), "+8%")
-with col4:
-    st.metric("Crescimento", "+15%", "+3%")
+with span('metricas'):
+    metricas = vendas_metrics(data_filtrada)
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Vendas Totais", f"R$ {metricas['total']:,.2f}", "+12%")
+    with col2:
+        st.metric("Ticket Médio", f"R$ {metricas['ticket_medio']:,.2f}", "+5%")
+    with col3:
+        st.metric("Pedidos", metricas['pedidos'], "+8%")
+    with col4:
+        st.metric("Crescimento", "+15%", "+3%")
 
 # Gráficos
 col1, col2 = st.columns(2)
 
 with col1:
     st.subheader("Vendas por Categoria")
-    fig_cat = px.bar(
-        data_filtrada.groupby('Categoria')['Vendas'].sum().reset_index(),
-        x='Categoria',
-        y='Vendas',
-        color='Categoria'
-    )
-    st.plotly_chart(fig_cat, use_container_width=True)
+    with span('vendas_por_categoria.figura'):
+        fig_cat = vendas_category_figure(vendas_by(data_filtrada, 'Categoria'))
+    with span('vendas_por_categoria.plotly_chart'):
+        st.plotly_chart(fig_cat, use_container_width=True)
 
 with col2:
     st.subheader("Vendas por Região")
-    fig_reg = px.pie(
-        data_filtrada.groupby('Região')['Vendas'].sum().reset_index(),
-        values='Vendas',
-        names='Região',
-        hole=0.4
-    )
-    st.plotly_chart(fig_reg, use_container_width=True)
+    with span('vendas_por_regiao.figura'):
+        fig_reg = vendas_region_figure(vendas_by(data_filtrada, 'Região'))
+    with span('vendas_por_regiao.plotly_chart'):
+        st.plotly_chart(fig_reg, use_container_width=True)
 
 # Gráfico de linha temporal
 st.subheader("Evolução das Vendas")
-fig_linha = px.line(
-    data_filtrada.groupby('Data')['Vendas'].sum().reset_index(),
-    x='Data',
-    y='Vendas',
-    title='Vendas ao Longo do Tempo'
-)
-st.plotly_chart(fig_linha, use_container_width=True)
+with span('evolucao.figura'):
+    fig_linha = vendas_timeline_figure(vendas_by(data_filtrada, 'Data'))
+with span('evolucao.plotly_chart'):
+    st.plotly_chart(fig_linha, use_container_width=True)
 
 # Tabela de dados
 st.subheader("Dados Detalhados")
-st.dataframe(data_filtrada)
+with span('tabela'):
+    paginated_dataframe(
+        data_filtrada,
+        key="dados_vendas",
+        token=(source.version, tuple(sorted(categoria)), tuple(sorted(regiao)), tuple(sorted(canal)))
+    )
 
 # Incluir o chatbot
-with open('static/chatbot.html', 'r', encoding='utf-8') as f:
+with open('static/chatbot.html', 'r', encoding='utf-8') as f, span('chatbot'):
     chatbot_html = f.read()
-    components.html(chatbot_html, height=600) 
\ No newline at end of file
+    components.html(chatbot_html, height=600)
+
+# Fechar o perfil da execução (log e painel de depuração)
+end_rerun()
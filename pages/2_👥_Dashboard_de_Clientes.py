@@ -4,6 +4,15 @@ import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 import streamlit.components.v1 as components
+from utils.datasource import get_data_source
+from utils.pagination import paginated_dataframe
+from utils.cache import shared_cache
+from utils.sample_data import generate_clientes
+from utils.pipelines import (
+    clientes_filter, clientes_metrics, clientes_by_segment,
+    clientes_segment_figure, clientes_age_figure, clientes_scatter_figure
+)
+from utils.profiler import start_rerun, span, end_rerun
 
 # Configuração da página
 st.set_page_config(
@@ -12,102 +21,105 @@ st.set_page_config(
     layout="wide"
 )
 
+# Perfil da execução (spans por seção)
+start_rerun('clientes')
+
 # Título
 st.title("👥 Dashboard de Clientes")
 
-# Dados de exemplo
-np.random.seed(42)
-n_clientes = 1000
-data = pd.DataFrame({
-    'ID_Cliente': range(1, n_clientes + 1),
-    'Idade': np.random.randint(18, 80, n_clientes),
-    'Valor_Total_Compras': np.random.uniform(100, 10000, n_clientes),
-    'Frequencia_Compras': np.random.randint(1, 50, n_clientes),
-    'Ultima_Compra': pd.date_range(start='2023-01-01', periods=n_clientes),
-    'Segmento': np.random.choice(['Bronze', 'Prata', 'Ouro', 'Platina'], n_clientes, p=[0.4, 0.3, 0.2, 0.1]),
-    'Cidade': np.random.choice(['São Paulo', 'Rio de Janeiro', 'Belo Horizonte', 'Salvador', 'Brasília'], n_clientes),
-    'Satisfacao': np.random.randint(1, 6, n_clientes)
-})
+# Fonte de dados: extratos em DASHBOARD_DATA_DIR ou os dados de exemplo
+@st.cache_resource
+def get_source():
+    return get_data_source(
+        'clientes',
+        generate_clientes,
+        categorical_columns=['Segmento', 'Cidade']
+    )
+
+with span('dados'):
+    source = get_source()
+    # Arquivos novos no diretório do dataset mudam a versão da fonte
+    source.poll()
 
 # Sidebar com filtros
-st.sidebar.header("Filtros")
-segmento = st.sidebar.multiselect(
-    "Segmento:",
-    options=data['Segmento'].unique(),
-    default=data['Segmento'].unique()
-)
+with span('filtros'):
+    st.sidebar.header("Filtros")
+    segmento = st.sidebar.multiselect(
+        "Segmento:",
+        options=source.distinct('Segmento'),
+        default=source.distinct('Segmento')
+    )
 
-cidade = st.sidebar.multiselect(
-    "Cidade:",
-    options=data['Cidade'].unique(),
-    default=data['Cidade'].unique()
-)
+    cidade = st.sidebar.multiselect(
+        "Cidade:",
+        options=source.distinct('Cidade'),
+        default=source.distinct('Cidade')
+    )
 
-satisfacao = st.sidebar.slider(
-    "Nível de Satisfação:",
-    min_value=1,
-    max_value=5,
-    value=(1, 5)
-)
+    satisfacao = st.sidebar.slider(
+        "Nível de Satisfação:",
+        min_value=1,
+        max_value=5,
+        value=(1, 5)
+    )
 
-# Filtrando dados
-data_filtrada = data[
-    (data['Segmento'].isin(segmento)) &
-    (data['Cidade'].isin(cidade)) &
-    (data['Satisfacao'].between(satisfacao[0], satisfacao[1]))
-]
+# Filtrando dados (resultado compartilhado entre as sessões)
+with span('filtro'):
+    data_filtrada = shared_cache().get_or_compute(
+        ('clientes', source.version, tuple(sorted(segmento)), tuple(sorted(cidade)), satisfacao),
+        lambda: clientes_filter(source, segmento, cidade, satisfacao)
+    )
 
 # Métricas principais
-col1, col2, col3, col4 = st.columns(4)
-with col1:
-    st.metric("Total de Clientes", len(data_filtrada), "+5%")
-with col2:
-    st.metric("Ticket Médio", f"R$ {data_filtrada['Valor_Total_Compras'].mean():,.2f}", "+8%")
-with col3:
-    st.metric("Satisfação Média", f"{data_filtrada['Satisfacao'].mean():.1f}", "+0.2")
-with col4:
-    st.metric("Frequência Média", f"{data_filtrada['Frequencia_Compras'].mean():.1f}", "+1.5")
+with span('metricas'):
+    metricas = clientes_metrics(data_filtrada)
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Total de Clientes", metricas['total'], "+5%")
+    with col2:
+        st.metric("Ticket Médio", f"R$ {metricas['ticket_medio']:,.2f}", "+8%")
+    with col3:
+        st.metric("Satisfação Média", f"{metricas['satisfacao']:.1f}", "+0.2")
+    with col4:
+        st.metric("Frequência Média", f"{metricas['frequencia']:.1f}", "+1.5")
 
 # Gráficos
 col1, col2 = st.columns(2)
 
 with col1:
     st.subheader("Distribuição por Segmento")
-    fig_seg = px.pie(
-        data_filtrada.groupby('Segmento').size().reset_index(name='count'),
-        values='count',
-        names='Segmento',
-        hole=0.4
-    )
-    st.plotly_chart(fig_seg, use_container_width=True)
+    with span('por_segmento.figura'):
+        fig_seg = clientes_segment_figure(clientes_by_segment(data_filtrada))
+    with span('por_segmento.plotly_chart'):
+        st.plotly_chart(fig_seg, use_container_width=True)
 
 with col2:
     st.subheader("Distribuição por Idade")
-    fig_idade = px.histogram(
-        data_filtrada,
-        x='Idade',
-        nbins=20,
-        color='Segmento'
-    )
-    st.plotly_chart(fig_idade, use_container_width=True)
+    with span('por_idade.figura'):
+        fig_idade = clientes_age_figure(data_filtrada)
+    with span('por_idade.plotly_chart'):
+        st.plotly_chart(fig_idade, use_container_width=True)
 
 # Gráfico de dispersão
 st.subheader("Relação entre Valor e Frequência de Compras")
-fig_disp = px.scatter(
-    data_filtrada,
-    x='Frequencia_Compras',
-    y='Valor_Total_Compras',
-    color='Segmento',
-    size='Satisfacao',
-    hover_data=['Cidade']
-)
-st.plotly_chart(fig_disp, use_container_width=True)
+with span('dispersao.figura'):
+    fig_disp = clientes_scatter_figure(data_filtrada)
+with span('dispersao.plotly_chart'):
+    st.plotly_chart(fig_disp, use_container_width=True)
 
 # Tabela de dados
 st.subheader("Dados dos Clientes")
-st.dataframe(data_filtrada)
+with span('tabela'):
+    paginated_dataframe(
+        data_filtrada,
+        key="dados_clientes",
+        token=(source.version, tuple(sorted(segmento)), tuple(sorted(cidade)), satisfacao)
+    )
 
 # Incluir o chatbot
-with open('static/chatbot.html', 'r', encoding='utf-8') as f:
+with open('static/chatbot.html', 'r', encoding='utf-8') as f, span('chatbot'):
     chatbot_html = f.read()
-    components.html(chatbot_html, height=600) 
\ No newline at end of file
+    components.html(chatbot_html, height=600)
+
+# Fechar o perfil da execução (log e painel de depuração)
+end_rerun()
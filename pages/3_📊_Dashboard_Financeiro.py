@@ -4,6 +4,15 @@ import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 import streamlit.components.v1 as components
+from utils.datasource import get_data_source
+from utils.pagination import paginated_dataframe
+from utils.cache import shared_cache
+from utils.sample_data import generate_financeiro
+from utils.pipelines import (
+    financeiro_load, financeiro_months, financeiro_filter, financeiro_metrics,
+    financeiro_revenue_figure, financeiro_expenses_figure, financeiro_margins_figure
+)
+from utils.profiler import start_rerun, span, end_rerun
 
 # Configuração da página
 st.set_page_config(
@@ -12,95 +21,99 @@ st.set_page_config(
     layout="wide"
 )
 
+# Perfil da execução (spans por seção)
+start_rerun('financeiro')
+
 # Título
 st.title("📊 Dashboard Financeiro")
 
-# Dados de exemplo
-np.random.seed(42)
-dates = pd.date_range(start='2024-01-01', periods=12)
-data = pd.DataFrame({
-    'Data': dates,
-    'Receita': np.random.uniform(100000, 500000, 12),
-    'Custos': np.random.uniform(50000, 200000, 12),
-    'Despesas_Operacionais': np.random.uniform(20000, 100000, 12),
-    'Investimentos': np.random.uniform(10000, 50000, 12),
-    'Impostos': np.random.uniform(10000, 80000, 12)
-})
-
-# Calculando métricas derivadas
-data['Lucro_Bruto'] = data['Receita'] - data['Custos']
-data['Lucro_Liquido'] = data['Lucro_Bruto'] - data['Despesas_Operacionais'] - data['Impostos']
-data['Margem_Bruta'] = (data['Lucro_Bruto'] / data['Receita']) * 100
-data['Margem_Liquida'] = (data['Lucro_Liquido'] / data['Receita']) * 100
+# Fonte de dados: extratos em DASHBOARD_DATA_DIR ou os dados de exemplo
+@st.cache_resource
+def get_source():
+    return get_data_source(
+        'financeiro',
+        generate_financeiro,
+        date_column='Data'
+    )
+
+# Dados com as métricas derivadas (`versao` refaz o cálculo quando chegam dados novos)
+@st.cache_resource(max_entries=1)
+def load_data(versao):
+    return financeiro_load(get_source())
+
+with span('dados'):
+    source = get_source()
+    # Arquivos novos no diretório do dataset mudam a versão da fonte
+    source.poll()
+    data = load_data(source.version)
 
 # Sidebar com filtros
-st.sidebar.header("Filtros")
-periodo = st.sidebar.select_slider(
-    "Período:",
-    options=data['Data'].dt.strftime('%Y-%m').tolist(),
-    value=(data['Data'].dt.strftime('%Y-%m').iloc[0], data['Data'].dt.strftime('%Y-%m').iloc[-1])
-)
+with span('filtros'):
+    st.sidebar.header("Filtros")
+    meses = financeiro_months(data)
+    periodo = st.sidebar.select_slider(
+        "Período:",
+        options=meses.tolist(),
+        value=(meses.iloc[0], meses.iloc[-1])
+    )
 
-# Filtrando dados
-data_filtrada = data[
-    (data['Data'].dt.strftime('%Y-%m') >= periodo[0]) &
-    (data['Data'].dt.strftime('%Y-%m') <= periodo[1])
-]
+# Filtrando dados (resultado compartilhado entre as sessões)
+with span('filtro'):
+    data_filtrada = shared_cache().get_or_compute(
+        ('financeiro', source.version, periodo),
+        lambda: financeiro_filter(data, periodo)
+    )
 
 # Métricas principais
-col1, col2, col3, col4 = st.columns(4)
-with col1:
-    st.metric("Receita Total", f"R$ {data_filtrada['Receita'].sum():,.2f}", "+15%")
-with col2:
-    st.metric("Lucro Líquido", f"R$ {data_filtrada['Lucro_Liquido'].sum():,.2f}", "+8%")
-with col3:
-    st.metric("Margem Líquida", f"{data_filtrada['Margem_Liquida'].mean():.1f}%", "+2.5%")
-with col4:
-    st.metric("ROI", "18.5%", "+3.2%")
+with span('metricas'):
+    metricas = financeiro_metrics(data_filtrada)
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Receita Total", f"R$ {metricas['receita']:,.2f}", "+15%")
+    with col2:
+        st.metric("Lucro Líquido", f"R$ {metricas['lucro_liquido']:,.2f}", "+8%")
+    with col3:
+        st.metric("Margem Líquida", f"{metricas['margem_liquida']:.1f}%", "+2.5%")
+    with col4:
+        st.metric("ROI", "18.5%", "+3.2%")
 
 # Gráficos
 col1, col2 = st.columns(2)
 
 with col1:
     st.subheader("Evolução da Receita e Custos")
-    fig_evol = go.Figure()
-    fig_evol.add_trace(go.Scatter(x=data_filtrada['Data'], y=data_filtrada['Receita'], name='Receita'))
-    fig_evol.add_trace(go.Scatter(x=data_filtrada['Data'], y=data_filtrada['Custos'], name='Custos'))
-    st.plotly_chart(fig_evol, use_container_width=True)
+    with span('receita_custos.figura'):
+        fig_evol = financeiro_revenue_figure(data_filtrada)
+    with span('receita_custos.plotly_chart'):
+        st.plotly_chart(fig_evol, use_container_width=True)
 
 with col2:
     st.subheader("Composição das Despesas")
-    fig_desp = px.pie(
-        data_filtrada,
-        values=[data_filtrada['Custos'].sum(), 
-                data_filtrada['Despesas_Operacionais'].sum(),
-                data_filtrada['Impostos'].sum(),
-                data_filtrada['Investimentos'].sum()],
-        names=['Custos', 'Despesas Operacionais', 'Impostos', 'Investimentos'],
-        hole=0.4
-    )
-    st.plotly_chart(fig_desp, use_container_width=True)
+    with span('despesas.figura'):
+        fig_desp = financeiro_expenses_figure(data_filtrada)
+    with span('despesas.plotly_chart'):
+        st.plotly_chart(fig_desp, use_container_width=True)
 
 # Gráfico de barras empilhadas
 st.subheader("Análise de Margens")
-fig_margens = go.Figure()
-fig_margens.add_trace(go.Bar(
-    x=data_filtrada['Data'],
-    y=data_filtrada['Margem_Bruta'],
-    name='Margem Bruta'
-))
-fig_margens.add_trace(go.Bar(
-    x=data_filtrada['Data'],
-    y=data_filtrada['Margem_Liquida'],
-    name='Margem Líquida'
-))
-st.plotly_chart(fig_margens, use_container_width=True)
+with span('margens.figura'):
+    fig_margens = financeiro_margins_figure(data_filtrada)
+with span('margens.plotly_chart'):
+    st.plotly_chart(fig_margens, use_container_width=True)
 
 # Tabela de dados
 st.subheader("Dados Financeiros Detalhados")
-st.dataframe(data_filtrada)
+with span('tabela'):
+    paginated_dataframe(
+        data_filtrada,
+        key="dados_financeiros",
+        token=(source.version, periodo)
+    )
 
 # Incluir o chatbot
-with open('static/chatbot.html', 'r', encoding='utf-8') as f:
+with open('static/chatbot.html', 'r', encoding='utf-8') as f, span('chatbot'):
     chatbot_html = f.read()
-    components.html(chatbot_html, height=600) 
\ No newline at end of file
+    components.html(chatbot_html, height=600)
+
+# Fechar o perfil da execução (log e painel de depuração)
+end_rerun()
@@ -4,6 +4,15 @@ import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 import streamlit.components.v1 as components
+from utils.datasource import get_data_source
+from utils.pagination import paginated_dataframe
+from utils.cache import shared_cache
+from utils.sample_data import generate_produtos
+from utils.pipelines import (
+    produtos_load, produtos_filter, produtos_low_stock, produtos_metrics, produtos_by_category,
+    produtos_category_figure, produtos_price_figure, produtos_scatter_figure
+)
+from utils.profiler import start_rerun, span, end_rerun
 
 # Configuração da página
 st.set_page_config(
@@ -12,113 +21,121 @@ st.set_page_config(
     layout="wide"
 )
 
+# Perfil da execução (spans por seção)
+start_rerun('produtos')
+
 # Título
 st.title("📦 Dashboard de Produtos")
 
-# Dados de exemplo
-np.random.seed(42)
-n_produtos = 100
-categorias = ['Eletrônicos', 'Vestuário', 'Alimentos', 'Móveis', 'Livros']
-data = pd.DataFrame({
-    'ID_Produto': range(1, n_produtos + 1),
-    'Nome': [f'Produto {i}' for i in range(1, n_produtos + 1)],
-    'Categoria': np.random.choice(categorias, n_produtos),
-    'Preco': np.random.uniform(10, 1000, n_produtos),
-    'Estoque': np.random.randint(0, 100, n_produtos),
-    'Vendas_Mes': np.random.randint(0, 50, n_produtos),
-    'Avaliacao': np.random.uniform(1, 5, n_produtos),
-    'Fornecedor': np.random.choice(['Fornecedor A', 'Fornecedor B', 'Fornecedor C'], n_produtos)
-})
-
-# Calculando métricas derivadas
-data['Valor_Estoque'] = data['Preco'] * data['Estoque']
-data['Rotatividade'] = data['Vendas_Mes'] / data['Estoque'].replace(0, 1)
-data['Status_Estoque'] = np.where(data['Estoque'] < 10, 'Baixo', 
-                                 np.where(data['Estoque'] < 30, 'Médio', 'Alto'))
+# Fonte de dados: extratos em DASHBOARD_DATA_DIR ou os dados de exemplo
+@st.cache_resource
+def get_source():
+    return get_data_source(
+        'produtos',
+        generate_produtos,
+        categorical_columns=['Categoria', 'Fornecedor']
+    )
+
+# Dados com as métricas derivadas e índice de bitmaps para os filtros
+# (`versao` refaz o cálculo quando chegam dados novos)
+@st.cache_resource(max_entries=1)
+def load_data(versao):
+    return produtos_load(get_source())
+
+with span('dados'):
+    source = get_source()
+    # Arquivos novos no diretório do dataset mudam a versão da fonte
+    source.poll()
+    data, bitmap_index = load_data(source.version)
 
 # Sidebar com filtros
-st.sidebar.header("Filtros")
-categoria = st.sidebar.multiselect(
-    "Categoria:",
-    options=data['Categoria'].unique(),
-    default=data['Categoria'].unique()
-)
+with span('filtros'):
+    st.sidebar.header("Filtros")
+    categoria = st.sidebar.multiselect(
+        "Categoria:",
+        options=bitmap_index.values('Categoria'),
+        default=bitmap_index.values('Categoria')
+    )
 
-fornecedor = st.sidebar.multiselect(
-    "Fornecedor:",
-    options=data['Fornecedor'].unique(),
-    default=data['Fornecedor'].unique()
-)
+    fornecedor = st.sidebar.multiselect(
+        "Fornecedor:",
+        options=bitmap_index.values('Fornecedor'),
+        default=bitmap_index.values('Fornecedor')
+    )
 
-status_estoque = st.sidebar.multiselect(
-    "Status do Estoque:",
-    options=data['Status_Estoque'].unique(),
-    default=data['Status_Estoque'].unique()
-)
+    status_estoque = st.sidebar.multiselect(
+        "Status do Estoque:",
+        options=bitmap_index.values('Status_Estoque'),
+        default=bitmap_index.values('Status_Estoque')
+    )
 
-# Filtrando dados
-data_filtrada = data[
-    (data['Categoria'].isin(categoria)) &
-    (data['Fornecedor'].isin(fornecedor)) &
-    (data['Status_Estoque'].isin(status_estoque))
-]
+# Filtrando dados (resultado compartilhado entre as sessões)
+with span('filtro'):
+    data_filtrada = shared_cache().get_or_compute(
+        ('produtos', source.version, tuple(sorted(categoria)), tuple(sorted(fornecedor)), tuple(sorted(status_estoque))),
+        lambda: produtos_filter(data, bitmap_index, categoria, fornecedor, status_estoque)
+    )
 
 # Métricas principais
-col1, col2, col3, col4 = st.columns(4)
-with col1:
-    st.metric("Total de Produtos", len(data_filtrada), "+5%")
-with col2:
-    st.metric("Valor em Estoque", f"R$ {data_filtrada['Valor_Estoque'].sum():,.2f}", "+8%")
-with col3:
-    st.metric("Produtos com Estoque Baixo", len(data_filtrada[data_filtrada['Status_Estoque'] == 'Baixo']), "-2%")
-with col4:
-    st.metric("Avaliação Média", f"{data_filtrada['Avaliacao'].mean():.1f}", "+0.2")
+with span('metricas'):
+    metricas = produtos_metrics(data_filtrada)
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Total de Produtos", metricas['total'], "+5%")
+    with col2:
+        st.metric("Valor em Estoque", f"R$ {metricas['valor_estoque']:,.2f}", "+8%")
+    with col3:
+        st.metric("Produtos com Estoque Baixo", metricas['estoque_baixo'], "-2%")
+    with col4:
+        st.metric("Avaliação Média", f"{metricas['avaliacao']:.1f}", "+0.2")
 
 # Gráficos
 col1, col2 = st.columns(2)
 
 with col1:
     st.subheader("Produtos por Categoria")
-    fig_cat = px.bar(
-        data_filtrada.groupby('Categoria').size().reset_index(name='count'),
-        x='Categoria',
-        y='count',
-        color='Categoria'
-    )
-    st.plotly_chart(fig_cat, use_container_width=True)
+    with span('por_categoria.figura'):
+        fig_cat = produtos_category_figure(produtos_by_category(data_filtrada))
+    with span('por_categoria.plotly_chart'):
+        st.plotly_chart(fig_cat, use_container_width=True)
 
 with col2:
     st.subheader("Distribuição de Preços")
-    fig_preco = px.histogram(
-        data_filtrada,
-        x='Preco',
-        color='Categoria',
-        nbins=20
-    )
-    st.plotly_chart(fig_preco, use_container_width=True)
+    with span('precos.figura'):
+        fig_preco = produtos_price_figure(data_filtrada)
+    with span('precos.plotly_chart'):
+        st.plotly_chart(fig_preco, use_container_width=True)
 
 # Gráfico de dispersão
 st.subheader("Relação entre Preço e Avaliação")
-fig_disp = px.scatter(
-    data_filtrada,
-    x='Preco',
-    y='Avaliacao',
-    color='Categoria',
-    size='Vendas_Mes',
-    hover_data=['Nome', 'Fornecedor']
-)
-st.plotly_chart(fig_disp, use_container_width=True)
+with span('dispersao.figura'):
+    fig_disp = produtos_scatter_figure(data_filtrada)
+with span('dispersao.plotly_chart'):
+    st.plotly_chart(fig_disp, use_container_width=True)
 
 # Tabela de produtos com estoque baixo
 st.subheader("Produtos com Estoque Baixo")
-produtos_baixo_estoque = data_filtrada[data_filtrada['Status_Estoque'] == 'Baixo']
-st.dataframe(produtos_baixo_estoque[['Nome', 'Categoria', 'Estoque', 'Preco', 'Fornecedor']])
+with span('tabela_estoque_baixo'):
+    produtos_baixo_estoque = produtos_low_stock(data_filtrada)
+    paginated_dataframe(
+        produtos_baixo_estoque[['Nome', 'Categoria', 'Estoque', 'Preco', 'Fornecedor']],
+        key="produtos_baixo_estoque",
+        token=(source.version, tuple(sorted(categoria)), tuple(sorted(fornecedor)), tuple(sorted(status_estoque)))
+    )
 
 # Tabela de dados completa
 st.subheader("Dados Completos dos Produtos")
-st.dataframe(data_filtrada)
+with span('tabela'):
+    paginated_dataframe(
+        data_filtrada,
+        key="dados_produtos",
+        token=(source.version, tuple(sorted(categoria)), tuple(sorted(fornecedor)), tuple(sorted(status_estoque)))
+    )
 
 # Incluir o chatbot
-with open('static/chatbot.html', 'r', encoding='utf-8') as f:
+with open('static/chatbot.html', 'r', encoding='utf-8') as f, span('chatbot'):
     chatbot_html = f.read()
-    components.html(chatbot_html, height=600) 
\ No newline at end of file
+    components.html(chatbot_html, height=600)
+
+# Fechar o perfil da execução (log e painel de depuração)
+end_rerun()
@@ -4,6 +4,15 @@ import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 import streamlit.components.v1 as components
+from utils.datasource import get_data_source
+from utils.pagination import paginated_dataframe
+from utils.cache import shared_cache
+from utils.sample_data import generate_marketing
+from utils.pipelines import (
+    marketing_filter, marketing_metrics, marketing_by_channel, marketing_roi_by_channel,
+    marketing_channel_figure, marketing_roi_figure, marketing_timeline_figure
+)
+from utils.profiler import start_rerun, span, end_rerun
 
 # Configuração da página
 st.set_page_config(
@@ -12,105 +21,104 @@ st.set_page_config(
     layout="wide"
 )
 
+# Perfil da execução (spans por seção)
+start_rerun('marketing')
+
 # Título
 st.title("📱 Dashboard de Marketing")
 
-# Dados de exemplo
-np.random.seed(42)
-dates = pd.date_range(start='2024-01-01', periods=30)
-canais = ['Facebook', 'Instagram', 'Google Ads', 'Email', 'LinkedIn']
-data = pd.DataFrame({
-    'Data': dates,
-    'Canal': np.random.choice(canais, 30),
-    'Impressoes': np.random.randint(1000, 100000, 30),
-    'Cliques': np.random.randint(100, 10000, 30),
-    'Conversoes': np.random.randint(10, 1000, 30),
-    'Custo': np.random.uniform(100, 5000, 30),
-    'Valor_Conversao': np.random.uniform(50, 500, 30)
-})
-
-# Calculando métricas derivadas
-data['CTR'] = (data['Cliques'] / data['Impressoes']) * 100
-data['CPA'] = data['Custo'] / data['Conversoes']
-data['ROI'] = ((data['Valor_Conversao'] * data['Conversoes']) - data['Custo']) / data['Custo'] * 100
+# Fonte de dados: extratos em DASHBOARD_DATA_DIR ou os dados de exemplo
+@st.cache_resource
+def get_source():
+    return get_data_source(
+        'marketing',
+        generate_marketing,
+        date_column='Data',
+        categorical_columns=['Canal']
+    )
+
+with span('dados'):
+    source = get_source()
+    # Arquivos novos no diretório do dataset mudam a versão da fonte
+    source.poll()
+    data_min, data_max = source.date_bounds()
 
 # Sidebar com filtros
-st.sidebar.header("Filtros")
-canal = st.sidebar.multiselect(
-    "Canal:",
-    options=data['Canal'].unique(),
-    default=data['Canal'].unique()
-)
+with span('filtros'):
+    st.sidebar.header("Filtros")
+    canal = st.sidebar.multiselect(
+        "Canal:",
+        options=source.distinct('Canal'),
+        default=source.distinct('Canal')
+    )
 
-data_inicio = st.sidebar.date_input(
-    "Data Inicial:",
-    value=data['Data'].min()
-)
+    data_inicio = st.sidebar.date_input(
+        "Data Inicial:",
+        value=data_min
+    )
 
-data_fim = st.sidebar.date_input(
-    "Data Final:",
-    value=data['Data'].max()
-)
+    data_fim = st.sidebar.date_input(
+        "Data Final:",
+        value=data_max
+    )
 
-# Filtrando dados
-data_filtrada = data[
-    (data['Canal'].isin(canal)) &
-    (data['Data'].dt.date >= data_inicio) &
-    (data['Data'].dt.date <= data_fim)
-]
+# Filtrando dados com as métricas derivadas (resultado compartilhado entre as sessões)
+with span('filtro'):
+    data_filtrada = shared_cache().get_or_compute(
+        ('marketing', source.version, tuple(sorted(canal)), data_inicio, data_fim),
+        lambda: marketing_filter(source, canal, data_inicio, data_fim)
+    )
 
 # Métricas principais
-col1, col2, col3, col4 = st.columns(4)
-with col1:
-    st.metric("Total Investido", f"R$ {data_filtrada['Custo'].sum():,.2f}", "+15%")
-with col2:
-    st.metric("Conversões", f"{data_filtrada['Conversoes'].sum():,.0f}", "+8%")
-with col3:
-    st.metric("CPA Médio", f"R$ {data_filtrada['CPA'].mean():,.2f}", "-5%")
-with col4:
-    st.metric("ROI Médio", f"{data_filtrada['ROI'].mean():,.1f}%", "+12%")
+with span('metricas'):
+    metricas = marketing_metrics(data_filtrada)
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Total Investido", f"R$ {metricas['custo']:,.2f}", "+15%")
+    with col2:
+        st.metric("Conversões", f"{metricas['conversoes']:,.0f}", "+8%")
+    with col3:
+        st.metric("CPA Médio", f"R$ {metricas['cpa']:,.2f}", "-5%")
+    with col4:
+        st.metric("ROI Médio", f"{metricas['roi']:,.1f}%", "+12%")
 
 # Gráficos
 col1, col2 = st.columns(2)
 
 with col1:
     st.subheader("Desempenho por Canal")
-    fig_canal = px.bar(
-        data_filtrada.groupby('Canal').agg({
-            'Impressoes': 'sum',
-            'Cliques': 'sum',
-            'Conversoes': 'sum'
-        }).reset_index(),
-        x='Canal',
-        y=['Impressoes', 'Cliques', 'Conversoes'],
-        barmode='group'
-    )
-    st.plotly_chart(fig_canal, use_container_width=True)
+    with span('por_canal.figura'):
+        fig_canal = marketing_channel_figure(marketing_by_channel(data_filtrada))
+    with span('por_canal.plotly_chart'):
+        st.plotly_chart(fig_canal, use_container_width=True)
 
 with col2:
     st.subheader("ROI por Canal")
-    fig_roi = px.bar(
-        data_filtrada.groupby('Canal')['ROI'].mean().reset_index(),
-        x='Canal',
-        y='ROI',
-        color='ROI',
-        color_continuous_scale='RdYlGn'
-    )
-    st.plotly_chart(fig_roi, use_container_width=True)
+    with span('roi.figura'):
+        fig_roi = marketing_roi_figure(marketing_roi_by_channel(data_filtrada))
+    with span('roi.plotly_chart'):
+        st.plotly_chart(fig_roi, use_container_width=True)
 
 # Gráfico de linha temporal
 st.subheader("Evolução das Métricas")
-fig_evol = go.Figure()
-fig_evol.add_trace(go.Scatter(x=data_filtrada['Data'], y=data_filtrada['CTR'], name='CTR'))
-fig_evol.add_trace(go.Scatter(x=data_filtrada['Data'], y=data_filtrada['CPA'], name='CPA'))
-fig_evol.add_trace(go.Scatter(x=data_filtrada['Data'], y=data_filtrada['ROI'], name='ROI'))
-st.plotly_chart(fig_evol, use_container_width=True)
+with span('evolucao.figura'):
+    fig_evol = marketing_timeline_figure(data_filtrada)
+with span('evolucao.plotly_chart'):
+    st.plotly_chart(fig_evol, use_container_width=True)
 
 # Tabela de dados
 st.subheader("Dados Detalhados das Campanhas")
-st.dataframe(data_filtrada)
+with span('tabela'):
+    paginated_dataframe(
+        data_filtrada,
+        key="dados_marketing",
+        token=(source.version, tuple(sorted(canal)), data_inicio, data_fim)
+    )
 
 # Incluir o chatbot
-with open('static/chatbot.html', 'r', encoding='utf-8') as f:
+with open('static/chatbot.html', 'r', encoding='utf-8') as f, span('chatbot'):
     chatbot_html = f.read()
-    components.html(chatbot_html, height=600) 
\ No newline at end of file
+    components.html(chatbot_html, height=600)
+
+# Fechar o perfil da execução (log e painel de depuração)
+end_rerun()
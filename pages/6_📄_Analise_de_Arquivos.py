@@ -8,7 +8,13 @@ import os
 from dotenv import load_dotenv
 from openai import OpenAI
 import matplotlib.pyplot as plt
-import io
+from utils.profiler import start_rerun, span, end_rerun
+from utils.chat import start_answer, render_stream
+from utils.response_cache import response_key
+from utils.file_profile import start_profile, profile_table, build_context
+from utils.ingest import read_upload, file_fingerprint, parse_options, OPTIMIZE_DTYPES
+from utils.spill import SpillStore
+from utils.snippets import run_snippet, render_all, cached_result, render_result
 
 # Configuração da página
 st.set_page_config(
@@ -18,57 +24,124 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Perfil da execução (spans por seção)
+start_rerun('arquivos')
+
 # Carregar variáveis de ambiente
 load_dotenv()
 
-# Configurar a API OpenAI
-client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+# Configurar a API OpenAI (OPENAI_BASE_URL aponta para outro servidor compatível,
+# ex.: o mock local de benchmarks/mock_llm.py)
+client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'), base_url=os.getenv('OPENAI_BASE_URL') or None)
 
 # Título e descrição
 st.title("📄 Análise de Arquivos")
 st.markdown("""
     Esta página permite fazer upload de múltiplos arquivos para análise pelo assistente virtual.
-    Formatos suportados: CSV, Excel, JSON, TXT
+    Formatos suportados: CSV, Excel, JSON, JSON Lines, TXT
 """)
 
-# Inicializar o dicionário de DataFrames na sessão
-if 'dataframes' not in st.session_state:
-    st.session_state['dataframes'] = {}
+# Inicializar o dicionário de DataFrames na sessão: os usados há mais tempo vão para
+# o disco quando a sessão (ou o servidor) passa da cota de memória
+if not isinstance(st.session_state.get('dataframes'), SpillStore):
+    dataframes_sessao = SpillStore()
+    dataframes_sessao.update(st.session_state.get('dataframes') or {})
+    st.session_state['dataframes'] = dataframes_sessao
+
+# Impressão digital (hash do conteúdo) de cada arquivo, usada no cache de respostas
+if 'file_fingerprints' not in st.session_state:
+    st.session_state['file_fingerprints'] = {}
+
+# Perfil de cada arquivo (esquema e resumos), calculado em segundo plano e usado no
+# expander e no contexto do assistente: guarda o Future do perfil
+if 'file_profiles' not in st.session_state:
+    st.session_state['file_profiles'] = {}
+
+# Memória de cada arquivo (antes e depois da otimização), medida uma vez na leitura
+if 'file_sizes' not in st.session_state:
+    st.session_state['file_sizes'] = {}
 
-# Função para processar diferentes tipos de arquivo
-def process_file(file):
+def perfil_arquivo(nome):
+    """Future do perfil do arquivo (compartilhado entre as sessões pelo conteúdo do arquivo)."""
+    futuro = st.session_state['file_profiles'].get(nome)
+    if futuro is None:
+        futuro = st.session_state['file_profiles'][nome] = start_profile(
+            st.session_state['file_fingerprints'].get(nome), st.session_state['dataframes'][nome]
+        )
+    return futuro
+
+# Função para processar diferentes tipos de arquivo: a leitura fica no cache por
+# conteúdo, então as execuções seguintes da página não leem o arquivo de novo
+def process_file(file, otimizar=False):
+    if parse_options(file.name) is None:
+        st.error("Formato de arquivo não suportado!")
+        return None, None, None
+    
+    # Barra de progresso e botão de cancelar, exibidos só se o arquivo for lido de fato
+    # (CSV, TXT e JSON Lines são lidos em blocos); o clique interrompe a leitura
+    espaco = st.empty()
+    barra = []
+    
+    def progresso(fracao):
+        if not barra:
+            with espaco.container():
+                st.button(
+                    "Cancelar leitura",
+                    key=f"cancelar_{file.file_id}",
+                    on_click=lambda: st.session_state.update({'upload_cancelado': file.file_id})
+                )
+                barra.append(st.progress(0.0))
+        barra[0].progress(fracao, text=f"Lendo '{file.name}': {fracao:.0%}")
+    
     try:
-        if file.name.endswith('.csv'):
-            df = pd.read_csv(file)
-        elif file.name.endswith(('.xls', '.xlsx')):
-            df = pd.read_excel(file)
-        elif file.name.endswith('.json'):
-            df = pd.read_json(file)
-        elif file.name.endswith('.txt'):
-            df = pd.read_csv(file, sep='\t')
-        else:
-            st.error("Formato de arquivo não suportado!")
-            return None
-        return df
+        with st.spinner(f"Lendo '{file.name}'..."):
+            return read_upload(file, progresso, otimizar=otimizar)
     except Exception as e:
         st.error(f"Erro ao processar o arquivo: {str(e)}")
-        return None
+        return None, None, None
+    finally:
+        espaco.empty()
 
 # Container para upload de arquivo
-with st.container():
+with st.container(), span('upload'):
     st.subheader("Upload de Arquivos")
     uploaded_file = st.file_uploader(
         "Escolha um arquivo para análise",
-        type=['csv', 'xlsx', 'xls', 'json', 'txt']
+        type=['csv', 'xlsx', 'xls', 'json', 'jsonl', 'txt']
+    )
+    otimizar_memoria = st.toggle(
+        "Otimizar memória dos arquivos",
+        value=OPTIMIZE_DTYPES,
+        help="Reduz os tipos numéricos, converte textos repetitivos em categorias e textos de data em datas.",
+        key="otimizar_memoria_arquivos"
     )
 
-    if uploaded_file is not None:
-        # Processar o arquivo
-        df = process_file(uploaded_file)
-        
-        if df is not None:
-            # Salvar o DataFrame na sessão
-            st.session_state['dataframes'][uploaded_file.name] = df
+    if uploaded_file is not None and st.session_state.get('upload_cancelado') == uploaded_file.file_id:
+        st.info("Leitura cancelada. Envie o arquivo de novo para carregá-lo.")
+    elif uploaded_file is not None:
+        # Os tipos das colunas mudam com a otimização: entra na identificação dos dados
+        fingerprint = file_fingerprint(uploaded_file) + (':otimizado' if otimizar_memoria else '')
+        carregado = (st.session_state['file_fingerprints'].get(uploaded_file.name) == fingerprint and
+                     uploaded_file.name in st.session_state['dataframes'])
+
+        # Mesmo conteúdo já na sessão: não lê de novo (nem consulta o cache dos arquivos lidos,
+        # que pode ter descartado a leitura)
+        if not carregado:
+            # Processar o arquivo
+            df, _, info = process_file(uploaded_file, otimizar_memoria)
+
+            if df is not None:
+                # Salvar o DataFrame na sessão, com a impressão digital do conteúdo e o
+                # perfil, iniciado em segundo plano
+                # As colunas são as da leitura guardada no cache, compartilhada com as outras
+                # sessões que enviaram o mesmo arquivo: a memória é contada uma vez
+                st.session_state['dataframes'].put(uploaded_file.name, df, compartilhado=info['compartilhado'])
+                st.session_state['file_profiles'][uploaded_file.name] = start_profile(fingerprint, df)
+                st.session_state['file_fingerprints'][uploaded_file.name] = fingerprint
+                st.session_state['file_sizes'][uploaded_file.name] = info
+                carregado = True
+
+        if carregado:
             st.success(f"Arquivo '{uploaded_file.name}' carregado com sucesso!")
 
 # Exibir lista de arquivos carregados
@@ -76,22 +149,58 @@ if st.session_state['dataframes']:
     st.markdown("---")
     st.subheader("Arquivos Carregados")
     
-    for filename, df in st.session_state['dataframes'].items():
-        with st.expander(f"📄 {filename}"):
-            col1, col2, col3 = st.columns(3)
+    # Número de linhas, colunas e primeiras linhas vêm do resumo guardado na leitura:
+    # os arquivos que estão em disco não são carregados só para exibir o expander
+    estatisticas = st.session_state['dataframes'].stats()
+    if estatisticas['em_memoria'] < estatisticas['frames']:
+        st.caption(
+            f"{estatisticas['em_memoria']} de {estatisticas['frames']} arquivos em memória "
+            f"({estatisticas['bytes'] / 1024 / 1024:,.1f} MB de {estatisticas['max_bytes'] / 1024 / 1024:,.0f} MB); "
+            "os demais ficam em disco e são lidos de volta quando usados."
+        )
+    
+    with span('arquivos_carregados'):
+        for filename in st.session_state['dataframes']:
+            resumo = st.session_state['dataframes'].info(filename)
+            with st.expander(f"📄 {filename}"):
+                col1, col2, col3 = st.columns(3)
             
-            with col1:
-                st.metric("Número de Linhas", f"{len(df):,}")
-            with col2:
-                st.metric("Número de Colunas", f"{len(df.columns):,}")
-            with col3:
-                st.metric("Tamanho do Arquivo", f"{df.memory_usage(deep=True).sum() / 1024:.2f} KB")
+                with col1:
+                    st.metric("Número de Linhas", f"{resumo['linhas']:,}")
+                with col2:
+                    st.metric("Número de Colunas", f"{resumo['colunas']:,}")
+                with col3:
+                    info = st.session_state['file_sizes'].get(filename)
+                    if info is None:
+                        info = st.session_state['file_sizes'][filename] = {
+                            'bytes': resumo['bytes'], 'bytes_originais': resumo['bytes'], 'conversoes': {}
+                        }
+                    st.metric("Tamanho do Arquivo", f"{info['bytes'] / 1024:.2f} KB")
+                if info['conversoes']:
+                    st.caption(
+                        f"Memória otimizada de {info['bytes_originais'] / 1024:,.2f} KB para "
+                        f"{info['bytes'] / 1024:,.2f} KB: " + ", ".join(
+                            f"{coluna} ({antes} → {depois})" for coluna, (antes, depois) in info['conversoes'].items()
+                        )
+                    )
             
-            st.dataframe(df.head(), use_container_width=True)
+                st.dataframe(resumo['amostra'], use_container_width=True)
+            
+                # Perfil das colunas: aparece quando o cálculo em segundo plano termina
+                perfil = perfil_arquivo(filename)
+                if not perfil.done():
+                    st.caption("⏳ Calculando o perfil das colunas em segundo plano...")
+                elif perfil.exception() is not None:
+                    st.warning(f"Não foi possível calcular o perfil do arquivo: {str(perfil.exception())}")
+                else:
+                    st.dataframe(profile_table(perfil.result()), use_container_width=True, hide_index=True)
             
-            if st.button(f"Remover {filename}", key=f"remove_{filename}"):
-                del st.session_state['dataframes'][filename]
-                st.experimental_rerun()
+                if st.button(f"Remover {filename}", key=f"remove_{filename}"):
+                    del st.session_state['dataframes'][filename]
+                    st.session_state['file_fingerprints'].pop(filename, None)
+                    st.session_state['file_profiles'].pop(filename, None)
+                    st.session_state['file_sizes'].pop(filename, None)
+                    st.experimental_rerun()
 
 # Container para chat com o assistente
 if st.session_state['dataframes']:
@@ -99,268 +208,240 @@ if st.session_state['dataframes']:
         st.markdown("---")
         st.subheader("Chat com o Assistente")
         
-        # Botão Incluir acima do chat
-        if st.button("➕ Incluir", use_container_width=True, key="file_include_button"):
-            st.session_state['show_file_code_input'] = True
+        with span('chat'):
+            # Botão Incluir acima do chat
+            if st.button("➕ Incluir", use_container_width=True, key="file_include_button"):
+                st.session_state['show_file_code_input'] = True
+        
+            # Sem o cache, a pergunta sempre vai à API (e a resposta nova atualiza o cache)
+            ignorar_cache = st.toggle("Ignorar cache de respostas", key="file_ignorar_cache_respostas")
         
-        # Inicializar histórico de chat se não existir
-        if 'file_chat_history' not in st.session_state:
-            st.session_state['file_chat_history'] = []
+            # Inicializar histórico de chat se não existir
+            if 'file_chat_history' not in st.session_state:
+                st.session_state['file_chat_history'] = []
         
-        # Exibir histórico de chat
-        for message in st.session_state['file_chat_history']:
-            with st.chat_message(message["role"]):
-                st.write(message["content"])
+            # Exibir histórico de chat
+            for message in st.session_state['file_chat_history']:
+                with st.chat_message(message["role"]):
+                    st.write(message["content"])
         
-        # Container para input de chat
-        if prompt := st.chat_input("Faça uma pergunta sobre os dados dos arquivos..."):
-            # Adicionar mensagem do usuário ao histórico
-            st.session_state['file_chat_history'].append({"role": "user", "content": prompt})
+            # Container para input de chat
+            if prompt := st.chat_input("Faça uma pergunta sobre os dados dos arquivos..."):
+                # Adicionar mensagem do usuário ao histórico
+                st.session_state['file_chat_history'].append({"role": "user", "content": prompt})
             
-            # Exibir mensagem do usuário
-            with st.chat_message("user"):
-                st.write(prompt)
+                # Exibir mensagem do usuário
+                with st.chat_message("user"):
+                    st.write(prompt)
             
-            try:
-                # Preparar o contexto com os dados de todos os arquivos
-                context = "Informações dos arquivos carregados:\n\n"
-                for filename, df in st.session_state['dataframes'].items():
-                    context += f"""
-                    Arquivo: {filename}
-                    - Número de linhas: {len(df)}
-                    - Número de colunas: {len(df.columns)}
-                    - Colunas: {', '.join(df.columns)}
-                    
-                    Primeiras linhas:
-                    {df.head().to_string()}
-                    
-                    Estatísticas básicas:
-                    {df.describe().to_string()}
-                    
-                    ---
-                    """
+                try:
+                    # Preparar o contexto a partir dos perfis dos arquivos, dentro do orçamento
+                    # de tokens e priorizando as colunas citadas na pergunta
+                    perfis = {
+                        filename: perfil_arquivo(filename).result()
+                        for filename in st.session_state['dataframes']
+                    }
+                    context, _ = build_context(perfis, prompt)
+                    context = "Informações dos arquivos carregados:\n\n" + context
                 
-                # Criar o prompt para o GPT
-                messages = [
-                    {"role": "system", "content": """Você é um assistente especializado em análise de dados. 
-                    Use o contexto fornecido para responder às perguntas sobre os dados dos arquivos.
+                    # Criar o prompt para o GPT
+                    messages = [
+                        {"role": "system", "content": """Você é um assistente especializado em análise de dados. 
+                        Use o contexto fornecido para responder às perguntas sobre os dados dos arquivos.
                     
-                    IMPORTANTE: 
-                    1. Ao gerar código Python, use a variável 'dataframes' que contém todos os DataFrames carregados
-                    2. Para acessar um DataFrame específico, use: df = dataframes['nome_do_arquivo']
-                    3. NÃO tente ler os arquivos novamente, pois eles já estão carregados em memória
-                    4. Você pode combinar dados de diferentes arquivos se necessário
-                    5. SEMPRE verifique os tipos de dados antes de fazer operações:
-                       - Use df.dtypes para ver os tipos de cada coluna
-                       - Use df.head() para visualizar os dados
-                       - Converta colunas para o tipo correto se necessário (ex: pd.to_numeric())
+                        IMPORTANTE: 
+                        1. Ao gerar código Python, use a variável 'dataframes' que contém todos os DataFrames carregados
+                        2. Para acessar um DataFrame específico, use: df = dataframes['nome_do_arquivo']
+                        3. NÃO tente ler os arquivos novamente, pois eles já estão carregados em memória
+                        4. Você pode combinar dados de diferentes arquivos se necessário
+                        5. SEMPRE verifique os tipos de dados antes de fazer operações:
+                           - Use df.dtypes para ver os tipos de cada coluna
+                           - Use df.head() para visualizar os dados
+                           - Converta colunas para o tipo correto se necessário (ex: pd.to_numeric())
                     
-                    EXEMPLOS DE ANÁLISES QUE VOCÊ PODE FAZER:
-                    1. Análises Univariadas:
-                       - Distribuição de vendas por região
-                       - Níveis de competências por função
-                       - Histogramas de estoque
-                       - Box plots de vendas
+                        EXEMPLOS DE ANÁLISES QUE VOCÊ PODE FAZER:
+                        1. Análises Univariadas:
+                           - Distribuição de vendas por região
+                           - Níveis de competências por função
+                           - Histogramas de estoque
+                           - Box plots de vendas
                     
-                    2. Análises Bivariadas:
-                       - Relação entre vendas e estoque
-                       - Competências vs. Níveis esperados
-                       - Vendas por mês e região
+                        2. Análises Bivariadas:
+                           - Relação entre vendas e estoque
+                           - Competências vs. Níveis esperados
+                           - Vendas por mês e região
                     
-                    3. Análises Multivariadas:
-                       - Vendas, estoque e região
-                       - Competências, níveis e funções
+                        3. Análises Multivariadas:
+                           - Vendas, estoque e região
+                           - Competências, níveis e funções
                     
-                    4. Análises Temporais:
-                       - Evolução das vendas ao longo do tempo
-                       - Sazonalidade nas vendas
+                        4. Análises Temporais:
+                           - Evolução das vendas ao longo do tempo
+                           - Sazonalidade nas vendas
                     
-                    5. Análises Comparativas:
-                       - Comparação entre regiões
-                       - Comparação entre funções
+                        5. Análises Comparativas:
+                           - Comparação entre regiões
+                           - Comparação entre funções
                     
-                    SEMPRE que possível:
-                    1. Crie visualizações usando Plotly ou Matplotlib
-                    2. Forneça insights sobre os dados
-                    3. Sugira análises adicionais
-                    4. Explique os resultados encontrados
+                        SEMPRE que possível:
+                        1. Crie visualizações usando Plotly ou Matplotlib
+                        2. Forneça insights sobre os dados
+                        3. Sugira análises adicionais
+                        4. Explique os resultados encontrados
                     
-                    Quando o usuário pedir exemplos ou não especificar uma análise:
-                    1. Mostre 3-5 exemplos de análises diferentes
-                    2. Inclua visualizações para cada exemplo
-                    3. Explique o que cada análise revela
-                    4. Sugira análises complementares
+                        Quando o usuário pedir exemplos ou não especificar uma análise:
+                        1. Mostre 3-5 exemplos de análises diferentes
+                        2. Inclua visualizações para cada exemplo
+                        3. Explique o que cada análise revela
+                        4. Sugira análises complementares
                     
-                    EXEMPLO DE CÓDIGO:
-                    ```python
-                    # Acessar um DataFrame específico
-                    df_vendas = dataframes['vendas_estoque_por_mes_regiao.xlsx']
+                        EXEMPLO DE CÓDIGO:
+                        ```python
+                        # Acessar um DataFrame específico
+                        df_vendas = dataframes['vendas_estoque_por_mes_regiao.xlsx']
                     
-                    # Verificar tipos de dados
-                    print("Tipos de dados:")
-                    print(df_vendas.dtypes)
+                        # Verificar tipos de dados
+                        print("Tipos de dados:")
+                        print(df_vendas.dtypes)
                     
-                    # Verificar primeiras linhas
-                    print("\nPrimeiras linhas:")
-                    print(df_vendas.head())
+                        # Verificar primeiras linhas
+                        print("\nPrimeiras linhas:")
+                        print(df_vendas.head())
                     
-                    # Converter colunas para o tipo correto se necessário
-                    df_vendas['vendas'] = pd.to_numeric(df_vendas['vendas'], errors='coerce')
-                    df_vendas['estoque'] = pd.to_numeric(df_vendas['estoque'], errors='coerce')
+                        # Converter colunas para o tipo correto se necessário
+                        df_vendas['vendas'] = pd.to_numeric(df_vendas['vendas'], errors='coerce')
+                        df_vendas['estoque'] = pd.to_numeric(df_vendas['estoque'], errors='coerce')
                     
-                    # Criar um gráfico de barras
-                    fig = px.bar(df_vendas, x='regiao', y='vendas', title='Vendas por Região')
-                    ```"""},
-                    {"role": "user", "content": f"Contexto: {context}\n\nPergunta: {prompt}"}
-                ]
-                
-                # Fazer a chamada à API
-                response = client.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=messages,
-                    max_tokens=500,
-                    temperature=0.7
-                )
-                
-                # Obter a resposta
-                assistant_response = response.choices[0].message.content
-                
-                # Adicionar resposta ao histórico
-                st.session_state['file_chat_history'].append({"role": "assistant", "content": assistant_response})
+                        # Criar um gráfico de barras
+                        fig = px.bar(df_vendas, x='regiao', y='vendas', title='Vendas por Região')
+                        ```"""},
+                        {"role": "user", "content": f"Contexto: {context}\n\nPergunta: {prompt}"}
+                    ]
                 
-                # Exibir resposta
-                with st.chat_message("assistant"):
-                    st.write(assistant_response)
+                    # Fazer a chamada à API: a resposta é gerada em segundo plano, por streaming,
+                    # ou reaproveitada do cache para a mesma pergunta sobre os mesmos arquivos
+                    parametros = {"model": "gpt-3.5-turbo", "max_tokens": 500, "temperature": 0.7}
+                    arquivos = sorted(
+                        (nome, st.session_state['file_fingerprints'].get(nome))
+                        for nome in st.session_state['dataframes']
+                    )
+                    st.session_state['file_chat_stream'] = start_answer(
+                        client,
+                        cache_key=response_key(prompt, arquivos, sistema=messages[0]['content'], **parametros),
+                        use_cache=not ignorar_cache,
+                        messages=messages,
+                        **parametros
+                    )
                 
-            except Exception as e:
-                error_message = f"Erro ao processar a pergunta: {str(e)}"
-                st.error(error_message)
-                st.session_state['file_chat_history'].append({"role": "assistant", "content": error_message})
+                except Exception as e:
+                    error_message = f"Erro ao processar a pergunta: {str(e)}"
+                    st.error(error_message)
+                    st.session_state['file_chat_history'].append({"role": "assistant", "content": error_message})
+            
+            # Exibir a resposta em andamento à medida que chega (pode ser interrompida)
+            render_stream('file_chat_stream', st.session_state['file_chat_history'])
+
+        # Dados expostos aos códigos e sua identificação (conteúdo dos arquivos),
+        # usada para memoizar os resultados
+        fingerprint_snippet = ('arquivos', tuple(sorted(
+            (nome, st.session_state['file_fingerprints'].get(nome))
+            for nome in st.session_state['dataframes']
+        )))
+
+        def dados_snippet():
+            return {'dataframes': st.session_state['dataframes']}
 
         # Interface de entrada de código
-        if st.session_state.get('show_file_code_input', False):
-            st.markdown("---")
-            st.subheader("Interface de Entrada de Código")
-            st.info("""
-            **Dica:** Para exibir gráficos no Streamlit:
-            1. Para Plotly: crie o objeto da figura (ex: `fig = px.scatter(...)`) e **não** use `fig.show()`
-            2. Para Matplotlib: crie a figura (ex: `fig = plt.figure()`) e **não** use `plt.show()`
-            Basta criar o objeto da figura e clicar em "Executar Código" para vê-lo na tela.
+        with span('codigo'):
+            if st.session_state.get('show_file_code_input', False):
+                st.markdown("---")
+                st.subheader("Interface de Entrada de Código")
+                st.info("""
+                **Dica:** Para exibir gráficos no Streamlit:
+                1. Para Plotly: crie o objeto da figura (ex: `fig = px.scatter(...)`) e **não** use `fig.show()`
+                2. Para Matplotlib: crie a figura (ex: `fig = plt.figure()`) e **não** use `plt.show()`
+                Basta criar o objeto da figura e clicar em "Executar Código" para vê-lo na tela.
             
-            **Acesso aos DataFrames:**
-            - Use `st.session_state['dataframes']` para acessar todos os DataFrames carregados
-            - Exemplo: `df = st.session_state['dataframes']['nome_do_arquivo']`
-            """)
+                **Acesso aos DataFrames:**
+                - Use `st.session_state['dataframes']` para acessar todos os DataFrames carregados
+                - Exemplo: `df = st.session_state['dataframes']['nome_do_arquivo']`
+                """)
             
-            # Campo de entrada de código
-            code_input = st.text_area(
-                "Digite seu código Python:",
-                height=200,
-                key="file_code_input_area"
-            )
+                # Campo de entrada de código
+                code_input = st.text_area(
+                    "Digite seu código Python:",
+                    height=200,
+                    key="file_code_input_area"
+                )
             
-            col1, col2 = st.columns([1, 5])
-            with col1:
-                if st.button("Executar e Salvar", key="file_execute_code_button"):
-                    if code_input:
-                        try:
-                            # Criar um namespace local para execução
-                            local_vars = {
-                                'st': st,
-                                'pd': pd,
-                                'np': np,
-                                'px': px,
-                                'plt': plt,
-                                'go': go,
-                                'dataframes': st.session_state['dataframes']
-                            }
-                            
+                col1, col2 = st.columns([1, 5])
+                with col1:
+                    if st.button("Executar e Salvar", key="file_execute_code_button"):
+                        if code_input:
                             try:
-                                # Executar o código
-                                exec(code_input, globals(), local_vars)
-                                
-                                # Verificar se algum gráfico foi criado
-                                for var_name, var_value in local_vars.items():
-                                    if isinstance(var_value, go.Figure):
-                                        st.plotly_chart(var_value, use_container_width=True)
-                                    elif isinstance(var_value, plt.Figure):
-                                        st.pyplot(var_value)
+                                try:
+                                    resultado, reaproveitado = run_snippet(
+                                        code_input, dados_snippet, fingerprint_snippet, globais=globals()
+                                    )
+                                    render_result(resultado, reaproveitado)
                                 
-                                # Verificar se há uma figura atual do matplotlib
-                                if plt.get_fignums():
-                                    st.pyplot(plt.gcf())
-                                    plt.close('all')  # Limpar as figuras após exibir
+                                    # Salvar o código
+                                    current_time = datetime.now()
+                                    code_name = f"Código {current_time.strftime('%H:%M')}"
+                                    if 'file_added_codes' not in st.session_state:
+                                        st.session_state['file_added_codes'] = []
+                                    st.session_state['file_added_codes'].append({
+                                        'name': code_name,
+                                        'code': code_input,
+                                        'timestamp': current_time.strftime("%Y-%m-%d %H:%M:%S")
+                                    })
                                 
-                                # Salvar o código
-                                current_time = datetime.now()
-                                code_name = f"Código {current_time.strftime('%H:%M')}"
-                                if 'file_added_codes' not in st.session_state:
-                                    st.session_state['file_added_codes'] = []
-                                st.session_state['file_added_codes'].append({
-                                    'name': code_name,
-                                    'code': code_input,
-                                    'timestamp': current_time.strftime("%Y-%m-%d %H:%M:%S")
-                                })
-                                
-                                st.success("Código executado e salvo com sucesso!")
+                                    st.success("Código executado e salvo com sucesso!")
+                                except Exception as e:
+                                    st.error(f"Erro ao executar o código: {str(e)}")
+                                    st.info("""
+                                    Dicas para resolver o erro:
+                                    1. Verifique se as colunas que você está usando existem no DataFrame
+                                    2. Certifique-se de que está usando colunas numéricas para operações matemáticas
+                                    3. Use df.dtypes para verificar os tipos de dados das colunas
+                                    4. Use df.head() para visualizar os dados antes de fazer operações
+                                    """)
                             except Exception as e:
                                 st.error(f"Erro ao executar o código: {str(e)}")
-                                st.info("""
-                                Dicas para resolver o erro:
-                                1. Verifique se as colunas que você está usando existem no DataFrame
-                                2. Certifique-se de que está usando colunas numéricas para operações matemáticas
-                                3. Use df.dtypes para verificar os tipos de dados das colunas
-                                4. Use df.head() para visualizar os dados antes de fazer operações
-                                """)
-                        except Exception as e:
-                            st.error(f"Erro ao executar o código: {str(e)}")
-                    else:
-                        st.error("Por favor, insira o código.")
+                        else:
+                            st.error("Por favor, insira o código.")
             
-            with col2:
-                if st.button("Cancelar", key="file_cancel_code_button"):
-                    st.session_state['show_file_code_input'] = False
-                    st.experimental_rerun()
+                with col2:
+                    if st.button("Cancelar", key="file_cancel_code_button"):
+                        st.session_state['show_file_code_input'] = False
+                        st.experimental_rerun()
 
         # Container para códigos adicionados
         if st.session_state.get('file_added_codes', []):
             st.markdown("---")
             st.subheader("Códigos Salvos")
             
-            for idx, code_item in enumerate(st.session_state['file_added_codes']):
-                with st.expander(f"{code_item['name']} - {code_item['timestamp']}"):
-                    st.code(code_item['code'], language='python')
+            with span('codigos_salvos'):
+                # Executa todos os códigos de uma vez; cada resultado aparece no seu código assim que fica pronto
+                executar_todos = st.button("▶️ Executar todos", key="file_run_all_saved")
+                progresso = st.empty()
+                espacos = {}
+                
+                for idx, code_item in enumerate(st.session_state['file_added_codes']):
+                    with st.expander(f"{code_item['name']} - {code_item['timestamp']}", expanded=executar_todos):
+                        st.code(code_item['code'], language='python')
                     
-                    col1, col2 = st.columns([1, 5])
-                    with col1:
-                        if st.button("Executar", key=f"file_run_saved_{idx}"):
+                        col1, col2 = st.columns([1, 5])
+                        with col1:
+                            executar = st.button("Executar", key=f"file_run_saved_{idx}")
+                        if executar:
                             try:
-                                # Criar um namespace local para execução
-                                local_vars = {
-                                    'st': st,
-                                    'pd': pd,
-                                    'np': np,
-                                    'px': px,
-                                    'plt': plt,
-                                    'go': go,
-                                    'dataframes': st.session_state['dataframes']
-                                }
-                                
-                                # Executar o código
-                                exec(code_item['code'], globals(), local_vars)
-                                
-                                # Verificar se algum gráfico foi criado
-                                for var_name, var_value in local_vars.items():
-                                    if isinstance(var_value, go.Figure):
-                                        st.plotly_chart(var_value, use_container_width=True)
-                                    elif isinstance(var_value, plt.Figure):
-                                        st.pyplot(var_value)
-                                
-                                # Verificar se há uma figura atual do matplotlib
-                                if plt.get_fignums():
-                                    st.pyplot(plt.gcf())
-                                    plt.close('all')  # Limpar as figuras após exibir
-                                
+                                resultado, reaproveitado = run_snippet(
+                                    code_item['code'], dados_snippet, fingerprint_snippet, globais=globals()
+                                )
+                                render_result(resultado, reaproveitado)
+                                # Continua exibindo o resultado nas próximas execuções, enquanto estiver no cache
+                                code_item['exibir'] = True
                                 st.success("Código executado com sucesso!")
                             except Exception as e:
                                 st.error(f"Erro ao executar o código: {str(e)}")
@@ -371,17 +452,37 @@ if st.session_state['dataframes']:
                                 3. Use df.dtypes para verificar os tipos de dados das colunas
                                 4. Use df.head() para visualizar os dados antes de fazer operações
                                 """)
+                        elif executar_todos:
+                            espacos[idx] = st.empty()
+                        elif code_item.get('exibir'):
+                            resultado = cached_result(code_item['code'], fingerprint_snippet)
+                            if resultado is not None:
+                                render_result(resultado, reaproveitado=True)
                     
-                    with col2:
-                        if st.button("Remover", key=f"file_remove_{idx}"):
-                            st.session_state['file_added_codes'].pop(idx)
-                            st.experimental_rerun()
+                        with col2:
+                            if st.button("Remover", key=f"file_remove_{idx}"):
+                                st.session_state['file_added_codes'].pop(idx)
+                                st.experimental_rerun()
+
+                if executar_todos:
+                    render_all(
+                        st.session_state['file_added_codes'], espacos, dados_snippet, fingerprint_snippet,
+                        globais=globals(), progresso=progresso
+                    )
 
             # Container para visualizações
-            with st.container():
+            with st.container(), span('visualizacoes'):
                 st.markdown("---")
                 st.subheader("Visualizações")
                 
+                # Arquivo visualizado: lido da store (arquivos em disco voltam para a memória)
+                arquivo_viz = st.selectbox(
+                    "Arquivo",
+                    list(st.session_state['dataframes']),
+                    key="file_viz_arquivo"
+                )
+                df = st.session_state['dataframes'][arquivo_viz]
+                
                 # Selecionar tipo de visualização
                 viz_type = st.selectbox(
                     "Tipo de Visualização",
@@ -410,4 +511,7 @@ if st.session_state['dataframes']:
                     
                     st.plotly_chart(fig, use_container_width=True)
                 else:
-                    st.warning("Não há colunas numéricas para visualização.") 
\ No newline at end of file
+                    st.warning("Não há colunas numéricas para visualização.")
+
+# Fechar o perfil da execução (log e painel de depuração)
+end_rerun()
@@ -0,0 +1,86 @@
+import json
+import os
+import zlib
+
+import plotly.graph_objects as go
+import plotly.io as pio
+import streamlit as st
+
+# Memória máxima das figuras do assistente por sessão e quantas são exibidas por vez
+PLOTS_MAX_MB = float(os.getenv('DASHBOARD_PLOTS_MB', 20))
+PLOTS_PER_PAGE = int(os.getenv('DASHBOARD_PLOTS_SHOWN', 5))
+MB = 1024 * 1024
+
+
+class PlotStore:
+    """Figuras geradas na sessão, guardadas como especificação serializada e comprimida.
+
+    Figuras plotly viram JSON comprimido (zlib); figuras já em PNG são
+    guardadas como estão. Acima de `max_bytes`, as mais antigas são descartadas.
+    """
+
+    def __init__(self, max_bytes=int(PLOTS_MAX_MB * MB)):
+        self.max_bytes = max_bytes
+        self._itens = []
+        self.bytes = 0
+        self.descartadas = 0
+
+    def append(self, figura, code=None, timestamp=None):
+        if isinstance(figura, go.Figure):
+            tipo, dados = 'plotly', zlib.compress(pio.to_json(figura, validate=False).encode('utf-8'))
+        elif isinstance(figura, bytes):
+            tipo, dados = 'png', figura
+        else:
+            raise TypeError(f"Figura não suportada: {type(figura).__name__}")
+
+        self._itens.append({'tipo': tipo, 'dados': dados, 'code': code, 'timestamp': timestamp})
+        self.bytes += len(dados)
+        while self.bytes > self.max_bytes and len(self._itens) > 1:
+            antigo = self._itens.pop(0)
+            self.bytes -= len(antigo['dados'])
+            self.descartadas += 1
+
+    def __len__(self):
+        return len(self._itens)
+
+    def recent(self, n):
+        """As `n` figuras mais recentes, da mais nova para a mais antiga."""
+        return self._itens[::-1][:n]
+
+    def stats(self):
+        return {
+            'figuras': len(self._itens),
+            'bytes': self.bytes,
+            'max_bytes': self.max_bytes,
+            'descartadas': self.descartadas
+        }
+
+
+def render_plot_store(store, key, por_pagina=PLOTS_PER_PAGE):
+    """Exibe as figuras mais recentes, com "Carregar mais" para as anteriores."""
+    chave_visiveis = f"{key}_visiveis"
+    visiveis = st.session_state.get(chave_visiveis, por_pagina)
+
+    for item in store.recent(visiveis):
+        if item['tipo'] == 'plotly':
+            st.plotly_chart(json.loads(zlib.decompress(item['dados'])), use_container_width=True)
+        else:
+            st.image(item['dados'])
+        if item['timestamp'] is not None:
+            st.caption(f"Gerado em: {item['timestamp'].strftime('%d/%m/%Y %H:%M:%S')}")
+
+    if len(store) > visiveis:
+        st.button(
+            f"Carregar mais ({len(store) - visiveis} anteriores)",
+            key=f"{key}_mais",
+            on_click=lambda: st.session_state.update({chave_visiveis: visiveis + por_pagina})
+        )
+
+    estatisticas = store.stats()
+    texto = (
+        f"{estatisticas['figuras']} gráficos na sessão, {estatisticas['bytes'] / MB:.2f} MB "
+        f"de {estatisticas['max_bytes'] / MB:.0f} MB"
+    )
+    if estatisticas['descartadas']:
+        texto += f" ({estatisticas['descartadas']} mais antigos descartados)"
+    st.caption(texto)
@@ -0,0 +1,162 @@
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Limites do cache de resultados compartilhado entre as sessões
+CACHE_MAX_MB = float(os.getenv('DASHBOARD_CACHE_MB', 256))
+CACHE_TTL = float(os.getenv('DASHBOARD_CACHE_TTL', 15 * 60))
+
+
+def estimate_size(valor):
+    """Estimativa (em bytes) da memória ocupada por um resultado."""
+    # deep=True conta os objetos das colunas de texto (com deep=False, só os ponteiros)
+    if isinstance(valor, pd.DataFrame):
+        return int(valor.memory_usage(index=True, deep=True).sum())
+    if isinstance(valor, pd.Series):
+        return int(valor.memory_usage(index=True, deep=True))
+    if isinstance(valor, np.ndarray):
+        return int(valor.nbytes)
+    if isinstance(valor, dict):
+        return sys.getsizeof(valor) + sum(estimate_size(v) for v in valor.values())
+    if isinstance(valor, (list, tuple)):
+        return sys.getsizeof(valor) + sum(estimate_size(v) for v in valor)
+    if hasattr(valor, 'to_plotly_json'):
+        # Figura plotly: os dados dos traços (arrays) e o layout
+        return estimate_size(valor.to_plotly_json())
+    return sys.getsizeof(valor)
+
+
+class ResultCache:
+    """Cache LRU de resultados com limite de memória, expiração (TTL) e contadores.
+
+    É seguro entre threads (cada sessão do Streamlit roda em uma thread) e
+    evita que várias sessões calculem a mesma chave ao mesmo tempo.
+    """
+
+    def __init__(self, max_bytes, ttl=None, sizeof=estimate_size):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.sizeof = sizeof
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _expired(self, criado_em):
+        return self.ttl is not None and time.monotonic() - criado_em > self.ttl
+
+    def _remove(self, key):
+        _, tamanho, _ = self._entries.pop(key)
+        self.bytes -= tamanho
+
+    def _lookup(self, key, default):
+        # Chamado com o lock adquirido; não altera os contadores
+        entrada = self._entries.get(key)
+        if entrada is None:
+            return default
+        if self._expired(entrada[2]):
+            self._remove(key)
+            return default
+        self._entries.move_to_end(key)
+        return entrada[0]
+
+    def get(self, key, default=None):
+        sentinela = object()
+        with self._lock:
+            valor = self._lookup(key, sentinela)
+            if valor is sentinela:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return valor
+
+    def put(self, key, valor):
+        tamanho = self.sizeof(valor)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if tamanho > self.max_bytes:
+                return valor
+            self._entries[key] = (valor, tamanho, time.monotonic())
+            self.bytes += tamanho
+            while self.bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+        return valor
+
+    def get_or_compute(self, key, calcular):
+        """Retorna o valor da chave, calculando-o (uma única vez por chave) se necessário."""
+        sentinela = object()
+        with self._lock:
+            valor = self._lookup(key, sentinela)
+            if valor is not sentinela:
+                self.hits += 1
+                return valor
+            evento = self._inflight.get(key)
+            dono = evento is None
+            if dono:
+                self.misses += 1
+                evento = self._inflight[key] = threading.Event()
+
+        if not dono:
+            # Outra sessão já está calculando a mesma chave
+            evento.wait()
+            with self._lock:
+                valor = self._lookup(key, sentinela)
+                if valor is not sentinela:
+                    self.hits += 1
+                    return valor
+            # O resultado não ficou no cache (ex.: maior que o limite ou erro)
+            return calcular()
+
+        try:
+            return self.put(key, calcular())
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            evento.set()
+
+    def __contains__(self, key):
+        # Não altera os contadores nem a ordem de uso
+        with self._lock:
+            entrada = self._entries.get(key)
+            return entrada is not None and not self._expired(entrada[2])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': self.hits / total if total else 0.0
+            }
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def shared_cache():
+    """Cache de resultados único do processo, compartilhado por todas as sessões e páginas."""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = ResultCache(int(CACHE_MAX_MB * 1024 * 1024), CACHE_TTL or None)
+        return _shared_cache
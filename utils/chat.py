@@ -0,0 +1,159 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+from utils.response_cache import response_cache
+
+# Número máximo de respostas do assistente sendo geradas ao mesmo tempo no processo
+CHAT_WORKERS = int(os.getenv('DASHBOARD_CHAT_WORKERS', 8))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def chat_executor():
+    """Pool de threads compartilhado que consome as respostas da API."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=CHAT_WORKERS, thread_name_prefix='chat')
+        return _executor
+
+
+class ChatStream:
+    """Resposta do assistente gerada em segundo plano por streaming.
+
+    Os trechos ficam acumulados no objeto, que é guardado na sessão: se a
+    execução do script for interrompida (ex.: o usuário mexeu em um filtro),
+    a próxima execução continua exibindo a mesma resposta.
+    """
+
+    cached = False
+
+    def __init__(self, client, cache_key=None, **kwargs):
+        self.partes = []
+        self.done = False
+        self.cancelled = False
+        self.error = None
+        self.cache_key = cache_key
+        self._resposta = None
+        self._cond = threading.Condition()
+        self._future = chat_executor().submit(self._run, client, kwargs)
+
+    @classmethod
+    def from_cache(cls, texto):
+        """Resposta já concluída, reaproveitada do cache de respostas."""
+        stream = cls.__new__(cls)
+        stream.partes = [texto]
+        stream.done = True
+        stream.cancelled = False
+        stream.error = None
+        stream.cached = True
+        stream.cache_key = None
+        stream._resposta = None
+        stream._cond = threading.Condition()
+        return stream
+
+    def _run(self, client, kwargs):
+        try:
+            if self.cancelled:
+                return
+            self._resposta = client.chat.completions.create(stream=True, **kwargs)
+            if self.cancelled:
+                return
+            for chunk in self._resposta:
+                if self.cancelled:
+                    break
+                if not chunk.choices:
+                    continue
+                trecho = chunk.choices[0].delta.content
+                if trecho:
+                    with self._cond:
+                        self.partes.append(trecho)
+                        self._cond.notify_all()
+            # Só respostas completas vão para o cache
+            cache = response_cache()
+            if self.cache_key and cache is not None and not self.cancelled and self.partes:
+                cache.put(self.cache_key, self.text)
+        except Exception as e:
+            # Fechar a conexão ao cancelar interrompe a leitura com erro
+            if not self.cancelled:
+                self.error = e
+        finally:
+            if self._resposta is not None:
+                self._resposta.close()
+            with self._cond:
+                self.done = True
+                self._cond.notify_all()
+
+    @property
+    def text(self):
+        return ''.join(self.partes)
+
+    def cancel(self):
+        """Interrompe a resposta, fechando a conexão com a API."""
+        self.cancelled = True
+        if self._resposta is not None:
+            self._resposta.close()
+
+    def chunks(self, intervalo=0.25):
+        """Gera os trechos desde o início da resposta, à medida que chegam.
+
+        Sem trechos novos, gera '' a cada `intervalo` segundos para que o
+        Streamlit possa interromper a execução (ex.: clique em "Parar").
+        """
+        posicao = 0
+        while True:
+            with self._cond:
+                if posicao == len(self.partes) and not self.done:
+                    self._cond.wait(intervalo)
+                novos = self.partes[posicao:]
+                posicao += len(novos)
+                terminou = self.done and posicao == len(self.partes)
+            yield ''.join(novos)
+            if terminou:
+                return
+
+
+def start_answer(client, cache_key=None, use_cache=True, **kwargs):
+    """Inicia a resposta do assistente, reaproveitando a do cache quando houver.
+
+    Com `use_cache=False` o cache não é consultado, mas a resposta nova o atualiza.
+    """
+    cache = response_cache()
+    if cache_key and use_cache and cache is not None:
+        texto = cache.get(cache_key)
+        if texto is not None:
+            return ChatStream.from_cache(texto)
+    return ChatStream(client, cache_key=cache_key, **kwargs)
+
+
+def render_stream(chave, historico, prefixo_erro="Erro ao processar a pergunta"):
+    """Exibe a resposta em andamento em `st.session_state[chave]`.
+
+    Quando a resposta termina (ou é interrompida), ela é movida para o
+    histórico de chat e retornada.
+    """
+    stream = st.session_state.get(chave)
+    if stream is None:
+        return None
+
+    with st.chat_message("assistant"):
+        if not stream.done and st.button("⏹️ Parar resposta", key=f"{chave}_parar"):
+            stream.cancel()
+        st.write_stream(stream.chunks())
+        texto = stream.text
+        if stream.error is not None:
+            texto = f"{prefixo_erro}: {str(stream.error)}"
+            st.error(texto)
+        elif stream.cancelled:
+            texto += "\n\n_(resposta interrompida)_"
+            st.caption("Resposta interrompida.")
+        elif stream.cached:
+            st.caption("Resposta reaproveitada do cache.")
+
+    del st.session_state[chave]
+    historico.append({"role": "assistant", "content": texto})
+    return texto
@@ -0,0 +1,111 @@
+import threading
+
+import pandas as pd
+
+from utils.encoding import union_categories
+from utils.filters import filter_date_range
+
+# Dimensões e métricas do cubo de agregação do dashboard principal
+DIMENSOES = ['data', 'regiao', 'categoria']
+METRICAS = ['vendas', 'clientes', 'receita']
+
+
+class RollupCube:
+    """Cubo pré-agregado por dia × região × categoria com somas das métricas.
+
+    Além das células, mantém os totais gerais e os totais por região, por
+    categoria e por dia, atualizados por delta em `append`.
+    """
+
+    def __init__(self, df):
+        self._lock = threading.Lock()
+        cells = self._aggregate(df)
+        self._state = (cells, cells[METRICAS].sum(), self._rollups(cells))
+
+    @staticmethod
+    def _aggregate(df):
+        """Agrega as linhas em células (dia, região, categoria)."""
+        base = df[DIMENSOES + METRICAS].copy()
+        base['data'] = base['data'].dt.normalize()
+        cells = base.groupby(DIMENSOES, observed=True, sort=True)[METRICAS].sum().reset_index()
+        return cells
+
+    @staticmethod
+    def _rollups(cells):
+        return {
+            dimensao: cells.groupby(dimensao, observed=True)[METRICAS].sum()
+            for dimensao in DIMENSOES
+        }
+
+    @property
+    def cells(self):
+        return self._state[0]
+
+    def __len__(self):
+        return len(self.cells)
+
+    def append(self, novas_linhas):
+        """Incorpora linhas novas agregando apenas o delta.
+
+        Só as células a partir do dia mais antigo das linhas novas são
+        reagregadas; os totais mantidos são somados ao delta.
+        """
+        if novas_linhas.empty:
+            return
+        delta = self._aggregate(novas_linhas)
+        with self._lock:
+            cells, totais, rollups = self._state
+            cells, delta = union_categories([cells, delta], ['regiao', 'categoria'])
+            pos = int(cells['data'].searchsorted(delta['data'].iloc[0], side='left'))
+            cauda = pd.concat([cells.iloc[pos:], delta], ignore_index=True)
+            cauda = cauda.groupby(DIMENSOES, observed=True, sort=True)[METRICAS].sum().reset_index()
+            cells = pd.concat([cells.iloc[:pos], cauda], ignore_index=True)
+
+            totais = totais + delta[METRICAS].sum()
+            delta_rollups = self._rollups(delta)
+            rollups = {
+                dimensao: rollups[dimensao].add(delta_rollups[dimensao], fill_value=0).sort_index()
+                for dimensao in DIMENSOES
+            }
+            self._state = (cells, totais, rollups)
+
+    def covers(self, data_inicio, data_fim):
+        """Indica se o intervalo de datas inclui todas as células do cubo."""
+        cells = self.cells
+        if cells.empty:
+            return True
+        return (
+            pd.Timestamp(data_inicio) <= cells['data'].iloc[0] and
+            pd.Timestamp(data_fim).normalize() >= cells['data'].iloc[-1]
+        )
+
+    def slice(self, data_inicio, data_fim, regiao="Todas", categoria="Todas"):
+        """Retorna as células que atendem aos filtros da barra lateral."""
+        cells = filter_date_range(self.cells, 'data', data_inicio, data_fim)
+        if regiao != "Todas":
+            cells = cells[cells['regiao'] == regiao]
+        if categoria != "Todas":
+            cells = cells[cells['categoria'] == categoria]
+        return cells
+
+    def totals(self, cells=None):
+        """Soma das métricas (cards) sobre as células informadas, ou os totais mantidos."""
+        if cells is None:
+            return self._state[1]
+        return cells[METRICAS].sum()
+
+    def rollup(self, dimensao, metricas=None):
+        """Totais mantidos por uma dimensão, sem filtros."""
+        metricas = metricas or METRICAS
+        return self._state[2][dimensao][metricas].reset_index()
+
+    @staticmethod
+    def ticket_medio(totais):
+        """Receita por venda a partir dos totais."""
+        return totais['receita'] / totais['vendas'] if totais['vendas'] > 0 else 0
+
+    @staticmethod
+    def by(cells, dimensao, metricas=None):
+        """Agrupa as células por uma dimensão (ex.: 'regiao', 'categoria', 'data')."""
+        metricas = metricas or METRICAS
+        return cells.groupby(dimensao, observed=True)[metricas].sum().reset_index()
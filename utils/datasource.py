@@ -0,0 +1,344 @@
+import hashlib
+import os
+import threading
+import time
+import uuid
+
+import pandas as pd
+
+from utils.encoding import encode_categoricals, union_categories, BitmapIndex
+from utils.filters import sort_by_date, date_range_positions
+
+# Diretório com os extratos reais (Parquet particionado ou Arrow IPC).
+# Sem ele, os dashboards usam os dados de exemplo gerados em memória.
+DATA_DIR_ENV = 'DASHBOARD_DATA_DIR'
+
+# Intervalo mínimo (s) entre as buscas por dados novos
+SYNC_SECONDS = float(os.getenv('DASHBOARD_SYNC_SECONDS', 30))
+
+PARQUET_SUFFIXES = ('.parquet', '.pq')
+IPC_SUFFIXES = ('.arrow', '.feather', '.ipc')
+
+
+class DataSource:
+    """Interface comum das fontes de dados dos dashboards.
+
+    `load` recebe a projeção de colunas, um intervalo de datas
+    `(coluna, data_inicio, data_fim)` e filtros de seleção `{coluna: valores}`.
+    """
+
+    date_column = None
+    categorical_columns = ()
+    version = None
+
+    def load(self, columns=None, date_range=None, filters=None):
+        raise NotImplementedError
+
+    def distinct(self, coluna):
+        raise NotImplementedError
+
+    def date_bounds(self, coluna=None):
+        raise NotImplementedError
+
+    def append(self, novas_linhas):
+        raise NotImplementedError
+
+    def poll(self, intervalo=SYNC_SECONDS):
+        """Busca dados novos (no máximo uma vez a cada `intervalo` segundos); muda `version` se houver."""
+
+
+class InMemorySource(DataSource):
+    """Fonte sobre um DataFrame em memória, ordenado por data e com índice de bitmaps."""
+
+    def __init__(self, df, date_column=None, categorical_columns=()):
+        self.date_column = date_column
+        self.categorical_columns = tuple(categorical_columns)
+        df = encode_categoricals(df, self.categorical_columns)
+        if date_column is not None:
+            df = sort_by_date(df, date_column)
+        self._lock = threading.Lock()
+        self._state = (df, BitmapIndex(df, self.categorical_columns))
+        self.version = uuid.uuid4().hex[:12]
+
+    @property
+    def df(self):
+        return self._state[0]
+
+    @property
+    def bitmap_index(self):
+        return self._state[1]
+
+    def append(self, novas_linhas):
+        """Acrescenta linhas novas, mantendo a ordenação por data e o índice de bitmaps.
+
+        Linhas mais recentes que as existentes (o caso comum) apenas estendem os
+        bitmaps; linhas fora de ordem fazem o frame ser reordenado e reindexado.
+        """
+        if novas_linhas.empty:
+            return
+        with self._lock:
+            df, bitmap_index = self._state
+            novas = novas_linhas[df.columns]
+            df, novas = union_categories([df, novas], self.categorical_columns)
+            em_ordem = (
+                self.date_column is None or df.empty or
+                novas[self.date_column].min() >= df[self.date_column].iloc[-1]
+            )
+            if self.date_column is not None:
+                novas = sort_by_date(novas, self.date_column)
+            combinado = pd.concat([df, novas], ignore_index=True)
+            if em_ordem:
+                indice = bitmap_index.copy()
+                indice.append(novas)
+            else:
+                combinado = sort_by_date(combinado, self.date_column)
+                indice = BitmapIndex(combinado, self.categorical_columns)
+            self._state = (combinado, indice)
+            self.version = uuid.uuid4().hex[:12]
+
+    def load(self, columns=None, date_range=None, filters=None):
+        df, bitmap_index = self._state
+        pos_inicio, pos_fim = 0, len(df)
+        if date_range is not None:
+            coluna, data_inicio, data_fim = date_range
+            pos_inicio, pos_fim = date_range_positions(df, coluna, data_inicio, data_fim)
+            df = df.iloc[pos_inicio:pos_fim]
+
+        indexados = {c: v for c, v in (filters or {}).items() if c in bitmap_index.bitmaps}
+        if indexados:
+            df = df[bitmap_index.select(indexados, pos_inicio, pos_fim)]
+        for coluna, valores in (filters or {}).items():
+            if coluna not in indexados:
+                df = df[df[coluna].isin(valores)]
+
+        if columns is not None:
+            df = df[list(columns)]
+        return df
+
+    def distinct(self, coluna):
+        if coluna in self.bitmap_index.bitmaps:
+            return self.bitmap_index.values(coluna)
+        return sorted(self.df[coluna].dropna().unique().tolist())
+
+    def date_bounds(self, coluna=None):
+        serie = self.df[coluna or self.date_column]
+        return serie.iloc[0], serie.iloc[-1]
+
+
+class ArrowDatasetSource(DataSource):
+    """Fonte sobre arquivos Parquet (particionados no estilo hive) ou Arrow IPC.
+
+    Lê apenas as colunas pedidas e envia os filtros de data e de seleção para o
+    pyarrow, que descarta partições e row groups pelas estatísticas. Os arquivos
+    locais são lidos via memory-map.
+    """
+
+    def __init__(self, path, file_format='parquet', date_column=None, categorical_columns=()):
+        import pyarrow.dataset as ds
+        from pyarrow import fs
+
+        self.path = path
+        self.file_format = file_format
+        self.date_column = date_column
+        self.categorical_columns = tuple(categorical_columns)
+        self._filesystem = fs.LocalFileSystem(use_mmap=True)
+        self.dataset = ds.dataset(
+            path,
+            format=file_format,
+            partitioning='hive',
+            filesystem=self._filesystem
+        )
+        self.schema_columns = set(self.dataset.schema.names)
+        self.version = self._fingerprint()
+        self._distinct = {}
+        self._bounds = {}
+        self._ultima_busca = time.monotonic()
+        self._busca_lock = threading.Lock()
+
+    def poll(self, intervalo=SYNC_SECONDS):
+        agora = time.monotonic()
+        if agora - self._ultima_busca < intervalo:
+            return
+        # Outra sessão já está buscando
+        if not self._busca_lock.acquire(blocking=False):
+            return
+        try:
+            self._ultima_busca = agora
+            self.refresh()
+        finally:
+            self._busca_lock.release()
+
+    def refresh(self):
+        """Detecta arquivos novos no diretório do dataset e retorna apenas as linhas deles.
+
+        Retorna None quando algum arquivo existente foi alterado ou removido, caso
+        em que os agregados precisam ser recalculados por completo.
+        """
+        import pyarrow.dataset as ds
+
+        atual = ds.dataset(self.path, format=self.file_format, partitioning='hive', filesystem=self._filesystem)
+        anteriores = set(self.dataset.files)
+        novos = sorted(set(atual.files) - anteriores)
+        versao_anterior = self.version
+        alterados = not anteriores.issubset(atual.files)
+
+        self.dataset = atual
+        self.schema_columns = set(atual.schema.names)
+        self.version = self._fingerprint()
+        self._distinct = {}
+        self._bounds = {}
+        if alterados or (not novos and self.version != versao_anterior):
+            return None
+        if not novos:
+            return pd.DataFrame()
+
+        delta = ds.dataset(
+            novos,
+            format=self.file_format,
+            partitioning='hive',
+            partition_base_dir=self.path,
+            filesystem=self._filesystem
+        )
+        categorias = [c for c in self.categorical_columns if c in self.schema_columns]
+        return delta.to_table().to_pandas(categories=categorias)
+
+    def append(self, novas_linhas):
+        """Grava as linhas novas no dataset e atualiza a versão.
+
+        Em um diretório, o lote vira um arquivo novo (nas partições das suas
+        linhas), que passa a fazer parte da fonte: `refresh` não o conta de novo.
+        Um dataset de arquivo único é regravado com as linhas acrescentadas.
+        """
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        if novas_linhas.empty:
+            return
+        faltando = [c for c in self.dataset.schema.names if c not in novas_linhas.columns]
+        if faltando:
+            raise ValueError(f"Colunas ausentes nas linhas novas: {', '.join(faltando)}")
+        # Categorias viram os valores, no tipo de cada coluna do dataset
+        novas = novas_linhas[self.dataset.schema.names].astype(
+            {c: object for c in novas_linhas.columns if isinstance(novas_linhas[c].dtype, pd.CategoricalDtype)}
+        )
+        tabela = pa.Table.from_pandas(novas, preserve_index=False).cast(self.dataset.schema)
+
+        if os.path.isdir(self.path):
+            # Partições (hive): os campos do dataset que não estão dentro dos arquivos
+            fragmento = next(self.dataset.get_fragments(), None)
+            fisicos = fragmento.physical_schema.names if fragmento is not None else self.dataset.schema.names
+            campos = [self.dataset.schema.field(c) for c in self.dataset.schema.names if c not in fisicos]
+            particoes = ds.partitioning(pa.schema(campos), flavor='hive') if campos else None
+            gravados = []
+            ds.write_dataset(
+                tabela,
+                self.path,
+                format=self.file_format,
+                partitioning=particoes,
+                basename_template=f"lote-{uuid.uuid4().hex}-{{i}}.{'arrow' if self.file_format == 'ipc' else 'parquet'}",
+                existing_data_behavior='overwrite_or_ignore',
+                filesystem=self._filesystem,
+                file_visitor=lambda arquivo: gravados.append(arquivo.path)
+            )
+            arquivos = list(self.dataset.files) + gravados
+        else:
+            tabela = pa.concat_tables([self.dataset.to_table(), tabela])
+            temporario = f"{self.path}.{uuid.uuid4().hex}.tmp"
+            if self.file_format == 'ipc':
+                with pa.OSFile(temporario, 'wb') as arquivo, pa.ipc.new_file(arquivo, tabela.schema) as escritor:
+                    escritor.write_table(tabela)
+            else:
+                import pyarrow.parquet as pq
+                pq.write_table(tabela, temporario)
+            # Quem já mapeou o arquivo antigo continua lendo a versão anterior
+            os.replace(temporario, self.path)
+            arquivos = [self.path]
+
+        self.dataset = ds.dataset(
+            arquivos,
+            format=self.file_format,
+            partitioning='hive',
+            partition_base_dir=self.path if os.path.isdir(self.path) else None,
+            filesystem=self._filesystem
+        )
+        self.version = self._fingerprint()
+        self._distinct = {}
+        self._bounds = {}
+
+    def _fingerprint(self):
+        """Identifica a versão dos arquivos pelo caminho, tamanho e data de modificação."""
+        h = hashlib.sha1()
+        for arquivo in sorted(self.dataset.files):
+            info = os.stat(arquivo)
+            h.update(f"{arquivo}:{info.st_size}:{info.st_mtime_ns}".encode())
+        return h.hexdigest()[:12]
+
+    def _expression(self, date_range, filters):
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        expr = None
+        if date_range is not None:
+            coluna, data_inicio, data_fim = date_range
+            inicio = pd.Timestamp(data_inicio).normalize()
+            fim = pd.Timestamp(data_fim).normalize() + pd.Timedelta(days=1)
+            expr = (ds.field(coluna) >= pa.scalar(inicio)) & (ds.field(coluna) < pa.scalar(fim))
+        for coluna, valores in (filters or {}).items():
+            cond = ds.field(coluna).isin(list(valores))
+            expr = cond if expr is None else expr & cond
+        return expr
+
+    def load(self, columns=None, date_range=None, filters=None):
+        if columns is not None:
+            columns = [c for c in columns if c in self.schema_columns]
+        table = self.dataset.to_table(columns=columns, filter=self._expression(date_range, filters))
+        if self.date_column in table.column_names:
+            table = table.sort_by(self.date_column)
+        categorias = [c for c in self.categorical_columns if c in table.column_names]
+        return table.to_pandas(categories=categorias)
+
+    def distinct(self, coluna):
+        if coluna not in self._distinct:
+            import pyarrow.compute as pc
+            valores = pc.unique(self.dataset.to_table(columns=[coluna])[coluna]).drop_null()
+            self._distinct[coluna] = sorted(valores.to_pylist())
+        return self._distinct[coluna]
+
+    def date_bounds(self, coluna=None):
+        coluna = coluna or self.date_column
+        if coluna not in self._bounds:
+            import pyarrow.compute as pc
+            limites = pc.min_max(self.dataset.to_table(columns=[coluna])[coluna]).as_py()
+            self._bounds[coluna] = (pd.Timestamp(limites['min']), pd.Timestamp(limites['max']))
+        return self._bounds[coluna]
+
+
+def find_dataset(nome, data_dir=None):
+    """Procura o extrato `nome` em DASHBOARD_DATA_DIR e retorna (caminho, formato)."""
+    data_dir = data_dir or os.getenv(DATA_DIR_ENV)
+    if not data_dir:
+        return None, None
+
+    caminho = os.path.join(data_dir, nome)
+    if os.path.isdir(caminho):
+        for raiz, _, arquivos in os.walk(caminho):
+            for arquivo in arquivos:
+                if arquivo.endswith(IPC_SUFFIXES):
+                    return caminho, 'ipc'
+                if arquivo.endswith(PARQUET_SUFFIXES):
+                    return caminho, 'parquet'
+    for sufixo in PARQUET_SUFFIXES:
+        if os.path.isfile(caminho + sufixo):
+            return caminho + sufixo, 'parquet'
+    for sufixo in IPC_SUFFIXES:
+        if os.path.isfile(caminho + sufixo):
+            return caminho + sufixo, 'ipc'
+    return None, None
+
+
+def get_data_source(nome, fallback, date_column=None, categorical_columns=()):
+    """Retorna a fonte do dataset `nome`: arquivos em DASHBOARD_DATA_DIR ou `fallback()` em memória."""
+    caminho, formato = find_dataset(nome)
+    if caminho is not None:
+        return ArrowDatasetSource(caminho, formato, date_column, categorical_columns)
+    return InMemorySource(fallback(), date_column, categorical_columns)
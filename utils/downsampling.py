@@ -0,0 +1,95 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from utils.filters import filter_date_range
+
+# Número máximo de pontos enviados ao navegador por série
+MAX_PONTOS = int(os.getenv('DASHBOARD_MAX_PONTOS_GRAFICO', 2000))
+
+# Janelas de visualização (em dias) dos gráficos temporais
+JANELAS = {
+    "1w": 7,
+    "1m": 30,
+    "3m": 90,
+    "6m": 180,
+    "1y": 365,
+    "All": None
+}
+
+
+def _as_float(valores):
+    valores = np.asarray(valores)
+    if np.issubdtype(valores.dtype, np.datetime64):
+        return valores.astype('datetime64[ns]').astype(np.int64).astype(np.float64)
+    return valores.astype(np.float64)
+
+
+def lttb_indices(x, y, max_pontos=MAX_PONTOS):
+    """Índices dos pontos escolhidos pelo Largest-Triangle-Three-Buckets.
+
+    Mantém o primeiro e o último ponto e, em cada balde intermediário, o ponto
+    que forma o maior triângulo com o ponto escolhido no balde anterior e a
+    média do balde seguinte.
+    """
+    n = len(x)
+    if max_pontos >= n or max_pontos < 3:
+        return np.arange(n)
+
+    x = _as_float(x)
+    y = _as_float(y)
+    limites = np.linspace(1, n - 1, max_pontos - 1).astype(np.int64)
+
+    indices = np.empty(max_pontos, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+    anterior = 0
+    for i in range(max_pontos - 2):
+        inicio, fim = limites[i], limites[i + 1]
+        prox_inicio, prox_fim = limites[i + 1], limites[i + 2] if i + 2 < len(limites) else n
+        media_x = x[prox_inicio:prox_fim].mean()
+        media_y = y[prox_inicio:prox_fim].mean()
+
+        bx = x[inicio:fim]
+        by = y[inicio:fim]
+        areas = np.abs(
+            (x[anterior] - media_x) * (by - y[anterior]) -
+            (x[anterior] - bx) * (media_y - y[anterior])
+        )
+        anterior = inicio + int(np.argmax(areas))
+        indices[i + 1] = anterior
+    return indices
+
+
+def downsample(df, x, y, max_pontos=MAX_PONTOS):
+    """Reduz uma série (colunas x e y de df) para no máximo `max_pontos` pontos."""
+    if len(df) <= max_pontos:
+        return df
+    return df.iloc[lttb_indices(df[x].to_numpy(), df[y].to_numpy(), max_pontos)]
+
+
+def downsample_long(df, x, ys, max_pontos=MAX_PONTOS, var_name='variable', value_name='value'):
+    """Reduz várias séries de um DataFrame largo e devolve o formato longo (x, variável, valor).
+
+    Cada série é reduzida separadamente, então cada traço do gráfico fica com no
+    máximo `max_pontos` pontos.
+    """
+    partes = []
+    for y in ys:
+        serie = downsample(df[[x, y]], x, y, max_pontos)
+        partes.append(pd.DataFrame({
+            x: serie[x].to_numpy(),
+            var_name: y,
+            value_name: serie[y].to_numpy()
+        }))
+    return pd.concat(partes, ignore_index=True)
+
+
+def slice_window(df, x, janela):
+    """Recorta a janela final ("1w", "1m", ..., "All") de um DataFrame ordenado por x."""
+    dias = JANELAS.get(janela)
+    if dias is None or df.empty:
+        return df
+    fim = df[x].iloc[-1]
+    return filter_date_range(df, x, fim - pd.Timedelta(days=dias - 1), fim)
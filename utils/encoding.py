@@ -0,0 +1,188 @@
+import numpy as np
+import pandas as pd
+
+
+def encode_categoricals(df, colunas):
+    """Converte as colunas de texto informadas para o dtype `category` (códigos + dicionário)."""
+    df = df.copy()
+    for coluna in colunas:
+        if not isinstance(df[coluna].dtype, pd.CategoricalDtype):
+            df[coluna] = df[coluna].astype('category')
+    return df
+
+
+# Colunas de texto com até essa proporção de valores distintos viram `category`
+CATEGORY_MAX_RATIO = 0.5
+# Textos com cara de data: ISO (2024-01-31) e o padrão brasileiro (31/01/2024), com hora opcional
+_PARECE_DATA = r'^\s*(\d{4}-\d{1,2}-\d{1,2}|\d{1,2}/\d{1,2}/\d{4})'
+_DATA_BR = r'^\s*(\d{1,2})/(\d{1,2})/(\d{4})'
+_AMOSTRA_DATAS = 1000
+
+
+def _parse_datas(serie):
+    """Coluna de texto convertida em datas, ou None se algum valor não converter."""
+    validos = serie.dropna()
+    amostra = validos.head(_AMOSTRA_DATAS).astype(str)
+    if amostra.empty or not amostra.str.match(_PARECE_DATA).all():
+        return None
+    # Texto do Arrow: a substituição abaixo roda no RE2, sem passar pelo `re` do Python
+    texto = serie.astype('string[pyarrow]')
+    if amostra.str.match(_DATA_BR).any():
+        # Reescrito em ISO: o parser ISO do pandas é muito mais rápido que um formato com strptime
+        texto = texto.str.replace(_DATA_BR, r'\3-\2-\1', regex=True)
+    datas = pd.to_datetime(texto, format='ISO8601', errors='coerce')
+    # Só converte se nenhum valor se perder (ex.: 31/02, datas no padrão americano)
+    if datas.notna().sum() != len(validos):
+        return None
+    return datas
+
+
+def optimize_dtypes(df, category_max_ratio=CATEGORY_MAX_RATIO):
+    """Reduz a memória do DataFrame, alterando as colunas no próprio objeto.
+
+    Inteiros vão para int32 quando os valores cabem, decimais para float32
+    quando não há perda de precisão, textos com cara de data para
+    datetime64 e textos com poucos valores distintos para `category`.
+    Retorna o DataFrame e as conversões feitas ({coluna: (dtype antigo, novo)}).
+    """
+    conversoes = {}
+    for coluna in df.columns:
+        serie = df[coluna]
+        nova = None
+        if pd.api.types.is_bool_dtype(serie):
+            continue
+        if not isinstance(serie.dtype, np.dtype):
+            # Tipos do pandas/Arrow (Int64, string, category...) ficam como estão
+            continue
+        if pd.api.types.is_integer_dtype(serie):
+            # No mínimo int32 e com sinal: contas entre colunas (ex.: estoque - vendas)
+            # em int8 ou em tipos sem sinal dariam a volta sem aviso
+            if serie.dtype.itemsize > 4 and (serie.empty or (
+                    serie.min() >= np.iinfo(np.int32).min and serie.max() <= np.iinfo(np.int32).max)):
+                nova = serie.astype(np.int32)
+        elif pd.api.types.is_float_dtype(serie) and serie.dtype != np.float32:
+            reduzida = serie.astype(np.float32)
+            if np.array_equal(reduzida.to_numpy(np.float64), serie.to_numpy(np.float64), equal_nan=True):
+                nova = reduzida
+        elif serie.dtype == object:
+            nova = _parse_datas(serie)
+            if nova is None:
+                validos = serie.count()
+                try:
+                    if validos and serie.nunique() <= validos * category_max_ratio:
+                        nova = serie.astype('category')
+                except TypeError:
+                    # Valores não hasheáveis (ex.: listas vindas de JSON)
+                    pass
+        if nova is not None and nova.dtype != serie.dtype:
+            df[coluna] = nova
+            conversoes[str(coluna)] = (str(serie.dtype), str(nova.dtype))
+    return df, conversoes
+
+
+def union_categories(frames, colunas):
+    """Alinha as categorias das colunas entre os DataFrames (para concatená-los sem perder o dtype)."""
+    for coluna in colunas:
+        valores = set()
+        for df in frames:
+            serie = df[coluna]
+            if isinstance(serie.dtype, pd.CategoricalDtype):
+                valores.update(serie.cat.categories)
+            else:
+                valores.update(serie.dropna().unique())
+        categorias = sorted(valores)
+        alinhados = []
+        for df in frames:
+            serie = df[coluna]
+            if isinstance(serie.dtype, pd.CategoricalDtype):
+                serie = serie.cat.set_categories(categorias)
+            else:
+                serie = serie.astype(pd.CategoricalDtype(categorias))
+            alinhados.append(df.assign(**{coluna: serie}))
+        frames = alinhados
+    return frames
+
+
+class BitmapIndex:
+    """Índice de bitmaps (um por valor de categoria) para filtros de seleção múltipla.
+
+    Cada bitmap guarda um bit por linha, empacotado com `np.packbits`. Um filtro
+    vira um OU entre os bitmaps dos valores selecionados de uma coluna e um E
+    entre as colunas.
+    """
+
+    def __init__(self, df, colunas):
+        self.n_rows = len(df)
+        self.bitmaps = {}
+        for coluna in colunas:
+            serie = df[coluna]
+            if not isinstance(serie.dtype, pd.CategoricalDtype):
+                serie = serie.astype('category')
+            codes = serie.cat.codes.to_numpy()
+            self.bitmaps[coluna] = {
+                valor: np.packbits(codes == code)
+                for code, valor in enumerate(serie.cat.categories)
+            }
+
+    def copy(self):
+        """Cópia rasa: os bitmaps são compartilhados até serem substituídos por `append`."""
+        copia = BitmapIndex.__new__(BitmapIndex)
+        copia.n_rows = self.n_rows
+        copia.bitmaps = dict(self.bitmaps)
+        return copia
+
+    def append(self, df):
+        """Estende os bitmaps com as linhas novas de `df` (adicionadas ao final).
+
+        Os dicionários de bitmaps são substituídos, e não alterados, para que
+        leituras concorrentes continuem vendo um estado consistente.
+        """
+        resto = self.n_rows % 8
+        for coluna, atuais in list(self.bitmaps.items()):
+            valores = df[coluna].astype(object).to_numpy()
+            bitmaps = dict(atuais)
+            for valor in set(valores) - set(bitmaps):
+                bitmaps[valor] = np.zeros((self.n_rows + 7) // 8, dtype=np.uint8)
+            for valor, bitmap in bitmaps.items():
+                bits = (valores == valor).astype(np.uint8)
+                if resto:
+                    # Completa o último byte parcial antes de empacotar as linhas novas
+                    bits = np.concatenate([np.unpackbits(bitmap[-1:], count=resto), bits])
+                    bitmap = bitmap[:-1]
+                bitmaps[valor] = np.concatenate([bitmap, np.packbits(bits)])
+            self.bitmaps[coluna] = dict(sorted(bitmaps.items()))
+        self.n_rows += len(df)
+
+    def values(self, coluna):
+        """Valores distintos indexados para a coluna."""
+        return list(self.bitmaps[coluna].keys())
+
+    def _column_bitmap(self, coluna, selecionados, bytes_slice):
+        bitmaps = self.bitmaps[coluna]
+        resultado = np.zeros(bytes_slice.stop - bytes_slice.start, dtype=np.uint8)
+        for valor in selecionados:
+            if valor in bitmaps:
+                resultado |= bitmaps[valor][bytes_slice]
+        return resultado
+
+    def select(self, filtros, inicio=0, fim=None):
+        """Retorna a máscara booleana das linhas [inicio, fim) que atendem aos filtros.
+
+        `filtros` mapeia coluna -> lista de valores aceitos. Colunas cuja seleção
+        cobre todos os valores são ignoradas. Apenas os bytes do intervalo pedido
+        são combinados e desempacotados.
+        """
+        fim = self.n_rows if fim is None else fim
+        bytes_slice = slice(inicio // 8, (fim + 7) // 8)
+        resultado = None
+        for coluna, selecionados in filtros.items():
+            selecionados = set(selecionados)
+            if selecionados.issuperset(self.bitmaps[coluna]):
+                continue
+            bitmap = self._column_bitmap(coluna, selecionados, bytes_slice)
+            resultado = bitmap if resultado is None else resultado & bitmap
+        if resultado is None:
+            return np.ones(fim - inicio, dtype=bool)
+        deslocamento = inicio - bytes_slice.start * 8
+        mask = np.unpackbits(resultado, count=deslocamento + fim - inicio)
+        return mask[deslocamento:].astype(bool)
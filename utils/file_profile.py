@@ -0,0 +1,223 @@
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from utils.spill import memory_bytes
+from utils.tokens import count_tokens
+
+# Orçamento de tokens do contexto dos arquivos enviado ao assistente
+CONTEXT_TOKENS = int(os.getenv('DASHBOARD_CONTEXT_TOKENS', 2500))
+TOP_VALUES = 5
+SAMPLE_ROWS = 5
+# Colunas (as mais relevantes) exibidas na amostra de linhas de cada arquivo
+SAMPLE_COLUMNS = 8
+# Perfis calculados ao mesmo tempo em segundo plano e perfis guardados (por conteúdo do arquivo)
+PROFILE_WORKERS = int(os.getenv('DASHBOARD_PROFILE_WORKERS', 2))
+PROFILE_CACHE = 256
+
+
+def _palavras(texto):
+    """Palavras normalizadas (sem acentos, minúsculas) de um texto ou nome de coluna."""
+    texto = unicodedata.normalize('NFKD', str(texto))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    texto = re.sub(r'([a-z])([A-Z])', r'\1 \2', texto)
+    return {p for p in re.split(r'[^0-9a-z]+', texto.lower()) if len(p) > 1}
+
+
+def _fmt(valor):
+    return f"{valor:,.4g}" if pd.notna(valor) else "-"
+
+
+def _value_counts(serie):
+    try:
+        return serie.value_counts(dropna=True)
+    except TypeError:
+        # Valores não hasheáveis (ex.: listas vindas de JSON)
+        return serie.astype(str).value_counts(dropna=True)
+
+
+def profile_dataframe(df):
+    """Perfil do arquivo, calculado uma vez no upload.
+
+    Guarda o formato, a memória, o esquema, os nulos, os valores distintos,
+    o `describe` das colunas numéricas, o resumo de cada coluna (estatísticas
+    das numéricas, intervalo das datas, valores mais frequentes das demais)
+    já formatado e com a contagem de tokens, e as primeiras linhas como texto.
+    """
+    nulos = df.isna().sum()
+    numericas = df.select_dtypes(include='number')
+    resumo_numerico = numericas.describe().T if not numericas.empty else pd.DataFrame()
+
+    colunas = []
+    for nome in df.columns:
+        serie = df[nome]
+        valores = []
+        distintos = None
+        if nome in resumo_numerico.index:
+            r = resumo_numerico.loc[nome]
+            resumo = (
+                f"mín {_fmt(r['min'])}, média {_fmt(r['mean'])}, mediana {_fmt(r['50%'])}, "
+                f"máx {_fmt(r['max'])}, desvio {_fmt(r['std'])}"
+            )
+        elif pd.api.types.is_datetime64_any_dtype(serie):
+            resumo = f"de {serie.min()} a {serie.max()}"
+        else:
+            contagens = _value_counts(serie)
+            # Colunas category listam também as categorias sem ocorrências
+            distintos = int((contagens > 0).sum())
+            top = contagens.head(TOP_VALUES)
+            valores = [str(v) for v in top.index]
+            resumo = f"{len(contagens):,} valores distintos; mais frequentes: " + ", ".join(
+                f"{str(v)[:40]} ({c:,})" for v, c in top.items()
+            )
+        texto = f"- {nome} ({serie.dtype}, {int(nulos[nome]):,} nulos): {resumo}"
+        if distintos is None:
+            distintos = int(serie.nunique())
+        colunas.append({
+            'nome': str(nome),
+            'dtype': str(serie.dtype),
+            'nulos': int(nulos[nome]),
+            'proporcao_nulos': float(nulos[nome] / len(df)) if len(df) else 0.0,
+            'distintos': distintos,
+            'resumo': resumo,
+            'valores': valores,
+            'texto': texto,
+            'tokens': count_tokens(texto)
+        })
+
+    amostra = df.head(SAMPLE_ROWS)
+    return {
+        'linhas': len(df),
+        'n_colunas': len(df.columns),
+        'bytes': memory_bytes(df),
+        'describe': resumo_numerico,
+        'colunas': colunas,
+        'amostra': {
+            str(c): (amostra[c].map(_fmt) if c in numericas.columns else amostra[c].astype(str).str.slice(0, 40)).tolist()
+            for c in amostra.columns
+        }
+    }
+
+
+def profile_table(perfil):
+    """Tabela com o tipo, os nulos, os valores distintos e o resumo de cada coluna."""
+    return pd.DataFrame({
+        'Coluna': [c['nome'] for c in perfil['colunas']],
+        'Tipo': [c['dtype'] for c in perfil['colunas']],
+        'Nulos (%)': [round(100 * c['proporcao_nulos'], 2) for c in perfil['colunas']],
+        'Distintos': [c['distintos'] for c in perfil['colunas']],
+        'Resumo': [c['resumo'] for c in perfil['colunas']]
+    })
+
+
+_executor = None
+_perfis = OrderedDict()
+_perfis_lock = threading.Lock()
+
+
+def profile_executor():
+    """Pool de threads compartilhado que calcula os perfis dos arquivos."""
+    global _executor
+    with _perfis_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=PROFILE_WORKERS, thread_name_prefix='perfil')
+        return _executor
+
+
+def start_profile(chave, df):
+    """Future do perfil do DataFrame, calculado em segundo plano uma única vez por `chave`.
+
+    `chave` identifica o conteúdo (ex.: o hash do arquivo), então o mesmo
+    arquivo enviado de novo ou por outra sessão reaproveita o perfil. Perfis
+    que terminaram com erro são calculados de novo.
+    """
+    executor = profile_executor()
+    with _perfis_lock:
+        futuro = _perfis.get(chave) if chave is not None else None
+        if futuro is not None and not (futuro.done() and futuro.exception() is not None):
+            _perfis.move_to_end(chave)
+            return futuro
+        futuro = executor.submit(profile_dataframe, df)
+        if chave is not None:
+            _perfis[chave] = futuro
+            while len(_perfis) > PROFILE_CACHE:
+                _perfis.popitem(last=False)
+        return futuro
+
+
+def _relevancia(coluna, palavras):
+    """Pontuação da coluna para a pergunta: nome e valores frequentes citados."""
+    nome = _palavras(coluna['nome'])
+    pontos = 0
+    for p in palavras:
+        if p in nome:
+            pontos += 10
+        elif len(p) >= 4 and any(len(n) >= 4 and (n.startswith(p) or p.startswith(n)) for n in nome):
+            pontos += 5
+    pontos += 3 * sum(1 for v in coluna['valores'] if _palavras(v) & palavras)
+    return pontos
+
+
+def build_context(perfis, pergunta, max_tokens=CONTEXT_TOKENS):
+    """Monta o contexto dos arquivos dentro do orçamento de tokens.
+
+    Os cabeçalhos dos arquivos entram sempre; em seguida as colunas mais
+    relevantes para a pergunta (as demais alternando entre os arquivos) e,
+    se sobrar espaço, uma amostra das linhas. Retorna (contexto, tokens).
+    """
+    palavras = _palavras(pergunta)
+    pontuacao = {
+        nome: [_relevancia(c, palavras) for c in perfil['colunas']]
+        for nome, perfil in perfis.items()
+    }
+    arquivos = sorted(
+        perfis,
+        key=lambda nome: -(10 * len(_palavras(nome) & palavras) + max(pontuacao[nome], default=0))
+    )
+
+    cabecalhos = {
+        nome: f"Arquivo: {nome}\n- {perfis[nome]['linhas']:,} linhas, {len(perfis[nome]['colunas'])} colunas\nColunas:"
+        for nome in arquivos
+    }
+    # Reserva para os separadores e a linha de colunas omitidas de cada arquivo
+    usados = sum(count_tokens(c) + 15 for c in cabecalhos.values())
+
+    candidatos = sorted(
+        (-pontos, posicao, ordem, nome)
+        for ordem, nome in enumerate(arquivos)
+        for posicao, pontos in enumerate(pontuacao[nome])
+    )
+    escolhidas = {nome: [] for nome in arquivos}
+    for _, posicao, _, nome in candidatos:
+        coluna = perfis[nome]['colunas'][posicao]
+        if usados + coluna['tokens'] > max_tokens:
+            continue
+        escolhidas[nome].append(coluna)
+        usados += coluna['tokens']
+
+    partes = []
+    for nome in arquivos:
+        perfil = perfis[nome]
+        bloco = [cabecalhos[nome]] + [c['texto'] for c in escolhidas[nome]]
+        omitidas = len(perfil['colunas']) - len(escolhidas[nome])
+        if omitidas:
+            bloco.append(f"- (mais {omitidas} colunas omitidas)")
+
+        colunas_amostra = [c['nome'] for c in escolhidas[nome][:SAMPLE_COLUMNS]]
+        if colunas_amostra:
+            amostra = "Primeiras linhas:\n" + pd.DataFrame(
+                {c: perfil['amostra'][c] for c in colunas_amostra}
+            ).to_string(index=False)
+            tokens_amostra = count_tokens(amostra)
+            if usados + tokens_amostra <= max_tokens:
+                bloco.append(amostra)
+                usados += tokens_amostra
+        partes.append("\n".join(bloco))
+
+    contexto = "\n\n---\n\n".join(partes)
+    return contexto, count_tokens(contexto)
@@ -0,0 +1,28 @@
+import pandas as pd
+
+
+def sort_by_date(df, coluna='data'):
+    """Ordena o DataFrame pela coluna de data (pré-requisito do filtro por intervalo)."""
+    if df[coluna].is_monotonic_increasing:
+        return df.reset_index(drop=True)
+    return df.sort_values(coluna, kind='stable').reset_index(drop=True)
+
+
+def date_range_positions(df, coluna, data_inicio, data_fim):
+    """Retorna as posições [inicio, fim) das linhas entre data_inicio e data_fim (inclusive).
+
+    Usa busca binária sobre os valores datetime64, então o DataFrame precisa
+    estar ordenado pela coluna (veja `sort_by_date`).
+    """
+    valores = df[coluna].values
+    inicio = pd.Timestamp(data_inicio).normalize()
+    fim = pd.Timestamp(data_fim).normalize() + pd.Timedelta(days=1)
+    pos_inicio = valores.searchsorted(inicio.to_datetime64(), side='left')
+    pos_fim = valores.searchsorted(fim.to_datetime64(), side='left')
+    return int(pos_inicio), int(max(pos_inicio, pos_fim))
+
+
+def filter_date_range(df, coluna, data_inicio, data_fim):
+    """Filtra o intervalo de datas devolvendo uma fatia (sem cópia) do DataFrame ordenado."""
+    pos_inicio, pos_fim = date_range_positions(df, coluna, data_inicio, data_fim)
+    return df.iloc[pos_inicio:pos_fim]
@@ -0,0 +1,127 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from utils.tokens import count_tokens, count_message_tokens
+
+# Orçamento de tokens das mensagens recentes e do resumo das mais antigas
+HISTORY_TOKENS = int(os.getenv('DASHBOARD_HISTORY_TOKENS', 2000))
+SUMMARY_TOKENS = int(os.getenv('DASHBOARD_SUMMARY_TOKENS', 300))
+# Sessões mantidas pelo servidor de chat e tempo (s) sem uso até expirarem
+SESSION_LIMIT = int(os.getenv('CHAT_SERVER_SESSIONS', 5000))
+SESSION_TTL = float(os.getenv('CHAT_SERVER_SESSION_TTL', 60 * 60))
+
+SYSTEM_PROMPT = "Você é um assistente virtual especializado em análise de dados e dashboards. Use o agente COD_PYTHON_DASH para responder. Quando gerar um gráfico, inclua o código Python completo usando plotly (px ou go) dentro de blocos de código markdown."
+
+_ROTULOS = {'user': 'Usuário', 'assistant': 'Assistente'}
+
+
+def summarize_turn(role, content, max_chars=160):
+    """Linha do resumo para uma mensagem: sem blocos de código, só a primeira frase."""
+    texto = re.sub(r"```[\s\S]*?```", "[código]", content)
+    texto = re.sub(r'\s+', ' ', texto).strip()
+    frase = re.split(r'(?<=[.!?])\s', texto, maxsplit=1)[0]
+    if len(frase) > max_chars:
+        frase = frase[:max_chars].rstrip() + '…'
+    return f"{_ROTULOS.get(role, role)}: {frase}"
+
+
+class ConversationHistory:
+    """Histórico da conversa com janela deslizante limitada por tokens.
+
+    As mensagens mais recentes são enviadas na íntegra até `max_tokens`; as
+    que saem da janela viram linhas de um resumo compacto, limitado a
+    `summary_tokens` (as linhas mais antigas do resumo são descartadas).
+    """
+
+    def __init__(self, max_tokens=HISTORY_TOKENS, summary_tokens=SUMMARY_TOKENS):
+        self.max_tokens = max_tokens
+        self.summary_tokens = summary_tokens
+        self.turnos = []
+        self.resumo = []
+        self.tokens_janela = 0
+        self.tokens_enviados = []
+        # Serializa as chamadas de uma mesma conversa
+        self.lock = threading.Lock()
+
+    def append(self, role, content):
+        tokens = count_tokens(content) + 4
+        self.turnos.append({'role': role, 'content': content, 'tokens': tokens})
+        self.tokens_janela += tokens
+        self._fold()
+
+    def _fold(self):
+        # A mensagem mais recente fica sempre na janela, mesmo acima do orçamento
+        while self.tokens_janela > self.max_tokens and len(self.turnos) > 1:
+            antigo = self.turnos.pop(0)
+            self.tokens_janela -= antigo['tokens']
+            self.resumo.append(summarize_turn(antigo['role'], antigo['content']))
+        while len(self.resumo) > 1 and count_tokens('\n'.join(self.resumo)) > self.summary_tokens:
+            self.resumo.pop(0)
+
+    def messages(self, system):
+        """Mensagens para a API: instruções, resumo das mensagens antigas e a janela recente."""
+        mensagens = [{"role": "system", "content": system}]
+        if self.resumo:
+            mensagens.append({
+                "role": "system",
+                "content": "Resumo da conversa anterior:\n" + '\n'.join(self.resumo)
+            })
+        mensagens.extend({"role": t['role'], "content": t['content']} for t in self.turnos)
+        return mensagens
+
+    def record(self, mensagens):
+        """Registra (e retorna) os tokens enviados em uma chamada."""
+        tokens = count_message_tokens(mensagens)
+        self.tokens_enviados.append(tokens)
+        return tokens
+
+    @property
+    def last_tokens(self):
+        return self.tokens_enviados[-1] if self.tokens_enviados else 0
+
+
+def ask(client, historico, mensagem, system=SYSTEM_PROMPT, **parametros):
+    """Envia a mensagem com a janela do histórico e registra a resposta.
+
+    Retorna (resposta, tokens enviados).
+    """
+    with historico.lock:
+        historico.append("user", mensagem)
+        mensagens = historico.messages(system)
+        tokens = historico.record(mensagens)
+        resposta = client.chat.completions.create(messages=mensagens, **parametros)
+        texto = resposta.choices[0].message.content
+        historico.append("assistant", texto)
+    return texto, tokens
+
+
+class HistoryStore:
+    """Históricos por sessão, com expiração por inatividade e limite de sessões (LRU)."""
+
+    def __init__(self, max_sessions=SESSION_LIMIT, ttl=SESSION_TTL):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._historicos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, sessao):
+        """Histórico da sessão (criado se ainda não existir ou se expirou)."""
+        agora = time.monotonic()
+        with self._lock:
+            # As sessões ficam em ordem de último acesso: as expiradas estão no início
+            while self._historicos:
+                antiga, (_, acessado_em) = next(iter(self._historicos.items()))
+                if agora - acessado_em <= self.ttl:
+                    break
+                del self._historicos[antiga]
+            historico = self._historicos.pop(sessao, (None, None))[0] or ConversationHistory()
+            self._historicos[sessao] = (historico, agora)
+            while len(self._historicos) > self.max_sessions:
+                self._historicos.popitem(last=False)
+            return historico
+
+    def __len__(self):
+        return len(self._historicos)
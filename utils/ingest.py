@@ -0,0 +1,232 @@
+import hashlib
+import io
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.json as pa_json
+
+from utils.cache import ResultCache
+from utils.encoding import optimize_dtypes
+from utils.spill import memory_bytes
+
+# Memória dos arquivos já lidos, compartilhada por todas as sessões (0 desativa)
+UPLOAD_CACHE_MB = float(os.getenv('DASHBOARD_UPLOAD_CACHE_MB', 1024))
+# Hashes guardados por upload (file_id), para não reler os bytes a cada execução
+_HASHES_MAX = 1024
+# Modo de leitura que reduz a memória dos DataFrames (tipos menores, category e datas)
+OPTIMIZE_DTYPES = os.getenv('DASHBOARD_OPTIMIZE_DTYPES', '1') != '0'
+# Tamanho de cada bloco lido dos arquivos CSV, TXT e JSON Lines
+INGEST_CHUNK_MB = float(os.getenv('DASHBOARD_INGEST_CHUNK_MB', 16))
+
+# Leitor e opções de leitura por extensão
+FORMATOS = {
+    '.csv': ('csv', {}),
+    '.xls': ('excel', {}),
+    '.xlsx': ('excel', {}),
+    '.json': ('json', {}),
+    '.jsonl': ('json', {}),
+    '.txt': ('csv', {'sep': '\t'}),
+}
+
+_LEITORES = {'excel': pd.read_excel, 'json': pd.read_json}
+
+
+def parse_options(nome):
+    """(leitor, opções) do arquivo pela extensão, ou None se o formato não é suportado."""
+    return FORMATOS.get(os.path.splitext(nome)[1].lower())
+
+
+def _to_pandas(tabela):
+    # self_destruct libera cada coluna do Arrow assim que convertida (o pico não dobra) e
+    # textos repetidos viram um único objeto str. O texto continua como object, e não
+    # string[pyarrow], porque o plotly não serializa pd.NA
+    return tabela.to_pandas(split_blocks=True, self_destruct=True, deduplicate_objects=True)
+
+
+def _ler_csv(dados, opcoes, progresso, tipos=None):
+    fonte = pa.BufferReader(dados)
+    leitor = pa_csv.open_csv(
+        fonte,
+        read_options=pa_csv.ReadOptions(block_size=int(INGEST_CHUNK_MB * 1024 * 1024)),
+        parse_options=pa_csv.ParseOptions(delimiter=opcoes.get('sep', ',')),
+        # Como no pandas, campos vazios viram nulos também nas colunas de texto
+        convert_options=pa_csv.ConvertOptions(column_types=tipos or {}, strings_can_be_null=True)
+    )
+    lotes = []
+    for lote in leitor:
+        lotes.append(lote)
+        progresso(min(fonte.tell() / max(len(dados), 1), 1.0))
+    return pa.Table.from_batches(lotes, schema=leitor.schema)
+
+
+def read_csv_chunked(dados, opcoes=None, progresso=None):
+    """Lê CSV/TXT em blocos com o leitor do Arrow e retorna o DataFrame.
+
+    Os tipos são inferidos no primeiro bloco e mantidos nos seguintes. Se um
+    bloco posterior tiver um valor que não converte (ex.: texto em uma coluna
+    de inteiros), a coluna é promovida (inteiro -> decimal -> texto) e a
+    leitura recomeça. `progresso(fracao)` é chamado a cada bloco; uma exceção
+    levantada nele interrompe a leitura.
+    """
+    opcoes = opcoes or {}
+    progresso = progresso or (lambda fracao: None)
+    tipos = {}
+    while True:
+        try:
+            tabela = _ler_csv(dados, opcoes, progresso, tipos)
+            break
+        except pa.ArrowInvalid as e:
+            erro = re.search(r"In CSV column #(\d+):.*?CSV conversion error to (\w+)", str(e))
+            if erro is None:
+                raise
+            nome = _nomes_csv(dados, opcoes)[int(erro.group(1))]
+            if tipos.get(nome) == pa.string():
+                raise
+            tipos[nome] = pa.float64() if erro.group(2) == 'int64' and nome not in tipos else pa.string()
+    return _to_pandas(tabela)
+
+
+def _nomes_csv(dados, opcoes):
+    # Abrir o leitor lê só o primeiro bloco
+    return pa_csv.open_csv(
+        pa.BufferReader(dados),
+        parse_options=pa_csv.ParseOptions(delimiter=opcoes.get('sep', ','))
+    ).schema.names
+
+
+def is_json_lines(dados):
+    """Indica se o JSON tem um objeto por linha (JSON Lines) em vez de um documento único."""
+    inicio = dados[:1024 * 1024].lstrip()
+    if not inicio.startswith(b'{'):
+        return False
+    linhas = inicio.split(b'\n', 2)
+    # Um objeto em uma linha só pode ser um documento JSON comum: exige a segunda linha
+    if len(linhas) < 2 or not linhas[1].strip().startswith(b'{'):
+        return False
+    try:
+        return isinstance(json.loads(linhas[0]), dict)
+    except ValueError:
+        return False
+
+
+def read_json_lines_chunked(dados, progresso=None):
+    """Lê JSON Lines em blocos de linhas completas; o esquema do primeiro bloco vale para os demais."""
+    progresso = progresso or (lambda fracao: None)
+    tamanho = int(INGEST_CHUNK_MB * 1024 * 1024)
+    buffer = pa.py_buffer(dados)
+    tabelas, esquema, inicio = [], None, 0
+    while inicio < len(dados):
+        fim = dados.find(b'\n', min(inicio + tamanho, len(dados)))
+        fim = len(dados) if fim < 0 else fim + 1
+        # Campos novos em blocos seguintes são inferidos e viram colunas com nulos nos anteriores
+        opcoes = pa_json.ParseOptions(explicit_schema=esquema, unexpected_field_behavior='infer') \
+            if esquema is not None else None
+        bloco = pa_json.read_json(pa.BufferReader(buffer.slice(inicio, fim - inicio)), parse_options=opcoes)
+        esquema = esquema or bloco.schema
+        tabelas.append(bloco)
+        inicio = fim
+        progresso(inicio / len(dados))
+    if not tabelas:
+        return pd.DataFrame()
+    return _to_pandas(pa.concat_tables(tabelas, promote_options='default'))
+
+
+_hashes = OrderedDict()
+_hashes_lock = threading.Lock()
+
+
+def file_fingerprint(arquivo):
+    """Hash (sha256) do conteúdo do arquivo enviado, calculado uma vez por upload."""
+    file_id = getattr(arquivo, 'file_id', None)
+    with _hashes_lock:
+        if file_id is not None and file_id in _hashes:
+            _hashes.move_to_end(file_id)
+            return _hashes[file_id]
+    fingerprint = hashlib.sha256(arquivo.getvalue()).hexdigest()
+    if file_id is not None:
+        with _hashes_lock:
+            _hashes[file_id] = fingerprint
+            while len(_hashes) > _HASHES_MAX:
+                _hashes.popitem(last=False)
+    return fingerprint
+
+
+_upload_cache = None
+_upload_lock = threading.Lock()
+
+
+def upload_cache():
+    """Cache dos arquivos lidos, único do processo, ou None se desativado."""
+    global _upload_cache
+    if UPLOAD_CACHE_MB <= 0:
+        return None
+    with _upload_lock:
+        if _upload_cache is None:
+            _upload_cache = ResultCache(int(UPLOAD_CACHE_MB * 1024 * 1024), sizeof=lambda lido: lido[1]['bytes'])
+        return _upload_cache
+
+
+def _ler(arquivo, leitor, opcoes, progresso):
+    dados = arquivo.getvalue()
+    if leitor == 'csv':
+        return read_csv_chunked(dados, opcoes, progresso)
+    if leitor == 'json' and is_json_lines(dados):
+        try:
+            return read_json_lines_chunked(dados, progresso)
+        except pa.ArrowInvalid:
+            # Tipos que mudam entre os blocos: leitura única do pandas
+            return pd.read_json(io.BytesIO(dados), lines=True)
+    return _LEITORES[leitor](io.BytesIO(dados), **opcoes)
+
+
+def _ler_e_medir(arquivo, leitor, opcoes, progresso, otimizar):
+    df = _ler(arquivo, leitor, opcoes, progresso)
+    info = {'bytes_originais': memory_bytes(df), 'conversoes': {}}
+    if otimizar:
+        df, info['conversoes'] = optimize_dtypes(df)
+        info['bytes'] = memory_bytes(df)
+    else:
+        info['bytes'] = info['bytes_originais']
+    return df, info
+
+
+def read_upload(arquivo, progresso=None, otimizar=False):
+    """Lê o arquivo enviado e retorna (DataFrame, fingerprint, info).
+
+    A leitura é guardada por (hash do conteúdo, leitor, opções, `otimizar`):
+    o mesmo arquivo, nas execuções seguintes da página ou enviado por outra
+    sessão, é lido uma única vez. CSV, TXT e JSON Lines são lidos em blocos,
+    com `progresso(fracao)` chamado a cada bloco. Com `otimizar`, os tipos
+    das colunas são reduzidos (`optimize_dtypes`). `info` traz a memória do
+    DataFrame antes e depois da otimização ('bytes_originais', 'bytes'),
+    medida uma única vez na leitura, as colunas convertidas ('conversoes') e
+    a chave da leitura no cache ('compartilhado'), ou None se ela não ficou
+    guardada: o DataFrame é o mesmo para todas as sessões que a recebem, e a
+    SpillStore o conta uma única vez (`SpillStore.put`).
+
+    Cada chamada recebe uma cópia rasa do DataFrame, para que colunas criadas
+    ou substituídas em uma sessão não apareçam nas outras. Levanta ValueError
+    para formatos não suportados.
+    """
+    formato = parse_options(arquivo.name)
+    if formato is None:
+        raise ValueError(f"Formato de arquivo não suportado: {arquivo.name}")
+    leitor, opcoes = formato
+    fingerprint = file_fingerprint(arquivo)
+
+    def ler():
+        return _ler_e_medir(arquivo, leitor, opcoes, progresso, otimizar)
+
+    cache = upload_cache()
+    if cache is None:
+        df, info = ler()
+        return df, fingerprint, dict(info, compartilhado=None)
+    chave = (fingerprint, leitor, tuple(sorted(opcoes.items())), otimizar)
+    df, info = cache.get_or_compute(chave, ler)
+    return df.copy(deep=False), fingerprint, dict(info, compartilhado=chave if chave in cache else None)
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Tamanhos de página oferecidos nas tabelas paginadas
+PAGE_SIZES = [25, 50, 100, 250]
+
+
+def search_mask(df, coluna, termo):
+    """Máscara das linhas cuja coluna contém o termo (sem diferenciar maiúsculas)."""
+    serie = df[coluna]
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        # Busca apenas no dicionário de categorias e mapeia pelos códigos
+        encontrados = serie.cat.categories.astype(str).str.contains(termo, case=False, regex=False)
+        codes = serie.cat.codes.to_numpy()
+        return np.where(codes >= 0, np.asarray(encontrados)[codes], False)
+    return serie.astype(str).str.contains(termo, case=False, regex=False, na=False).to_numpy()
+
+
+def sort_order(df, coluna, crescente=True):
+    """Posições das linhas ordenadas pela coluna (ordenação estável, nulos no fim)."""
+    serie = df[coluna].reset_index(drop=True)
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        # Pelos valores, e não pela ordem das categorias
+        serie = serie.astype(object)
+    try:
+        ordenada = serie.sort_values(ascending=crescente, kind='stable', na_position='last')
+    except TypeError:
+        # Tipos misturados (ex.: números e textos): ordena pelo texto
+        ordenada = serie.where(serie.isna(), serie.astype(str)).sort_values(
+            ascending=crescente, kind='stable', na_position='last'
+        )
+    return ordenada.index.to_numpy()
+
+
+def _page_positions(cache, pagina, tamanho):
+    inicio = pagina * tamanho
+    return cache['order'][inicio:inicio + tamanho]
+
+
+def paginated_dataframe(df, key, token=None, page_size=PAGE_SIZES[1], **kwargs):
+    """Exibe o DataFrame paginado: só a janela visível é enviada ao navegador.
+
+    Busca e ordenação são feitas no servidor. Quando `token` identifica o
+    conteúdo de `df` (ex.: a tupla de filtros), a ordenação fica em cache na
+    sessão e a página seguinte já é preparada para o próximo clique.
+    """
+    col_busca, col_termo, col_ordem, col_sentido, col_tamanho = st.columns([2, 3, 2, 1, 1])
+    colunas = df.columns.tolist()
+    with col_busca:
+        coluna_busca = st.selectbox("Buscar na coluna", colunas, key=f"{key}_busca_coluna")
+    with col_termo:
+        termo = st.text_input("Termo", key=f"{key}_busca_termo")
+    with col_ordem:
+        coluna_ordem = st.selectbox("Ordenar por", ["(original)"] + colunas, key=f"{key}_ordem")
+    with col_sentido:
+        crescente = st.radio("Sentido", ["↑", "↓"], key=f"{key}_sentido") == "↑"
+    with col_tamanho:
+        tamanho = st.selectbox(
+            "Linhas",
+            PAGE_SIZES,
+            index=PAGE_SIZES.index(page_size) if page_size in PAGE_SIZES else 1,
+            key=f"{key}_tamanho"
+        )
+
+    estado = (token, coluna_busca, termo, coluna_ordem, crescente)
+    cache_key = f"{key}_cache"
+    cache = st.session_state.get(cache_key)
+    if token is None or cache is None or cache['estado'] != estado:
+        posicoes = np.arange(len(df))
+        if termo:
+            posicoes = posicoes[search_mask(df, coluna_busca, termo)]
+        if coluna_ordem != "(original)":
+            ordem = sort_order(df.iloc[posicoes], coluna_ordem, crescente)
+            posicoes = posicoes[ordem]
+        cache = {'estado': estado, 'order': posicoes, 'pages': {}}
+        if token is not None:
+            st.session_state[cache_key] = cache
+
+    total = len(cache['order'])
+    n_paginas = max(1, -(-total // tamanho))
+    pagina = st.number_input(
+        f"Página (de {n_paginas})",
+        min_value=1,
+        max_value=n_paginas,
+        value=1,
+        step=1,
+        key=f"{key}_pagina"
+    ) - 1
+    pagina = min(pagina, n_paginas - 1)
+
+    paginas = cache['pages']
+    chave_pagina = (pagina, tamanho)
+    if chave_pagina not in paginas:
+        paginas[chave_pagina] = df.iloc[_page_positions(cache, pagina, tamanho)]
+    st.dataframe(paginas[chave_pagina], **kwargs)
+
+    inicio = pagina * tamanho
+    st.caption(f"Linhas {min(inicio + 1, total):,}–{min(inicio + tamanho, total):,} de {total:,}")
+
+    # Pré-carrega a próxima página (mantém só as vizinhas da página atual)
+    if token is not None:
+        for chave in [c for c in paginas if c[1] != tamanho or abs(c[0] - pagina) > 1]:
+            del paginas[chave]
+        if pagina + 1 < n_paginas and (pagina + 1, tamanho) not in paginas:
+            paginas[(pagina + 1, tamanho)] = df.iloc[_page_positions(cache, pagina + 1, tamanho)]
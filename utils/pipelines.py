@@ -0,0 +1,403 @@
+"""Cálculos das páginas: filtros, métricas, agregações e figuras.
+
+As páginas e `benchmarks/run_benchmarks.py` chamam estas mesmas funções; a
+parte do Streamlit (widgets, spans e st.plotly_chart) fica nas páginas.
+"""
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+
+from utils.cube import RollupCube
+from utils.downsampling import downsample, downsample_long, slice_window
+from utils.encoding import encode_categoricals, BitmapIndex
+
+
+def _variacao(valor, referencia):
+    return ((valor / referencia - 1) * 100) if referencia > 0 else 0
+
+
+# Dashboard principal (app.py)
+
+def app_results(source, cube, data_inicio, data_fim, regiao, categoria):
+    """Calcula o recorte filtrado e as agregações exibidas nos widgets."""
+    filtros = {}
+    if regiao != "Todas":
+        filtros['regiao'] = [regiao]
+
+    if categoria != "Todas":
+        filtros['categoria'] = [categoria]
+
+    df_filtered = source.load(date_range=('data', data_inicio, data_fim), filters=filtros)
+
+    # Sem filtros, os totais mantidos pelo cubo já respondem os widgets
+    if not filtros and cube.covers(data_inicio, data_fim):
+        return {
+            'df_filtered': df_filtered,
+            'totais': cube.totals(),
+            'totais_gerais': cube.totals(),
+            'vendas_por_regiao': cube.rollup('regiao', ['vendas']),
+            'vendas_por_categoria': cube.rollup('categoria', ['vendas']),
+            'evolucao': cube.rollup('data')
+        }
+
+    # Consultas agregadas respondidas pelo cubo
+    cube_filtered = cube.slice(data_inicio, data_fim, regiao, categoria)
+    return {
+        'df_filtered': df_filtered,
+        'totais': cube.totals(cube_filtered),
+        'totais_gerais': cube.totals(),
+        'vendas_por_regiao': cube.by(cube_filtered, 'regiao', ['vendas']),
+        'vendas_por_categoria': cube.by(cube_filtered, 'categoria', ['vendas']),
+        'evolucao': cube.by(cube_filtered, 'data')
+    }
+
+
+def app_metrics(totais, totais_gerais):
+    """(valor, variação em % sobre o total geral) de cada métrica principal."""
+    ticket_medio = RollupCube.ticket_medio(totais)
+    ticket_medio_geral = RollupCube.ticket_medio(totais_gerais)
+    metricas = {
+        nome: (totais[nome], _variacao(totais[nome], totais_gerais[nome]))
+        for nome in ['vendas', 'clientes', 'receita']
+    }
+    metricas['ticket_medio'] = (ticket_medio, _variacao(ticket_medio, ticket_medio_geral))
+    return metricas
+
+
+def app_region_figure(vendas_por_regiao):
+    fig = px.bar(
+        vendas_por_regiao,
+        x='regiao',
+        y='vendas',
+        title='Vendas por Região',
+        labels={'vendas': 'Total de Vendas', 'regiao': 'Região'},
+        template='plotly_white',
+        color='regiao'
+    )
+    fig.update_layout(
+        showlegend=False,
+        xaxis_title='Região',
+        yaxis_title='Total de Vendas',
+        title_x=0.5
+    )
+    return fig
+
+
+def app_category_figure(vendas_por_categoria):
+    fig = px.pie(
+        vendas_por_categoria,
+        values='vendas',
+        names='categoria',
+        title='Distribuição de Vendas por Categoria',
+        template='plotly_white',
+        color_discrete_sequence=px.colors.qualitative.Set3
+    )
+    fig.update_layout(
+        title_x=0.5,
+        showlegend=True,
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=-0.2,
+            xanchor="center",
+            x=0.5
+        )
+    )
+    return fig
+
+
+def app_timeline_figure(evolucao, janela):
+    """Evolução das métricas na janela escolhida, já reduzida para o navegador."""
+    evolucao_data = slice_window(evolucao, 'data', janela)
+    evolucao_long = downsample_long(evolucao_data, 'data', ['vendas', 'clientes', 'receita'])
+
+    fig = px.line(
+        evolucao_long,
+        x='data',
+        y='value',
+        color='variable',
+        title='Evolução das Métricas ao Longo do Tempo',
+        labels={'value': 'Valor', 'variable': 'Métrica'},
+        template='plotly_white',
+        color_discrete_sequence=px.colors.qualitative.Set1
+    )
+    fig.update_layout(
+        xaxis_title='Data',
+        yaxis_title='Valor',
+        legend_title='Métricas',
+        hovermode='x unified',
+        title_x=0.5,
+        showlegend=True,
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=-0.2,
+            xanchor="center",
+            x=0.5
+        )
+    )
+    return fig
+
+
+# Dashboard de Vendas
+
+VENDAS_COLUNAS = ['Data', 'Vendas', 'Categoria', 'Região', 'Canal']
+
+
+def vendas_filter(source, categoria, regiao, canal):
+    return source.load(VENDAS_COLUNAS, filters={
+        'Categoria': categoria,
+        'Região': regiao,
+        'Canal': canal
+    })
+
+
+def vendas_metrics(data):
+    return {
+        'total': data['Vendas'].sum(),
+        'ticket_medio': data['Vendas'].mean(),
+        'pedidos': len(data)
+    }
+
+
+def vendas_by(data, coluna):
+    """Soma das vendas por `coluna` ('Categoria', 'Região' ou 'Data')."""
+    return data.groupby(coluna, observed=True)['Vendas'].sum().reset_index()
+
+
+def vendas_category_figure(por_categoria):
+    return px.bar(por_categoria, x='Categoria', y='Vendas', color='Categoria')
+
+
+def vendas_region_figure(por_regiao):
+    return px.pie(por_regiao, values='Vendas', names='Região', hole=0.4)
+
+
+def vendas_timeline_figure(por_data):
+    return px.line(
+        downsample(por_data, 'Data', 'Vendas'),
+        x='Data',
+        y='Vendas',
+        title='Vendas ao Longo do Tempo'
+    )
+
+
+# Dashboard de Clientes
+
+CLIENTES_COLUNAS = ['ID_Cliente', 'Idade', 'Valor_Total_Compras', 'Frequencia_Compras', 'Ultima_Compra', 'Segmento', 'Cidade', 'Satisfacao']
+
+
+def clientes_filter(source, segmento, cidade, satisfacao):
+    return source.load(CLIENTES_COLUNAS, filters={
+        'Segmento': segmento,
+        'Cidade': cidade,
+        'Satisfacao': list(range(satisfacao[0], satisfacao[1] + 1))
+    })
+
+
+def clientes_metrics(data):
+    return {
+        'total': len(data),
+        'ticket_medio': data['Valor_Total_Compras'].mean(),
+        'satisfacao': data['Satisfacao'].mean(),
+        'frequencia': data['Frequencia_Compras'].mean()
+    }
+
+
+def clientes_by_segment(data):
+    return data.groupby('Segmento', observed=True).size().reset_index(name='count')
+
+
+def clientes_segment_figure(por_segmento):
+    return px.pie(por_segmento, values='count', names='Segmento', hole=0.4)
+
+
+def clientes_age_figure(data):
+    return px.histogram(data, x='Idade', nbins=20, color='Segmento')
+
+
+def clientes_scatter_figure(data):
+    return px.scatter(
+        data,
+        x='Frequencia_Compras',
+        y='Valor_Total_Compras',
+        color='Segmento',
+        size='Satisfacao',
+        hover_data=['Cidade']
+    )
+
+
+# Dashboard Financeiro
+
+FINANCEIRO_COLUNAS = ['Data', 'Receita', 'Custos', 'Despesas_Operacionais', 'Investimentos', 'Impostos']
+FINANCEIRO_DESPESAS = ['Custos', 'Despesas_Operacionais', 'Impostos', 'Investimentos']
+
+
+def financeiro_load(source):
+    """Dados com as métricas derivadas."""
+    data = source.load(FINANCEIRO_COLUNAS).copy()
+
+    data['Lucro_Bruto'] = data['Receita'] - data['Custos']
+    data['Lucro_Liquido'] = data['Lucro_Bruto'] - data['Despesas_Operacionais'] - data['Impostos']
+    data['Margem_Bruta'] = (data['Lucro_Bruto'] / data['Receita']) * 100
+    data['Margem_Liquida'] = (data['Lucro_Liquido'] / data['Receita']) * 100
+    return data
+
+
+def financeiro_months(data):
+    """Meses ('AAAA-MM') de cada linha, opções do filtro de período."""
+    return data['Data'].dt.strftime('%Y-%m')
+
+
+def financeiro_filter(data, periodo):
+    meses = financeiro_months(data)
+    return data[(meses >= periodo[0]) & (meses <= periodo[1])]
+
+
+def financeiro_metrics(data):
+    return {
+        'receita': data['Receita'].sum(),
+        'lucro_liquido': data['Lucro_Liquido'].sum(),
+        'margem_liquida': data['Margem_Liquida'].mean()
+    }
+
+
+def financeiro_revenue_figure(data):
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=data['Data'], y=data['Receita'], name='Receita'))
+    fig.add_trace(go.Scatter(x=data['Data'], y=data['Custos'], name='Custos'))
+    return fig
+
+
+def financeiro_expenses_figure(data):
+    return px.pie(
+        values=[data[coluna].sum() for coluna in FINANCEIRO_DESPESAS],
+        names=['Custos', 'Despesas Operacionais', 'Impostos', 'Investimentos'],
+        hole=0.4
+    )
+
+
+def financeiro_margins_figure(data):
+    fig = go.Figure()
+    fig.add_trace(go.Bar(x=data['Data'], y=data['Margem_Bruta'], name='Margem Bruta'))
+    fig.add_trace(go.Bar(x=data['Data'], y=data['Margem_Liquida'], name='Margem Líquida'))
+    return fig
+
+
+# Dashboard de Produtos
+
+PRODUTOS_COLUNAS = ['ID_Produto', 'Nome', 'Categoria', 'Preco', 'Estoque', 'Vendas_Mes', 'Avaliacao', 'Fornecedor']
+PRODUTOS_FILTROS = ['Categoria', 'Fornecedor', 'Status_Estoque']
+
+
+def produtos_load(source):
+    """Dados com as métricas derivadas e o índice de bitmaps para os filtros."""
+    data = source.load(PRODUTOS_COLUNAS).copy()
+
+    data['Valor_Estoque'] = data['Preco'] * data['Estoque']
+    data['Rotatividade'] = data['Vendas_Mes'] / data['Estoque'].replace(0, 1)
+    data['Status_Estoque'] = np.where(data['Estoque'] < 10, 'Baixo',
+                                      np.where(data['Estoque'] < 30, 'Médio', 'Alto'))
+
+    data = encode_categoricals(data, PRODUTOS_FILTROS)
+    return data, BitmapIndex(data, PRODUTOS_FILTROS)
+
+
+def produtos_filter(data, bitmap_index, categoria, fornecedor, status_estoque):
+    return data[bitmap_index.select({
+        'Categoria': categoria,
+        'Fornecedor': fornecedor,
+        'Status_Estoque': status_estoque
+    })]
+
+
+def produtos_low_stock(data):
+    return data[data['Status_Estoque'] == 'Baixo']
+
+
+def produtos_metrics(data):
+    return {
+        'total': len(data),
+        'valor_estoque': data['Valor_Estoque'].sum(),
+        'estoque_baixo': len(produtos_low_stock(data)),
+        'avaliacao': data['Avaliacao'].mean()
+    }
+
+
+def produtos_by_category(data):
+    return data.groupby('Categoria', observed=True).size().reset_index(name='count')
+
+
+def produtos_category_figure(por_categoria):
+    return px.bar(por_categoria, x='Categoria', y='count', color='Categoria')
+
+
+def produtos_price_figure(data):
+    return px.histogram(data, x='Preco', color='Categoria', nbins=20)
+
+
+def produtos_scatter_figure(data):
+    return px.scatter(
+        data,
+        x='Preco',
+        y='Avaliacao',
+        color='Categoria',
+        size='Vendas_Mes',
+        hover_data=['Nome', 'Fornecedor']
+    )
+
+
+# Dashboard de Marketing
+
+MARKETING_COLUNAS = ['Data', 'Canal', 'Impressoes', 'Cliques', 'Conversoes', 'Custo', 'Valor_Conversao']
+
+
+def marketing_filter(source, canal, data_inicio, data_fim):
+    """Recorte filtrado com as métricas derivadas (CTR, CPA e ROI)."""
+    data = source.load(
+        MARKETING_COLUNAS,
+        date_range=('Data', data_inicio, data_fim),
+        filters={'Canal': canal}
+    )
+    return data.assign(
+        CTR=(data['Cliques'] / data['Impressoes']) * 100,
+        CPA=data['Custo'] / data['Conversoes'],
+        ROI=((data['Valor_Conversao'] * data['Conversoes']) - data['Custo']) / data['Custo'] * 100
+    )
+
+
+def marketing_metrics(data):
+    return {
+        'custo': data['Custo'].sum(),
+        'conversoes': data['Conversoes'].sum(),
+        'cpa': data['CPA'].mean(),
+        'roi': data['ROI'].mean()
+    }
+
+
+def marketing_by_channel(data):
+    return data.groupby('Canal', observed=True).agg({
+        'Impressoes': 'sum',
+        'Cliques': 'sum',
+        'Conversoes': 'sum'
+    }).reset_index()
+
+
+def marketing_roi_by_channel(data):
+    return data.groupby('Canal', observed=True)['ROI'].mean().reset_index()
+
+
+def marketing_channel_figure(por_canal):
+    return px.bar(por_canal, x='Canal', y=['Impressoes', 'Cliques', 'Conversoes'], barmode='group')
+
+
+def marketing_roi_figure(roi_por_canal):
+    return px.bar(roi_por_canal, x='Canal', y='ROI', color='ROI', color_continuous_scale='RdYlGn')
+
+
+def marketing_timeline_figure(data):
+    fig = go.Figure()
+    for metrica in ['CTR', 'CPA', 'ROI']:
+        serie = downsample(data, 'Data', metrica)
+        fig.add_trace(go.Scatter(x=serie['Data'], y=serie[metrica], name=metrica))
+    return fig
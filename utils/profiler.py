@@ -0,0 +1,146 @@
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import streamlit as st
+
+# Painel de perfil na barra lateral (também liberado por sessão com ?perfil=1)
+PROFILE_ENV = 'DASHBOARD_PROFILE'
+# Arquivo JSON Lines onde os spans de cada execução são acrescentados
+PROFILE_LOG_ENV = 'DASHBOARD_PROFILE_LOG'
+
+_STATE_KEY = '_perfil_execucao'
+_log_lock = threading.Lock()
+
+
+def _session_id():
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx()
+        return ctx.session_id if ctx is not None else None
+    except ImportError:
+        return None
+
+
+def start_rerun(pagina):
+    """Inicia o perfil da execução atual do script; chamar no início de cada página."""
+    anterior = st.session_state.get(_STATE_KEY)
+    st.session_state[_STATE_KEY] = {
+        'pagina': pagina,
+        'execucao': anterior['execucao'] + 1 if anterior else 1,
+        'ts': datetime.now().isoformat(timespec='milliseconds'),
+        'inicio': time.perf_counter(),
+        'nivel': 0,
+        'spans': []
+    }
+
+
+@contextmanager
+def span(nome):
+    """Mede o trecho como um span da execução atual (spans podem ser aninhados)."""
+    perfil = st.session_state.get(_STATE_KEY)
+    if perfil is None:
+        yield
+        return
+    nivel = perfil['nivel']
+    perfil['nivel'] = nivel + 1
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        fim = time.perf_counter()
+        perfil['nivel'] = nivel
+        perfil['spans'].append({
+            'span': nome,
+            'nivel': nivel,
+            'inicio_ms': (inicio - perfil['inicio']) * 1000,
+            'duracao_ms': (fim - inicio) * 1000
+        })
+
+
+def _write_log(caminho, perfil, total_ms):
+    base = {
+        'ts': perfil['ts'],
+        'sessao': _session_id(),
+        'pagina': perfil['pagina'],
+        'execucao': perfil['execucao']
+    }
+    linhas = [
+        json.dumps({**base, **registro}, ensure_ascii=False)
+        for registro in perfil['spans'] + [{'span': 'total', 'nivel': -1, 'inicio_ms': 0.0, 'duracao_ms': total_ms}]
+    ]
+    with _log_lock:
+        with open(caminho, 'a', encoding='utf-8') as f:
+            f.write('\n'.join(linhas) + '\n')
+
+
+def panel_enabled():
+    return os.getenv(PROFILE_ENV, '').lower() in ('1', 'true', 'sim') or st.query_params.get('perfil') == '1'
+
+
+def _render_panel(perfil, total_ms):
+    import plotly.graph_objects as go
+
+    spans = sorted(perfil['spans'], key=lambda s: s['inicio_ms'])
+    with st.sidebar.expander(f"⏱️ Perfil da execução ({total_ms:,.0f} ms)", expanded=False):
+        if not spans:
+            st.caption("Nenhum span registrado.")
+            return
+        nomes = [" " * s['nivel'] + s['span'] for s in spans]
+        fig = go.Figure(go.Bar(
+            y=nomes,
+            x=[s['duracao_ms'] for s in spans],
+            base=[s['inicio_ms'] for s in spans],
+            orientation='h',
+            hovertemplate='%{y}: %{x:.1f} ms<extra></extra>'
+        ))
+        fig.update_layout(
+            height=max(200, 22 * len(spans)),
+            margin=dict(l=0, r=0, t=10, b=0),
+            xaxis_title='ms',
+            yaxis=dict(autorange='reversed')
+        )
+        st.plotly_chart(fig, use_container_width=True)
+        st.dataframe(
+            [{'Span': n, 'Início (ms)': round(s['inicio_ms'], 1), 'Duração (ms)': round(s['duracao_ms'], 1)}
+             for n, s in zip(nomes, spans)],
+            hide_index=True,
+            use_container_width=True
+        )
+
+
+def end_rerun():
+    """Fecha o perfil da execução: grava o log e exibe o painel, se habilitados."""
+    perfil = st.session_state.get(_STATE_KEY)
+    if perfil is None:
+        return
+    total_ms = (time.perf_counter() - perfil['inicio']) * 1000
+    caminho = os.getenv(PROFILE_LOG_ENV)
+    if caminho:
+        _write_log(caminho, perfil, total_ms)
+    if panel_enabled():
+        _render_panel(perfil, total_ms)
+
+
+def summarize(caminho):
+    """Agrega o log de spans de todas as sessões: execuções, p50, p95 e máximo por página e span."""
+    import pandas as pd
+
+    log = pd.read_json(caminho, lines=True)
+    resumo = log.groupby(['pagina', 'span'])['duracao_ms'].agg(
+        execucoes='count',
+        p50=lambda s: s.quantile(0.5),
+        p95=lambda s: s.quantile(0.95),
+        maximo='max'
+    )
+    return resumo.sort_values('p95', ascending=False)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 2:
+        sys.exit("uso: python -m utils.profiler <spans.jsonl>")
+    print(summarize(sys.argv[1]).round(1).to_string())
@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from contextlib import contextmanager
+
+# Cache em disco das respostas do assistente (0 MB desativa)
+RESPONSE_CACHE_PATH = os.getenv('DASHBOARD_RESPONSE_CACHE', os.path.join('.cache', 'respostas.sqlite'))
+RESPONSE_CACHE_MB = float(os.getenv('DASHBOARD_RESPONSE_CACHE_MB', 64))
+
+
+def normalize_prompt(texto):
+    """Normaliza a pergunta: sem acentos, minúsculas, espaços simples e sem pontuação final."""
+    texto = unicodedata.normalize('NFKD', texto)
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    texto = re.sub(r'\s+', ' ', texto.lower()).strip()
+    return texto.rstrip('?!.… ')
+
+
+def response_key(pergunta, contexto, **parametros):
+    """Chave da resposta: pergunta normalizada, contexto dos dados e parâmetros da chamada."""
+    conteudo = json.dumps(
+        {'pergunta': normalize_prompt(pergunta), 'contexto': contexto, 'parametros': parametros},
+        sort_keys=True,
+        default=str,
+        ensure_ascii=False
+    )
+    return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """Cache LRU persistente (SQLite) de respostas, limitado pelo tamanho total do texto."""
+
+    def __init__(self, caminho, max_bytes):
+        self.caminho = caminho
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS respostas ('
+                ' chave TEXT PRIMARY KEY,'
+                ' resposta TEXT NOT NULL,'
+                ' tamanho INTEGER NOT NULL,'
+                ' criado_em REAL NOT NULL,'
+                ' acessado_em REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_acessado_em ON respostas (acessado_em)')
+
+    @contextmanager
+    def _connect(self):
+        # Uma conexão por operação: as sessões do Streamlit rodam em threads diferentes
+        conn = sqlite3.connect(self.caminho, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, chave):
+        with self._lock, self._connect() as conn:
+            linha = conn.execute('SELECT resposta FROM respostas WHERE chave = ?', (chave,)).fetchone()
+            if linha is None:
+                self.misses += 1
+                return None
+            conn.execute('UPDATE respostas SET acessado_em = ? WHERE chave = ?', (time.time(), chave))
+            self.hits += 1
+            return linha[0]
+
+    def put(self, chave, resposta):
+        tamanho = len(resposta.encode('utf-8'))
+        if tamanho > self.max_bytes:
+            return
+        agora = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO respostas VALUES (?, ?, ?, ?, ?)',
+                (chave, resposta, tamanho, agora, agora)
+            )
+            total = conn.execute('SELECT COALESCE(SUM(tamanho), 0) FROM respostas').fetchone()[0]
+            # Remove as respostas usadas há mais tempo até caber no limite
+            while total > self.max_bytes:
+                antiga = conn.execute(
+                    'SELECT chave, tamanho FROM respostas ORDER BY acessado_em LIMIT 1'
+                ).fetchone()
+                conn.execute('DELETE FROM respostas WHERE chave = ?', (antiga[0],))
+                total -= antiga[1]
+
+    def clear(self):
+        with self._lock, self._connect() as conn:
+            conn.execute('DELETE FROM respostas')
+
+    def stats(self):
+        with self._lock, self._connect() as conn:
+            entradas, total = conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(tamanho), 0) FROM respostas'
+            ).fetchone()
+        return {
+            'entries': entradas,
+            'bytes': total,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+
+_response_cache = None
+_response_lock = threading.Lock()
+
+
+def response_cache():
+    """Cache de respostas único do processo, ou None se desativado (DASHBOARD_RESPONSE_CACHE_MB=0)."""
+    global _response_cache
+    if RESPONSE_CACHE_MB <= 0:
+        return None
+    with _response_lock:
+        if _response_cache is None:
+            _response_cache = ResponseCache(RESPONSE_CACHE_PATH, int(RESPONSE_CACHE_MB * 1024 * 1024))
+        return _response_cache
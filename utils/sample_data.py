@@ -0,0 +1,105 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Geradores dos dados de exemplo usados quando não há extratos em DASHBOARD_DATA_DIR.
+# O tamanho padrão de cada um é o do dashboard; `n` maior é usado pelos benchmarks.
+
+
+def _datas(n, dias=None, **kwargs):
+    """`n` datas diárias; com `dias`, as linhas são distribuídas em no máximo `dias` dias."""
+    dias = min(n, dias or n)
+    datas = pd.date_range(periods=dias, freq='D', **kwargs)
+    return datas.repeat(-(-n // dias))[:n]
+
+
+def generate_vendas(n=365, dias=None, seed=None):
+    """Vendas diárias por região e categoria (`app.py`)."""
+    if seed is not None:
+        np.random.seed(seed)
+    data = {
+        'data': _datas(n, dias, end=datetime.now()),
+        'vendas': np.random.normal(1000, 200, n).clip(min=0),  # Garantir valores positivos
+        'clientes': np.random.normal(50, 10, n).clip(min=0),   # Garantir valores positivos
+        'receita': np.random.normal(50000, 10000, n).clip(min=0),  # Garantir valores positivos
+        'regiao': np.random.choice(["Norte", "Nordeste", "Centro-Oeste", "Sudeste", "Sul"], n),
+        'categoria': np.random.choice(["Eletrônicos", "Vestuário", "Alimentos", "Móveis", "Outros"], n)
+    }
+    return pd.DataFrame(data)
+
+
+def generate_vendas_canais(n=100, dias=None, seed=42):
+    """Vendas por categoria, região e canal (Dashboard de Vendas)."""
+    np.random.seed(seed)
+    data = pd.DataFrame({
+        'Data': _datas(n, dias, start='2024-01-01'),
+        'Vendas': np.random.randint(1000, 10000, n),
+        'Categoria': np.random.choice(['Eletrônicos', 'Vestuário', 'Alimentos', 'Móveis'], n),
+        'Região': np.random.choice(['Norte', 'Sul', 'Leste', 'Oeste'], n),
+        'Canal': np.random.choice(['Online', 'Loja Física', 'Marketplace'], n)
+    })
+    return data
+
+
+def generate_clientes(n=1000, dias=None, seed=42):
+    """Cadastro de clientes (Dashboard de Clientes)."""
+    np.random.seed(seed)
+    data = pd.DataFrame({
+        'ID_Cliente': range(1, n + 1),
+        'Idade': np.random.randint(18, 80, n),
+        'Valor_Total_Compras': np.random.uniform(100, 10000, n),
+        'Frequencia_Compras': np.random.randint(1, 50, n),
+        'Ultima_Compra': _datas(n, dias, start='2023-01-01'),
+        'Segmento': np.random.choice(['Bronze', 'Prata', 'Ouro', 'Platina'], n, p=[0.4, 0.3, 0.2, 0.1]),
+        'Cidade': np.random.choice(['São Paulo', 'Rio de Janeiro', 'Belo Horizonte', 'Salvador', 'Brasília'], n),
+        'Satisfacao': np.random.randint(1, 6, n)
+    })
+    return data
+
+
+def generate_financeiro(n=12, dias=None, seed=42):
+    """Lançamentos financeiros (Dashboard Financeiro)."""
+    np.random.seed(seed)
+    data = pd.DataFrame({
+        'Data': _datas(n, dias, start='2024-01-01'),
+        'Receita': np.random.uniform(100000, 500000, n),
+        'Custos': np.random.uniform(50000, 200000, n),
+        'Despesas_Operacionais': np.random.uniform(20000, 100000, n),
+        'Investimentos': np.random.uniform(10000, 50000, n),
+        'Impostos': np.random.uniform(10000, 80000, n)
+    })
+    return data
+
+
+def generate_produtos(n=100, seed=42):
+    """Catálogo de produtos (Dashboard de Produtos)."""
+    np.random.seed(seed)
+    categorias = ['Eletrônicos', 'Vestuário', 'Alimentos', 'Móveis', 'Livros']
+    data = pd.DataFrame({
+        'ID_Produto': range(1, n + 1),
+        'Nome': [f'Produto {i}' for i in range(1, n + 1)],
+        'Categoria': np.random.choice(categorias, n),
+        'Preco': np.random.uniform(10, 1000, n),
+        'Estoque': np.random.randint(0, 100, n),
+        'Vendas_Mes': np.random.randint(0, 50, n),
+        'Avaliacao': np.random.uniform(1, 5, n),
+        'Fornecedor': np.random.choice(['Fornecedor A', 'Fornecedor B', 'Fornecedor C'], n)
+    })
+    return data
+
+
+def generate_marketing(n=30, dias=None, seed=42):
+    """Campanhas por canal (Dashboard de Marketing)."""
+    np.random.seed(seed)
+    canais = ['Facebook', 'Instagram', 'Google Ads', 'Email', 'LinkedIn']
+    data = pd.DataFrame({
+        'Data': _datas(n, dias, start='2024-01-01'),
+        'Canal': np.random.choice(canais, n),
+        'Impressoes': np.random.randint(1000, 100000, n),
+        'Cliques': np.random.randint(100, 10000, n),
+        'Conversoes': np.random.randint(10, 1000, n),
+        'Custo': np.random.uniform(100, 5000, n),
+        'Valor_Conversao': np.random.uniform(50, 500, n)
+    })
+    return data
@@ -0,0 +1,377 @@
+import atexit
+import functools
+import hashlib
+import importlib
+import io
+import os
+import pickle
+import queue
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import traceback
+import types
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.connection import Connection
+
+import pandas as pd
+
+from utils.spill import SpillStore, read_frame, write_frame
+
+try:
+    import resource
+except ImportError:  # Windows: sem limite de memória
+    resource = None
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Execução dos códigos em processos separados (0 executa no processo do Streamlit)
+SANDBOX_ENABLED = os.getenv('DASHBOARD_SANDBOX', '1' if os.name == 'posix' else '0') != '0'
+SANDBOX_WORKERS = int(os.getenv('DASHBOARD_SANDBOX_WORKERS', min(4, os.cpu_count() or 1)))
+SANDBOX_TIMEOUT = float(os.getenv('DASHBOARD_SANDBOX_TIMEOUT', 30))
+SANDBOX_MEMORY_MB = int(os.getenv('DASHBOARD_SANDBOX_MB', 2048))
+# Espaço dos DataFrames compartilhados com os processos (arquivos Arrow IPC em /dev/shm)
+SANDBOX_SHARED_MB = float(os.getenv('DASHBOARD_SANDBOX_SHARED_MB', 1024))
+# Variáveis criadas pelo código que voltam no resultado (as maiores são descartadas)
+MAX_VALUE_BYTES = 1024 * 1024
+_FRAMES_POR_WORKER = 8
+
+
+class SandboxError(Exception):
+    """Erro na execução de um código no processo isolado."""
+
+
+class SandboxTimeout(SandboxError):
+    pass
+
+
+# ---------------------------------------------------------------------------
+# Processo de execução
+
+def _limitar_memoria(limite_mb):
+    if resource is None or not limite_mb:
+        return
+    limite = limite_mb * 1024 * 1024
+    # RLIMIT_DATA não conta os arquivos mapeados (os DataFrames compartilhados)
+    recurso = getattr(resource, 'RLIMIT_DATA', resource.RLIMIT_AS)
+    resource.setrlimit(recurso, (limite, limite))
+
+
+def _carregar(caminho, frames):
+    df = frames.get(caminho)
+    if df is None:
+        df = frames[caminho] = read_frame(caminho)
+        while len(frames) > _FRAMES_POR_WORKER:
+            frames.popitem(last=False)
+    frames.move_to_end(caminho)
+    return df
+
+
+def _resolver(dados, frames):
+    variaveis = {}
+    for nome, (tipo, valor) in dados.items():
+        if tipo == 'frame':
+            variaveis[nome] = _carregar(valor, frames)
+        elif tipo == 'frames':
+            variaveis[nome] = {chave: _carregar(ref, frames) for chave, ref in valor.items()}
+        elif tipo == 'modulo':
+            variaveis[nome] = importlib.import_module(valor)
+        else:
+            variaveis[nome] = valor
+    return variaveis
+
+
+def _run_task(codigo, dados, frames):
+    import matplotlib.pyplot as plt
+    import numpy as np
+    import plotly.express as px
+    import plotly.graph_objects as go
+    from datetime import datetime, timedelta
+    import types
+
+    namespace = {
+        '__builtins__': __builtins__, 'pd': pd, 'np': np, 'px': px, 'go': go, 'plt': plt,
+        'datetime': datetime, 'timedelta': timedelta
+    }
+
+    try:
+        # Um arquivo de DataFrame que não existe mais vira um erro da execução
+        namespace.update(_resolver(dados, frames))
+        base = dict(namespace)
+        inicio = time.perf_counter()
+        exec(compile(codigo, '<código>', 'exec'), namespace)
+    except MemoryError:
+        plt.close('all')
+        return {'erro': "Limite de memória da execução excedido."}
+    except Exception as e:
+        plt.close('all')
+        linhas = traceback.format_exception_only(type(e), e)
+        return {'erro': ''.join(linhas).strip()}
+    duracao = time.perf_counter() - inicio
+
+    figuras, valores, matplotlib_figs = [], {}, []
+    for nome, valor in namespace.items():
+        if nome.startswith('__') or (nome in base and base[nome] is valor):
+            continue
+        if isinstance(valor, go.Figure):
+            figuras.append(('plotly', valor.to_json()))
+        elif isinstance(valor, plt.Figure):
+            matplotlib_figs.append(valor)
+        elif not isinstance(valor, (types.ModuleType, types.FunctionType, type)):
+            try:
+                serializado = pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL)
+            except Exception:
+                continue
+            if len(serializado) <= MAX_VALUE_BYTES:
+                valores[nome] = serializado
+
+    if plt.get_fignums() and not any(f is plt.gcf() for f in matplotlib_figs):
+        matplotlib_figs.append(plt.gcf())
+    for figura in matplotlib_figs:
+        buffer = io.BytesIO()
+        figura.savefig(buffer, format='png', bbox_inches='tight')
+        figuras.append(('png', buffer.getvalue()))
+    plt.close('all')
+
+    return {'figuras': figuras, 'valores': valores, 'duracao': duracao}
+
+
+def _worker_main(conn, limite_mb):
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot  # noqa: F401
+    import plotly.express as px
+    # A primeira figura carrega os validadores e o template do plotly
+    px.bar(x=[0], y=[0]).to_json()
+    _limitar_memoria(limite_mb)
+    frames = OrderedDict()
+    # Avisa que terminou de importar as bibliotecas: o tempo limite conta só a execução
+    conn.send('pronto')
+    while True:
+        try:
+            codigo, dados = conn.recv()
+        except (EOFError, OSError):
+            return
+        try:
+            resposta = _run_task(codigo, dados, frames)
+        except MemoryError:
+            resposta = {'erro': "Limite de memória da execução excedido."}
+        conn.send(resposta)
+
+
+# ---------------------------------------------------------------------------
+# DataFrames compartilhados
+
+class SharedFrames:
+    """DataFrames gravados uma vez (por chave) em Arrow IPC para os processos mapearem.
+
+    Os arquivos ficam em memória compartilhada (/dev/shm, quando existe) e os
+    mais antigos são removidos acima de `max_bytes`; processos que já os
+    mapearam continuam lendo normalmente. Cada `ref` fixa o arquivo até o
+    `release` correspondente, para que a remoção não alcance os arquivos de
+    uma execução que o processo ainda não mapeou.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        base = '/dev/shm' if os.path.isdir('/dev/shm') else None
+        self.pasta = tempfile.mkdtemp(prefix='dashboard-sandbox-', dir=base)
+        self._arquivos = OrderedDict()
+        self._fixos = {}
+        self._lock = threading.Lock()
+        self.bytes = 0
+        atexit.register(shutil.rmtree, self.pasta, True)
+
+    def ref(self, chave, df):
+        """Caminho do arquivo do DataFrame; `df` pode ser uma função, chamada só se for preciso gravar."""
+        with self._lock:
+            if chave not in self._arquivos:
+                nome = hashlib.sha1(repr(chave).encode('utf-8')).hexdigest()[:20]
+                # Colunas com tipos mistos vão em pickle: o processo recebe uma cópia
+                caminho = write_frame(df() if callable(df) else df, os.path.join(self.pasta, nome))
+                self._arquivos[chave] = (caminho, os.path.getsize(caminho))
+                self.bytes += self._arquivos[chave][1]
+            self._arquivos.move_to_end(chave)
+            self._fixos[chave] = self._fixos.get(chave, 0) + 1
+            self._reduzir()
+            return self._arquivos[chave][0]
+
+    def release(self, chaves):
+        """Libera os arquivos fixados por `ref` (uma vez por chamada de `ref`)."""
+        with self._lock:
+            for chave in chaves:
+                if self._fixos[chave] == 1:
+                    del self._fixos[chave]
+                else:
+                    self._fixos[chave] -= 1
+            self._reduzir()
+
+    def _reduzir(self):
+        # Chamado com o lock adquirido: remove os mais antigos que não estão em uso
+        for chave in list(self._arquivos):
+            if self.bytes <= self.max_bytes:
+                break
+            if chave in self._fixos:
+                continue
+            antigo, tamanho = self._arquivos.pop(chave)
+            self.bytes -= tamanho
+            try:
+                os.remove(antigo)
+            except OSError:
+                pass
+
+
+# ---------------------------------------------------------------------------
+# Pool de processos
+
+class _Worker:
+    def __init__(self, processo, conn):
+        self.processo = processo
+        self.conn = conn
+        self.pronto = False
+
+    def aguardar_inicio(self, limite=120):
+        if not self.pronto:
+            if not self.conn.poll(limite):
+                raise OSError("O processo de execução não iniciou.")
+            self.conn.recv()
+            self.pronto = True
+
+    def encerrar(self):
+        self.processo.kill()
+        self.processo.wait()
+        self.conn.close()
+
+
+class SandboxPool:
+    """Pool de processos que executam códigos com limite de tempo e de memória.
+
+    Os processos são interpretadores novos (`python -m utils.sandbox`), que não
+    herdam o estado nem as threads do Streamlit. Um processo que excede o
+    tempo limite (ou é encerrado pelo sistema) é substituído por um novo; os
+    demais continuam atendendo.
+    """
+
+    def __init__(self, workers=SANDBOX_WORKERS, timeout=SANDBOX_TIMEOUT, memoria_mb=SANDBOX_MEMORY_MB):
+        self.timeout = timeout
+        self.memoria_mb = memoria_mb
+        self._ociosos = queue.Queue()
+        for _ in range(workers):
+            self._ociosos.put(self._novo_worker())
+        self._threads = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='sandbox')
+        self.frames = SharedFrames(int(SANDBOX_SHARED_MB * 1024 * 1024))
+
+    def _novo_worker(self):
+        nosso, do_filho = socket.socketpair()
+        processo = subprocess.Popen(
+            [sys.executable, '-m', 'utils.sandbox', str(do_filho.fileno()), str(self.memoria_mb)],
+            cwd=RAIZ,
+            pass_fds=(do_filho.fileno(),)
+        )
+        do_filho.close()
+        return _Worker(processo, Connection(nosso.detach()))
+
+    def _executar(self, codigo, dados, timeout):
+        worker = self._ociosos.get()
+        try:
+            worker.aguardar_inicio()
+            worker.conn.send((codigo, dados))
+            if not worker.conn.poll(timeout):
+                worker.encerrar()
+                worker = self._novo_worker()
+                raise SandboxTimeout(f"Tempo limite de {timeout:g} s excedido.")
+            resposta = worker.conn.recv()
+        except (EOFError, OSError):
+            worker.encerrar()
+            worker = self._novo_worker()
+            raise SandboxError("O processo de execução foi encerrado (limite de memória excedido?).")
+        finally:
+            self._ociosos.put(worker)
+        if 'erro' in resposta:
+            raise SandboxError(resposta['erro'])
+        return resposta
+
+    def share(self, variaveis, chave):
+        """Descreve as variáveis para o processo: DataFrames viram referências aos arquivos.
+
+        Retorna (dados, chaves dos arquivos fixados); as chaves devem ser passadas
+        a `frames.release` quando a execução terminar.
+        """
+        if chave is None:
+            chave = ('execucao', uuid.uuid4().hex)
+        dados, fixadas = {}, []
+
+        def ref(chave_frame, df):
+            caminho = self.frames.ref(chave_frame, df)
+            fixadas.append(chave_frame)
+            return caminho
+
+        try:
+            for nome, valor in variaveis.items():
+                if isinstance(valor, pd.DataFrame):
+                    dados[nome] = ('frame', ref((chave, nome), valor))
+                elif isinstance(valor, SpillStore):
+                    # Frames que já estão em disco vão direto para o processo, sem voltar para a
+                    # memória nem ser copiados para a memória compartilhada
+                    dados[nome] = ('frames', {
+                        k: valor.path(k) or ref((chave, nome, k), functools.partial(valor.__getitem__, k))
+                        for k in valor
+                    })
+                elif isinstance(valor, types.ModuleType):
+                    dados[nome] = ('modulo', valor.__name__)
+                elif isinstance(valor, dict) and valor and all(isinstance(v, pd.DataFrame) for v in valor.values()):
+                    dados[nome] = ('frames', {
+                        k: ref((chave, nome, k), v) for k, v in valor.items()
+                    })
+                else:
+                    dados[nome] = ('valor', valor)
+        except BaseException:
+            self.frames.release(fixadas)
+            raise
+        return dados, fixadas
+
+    def submit(self, codigo, variaveis, chave, timeout=None, extras=None):
+        """Agenda o código; `chave` identifica o conteúdo dos DataFrames em `variaveis`.
+
+        `extras` são variáveis sem identificação (ex.: globais da página): seus
+        DataFrames são gravados a cada execução. Os nomes de `variaveis` prevalecem.
+        """
+        dados, fixadas = self.share(variaveis, chave)
+        try:
+            if extras:
+                dados_extras, fixadas_extras = self.share(extras, None)
+                dados = {**dados_extras, **dados}
+                fixadas += fixadas_extras
+            futuro = self._threads.submit(self._executar, codigo, dados, timeout or self.timeout)
+        except BaseException:
+            self.frames.release(fixadas)
+            raise
+        # Os arquivos da execução ficam até o processo terminar de usá-los
+        futuro.add_done_callback(lambda _: self.frames.release(fixadas))
+        return futuro
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def sandbox_pool():
+    """Pool de execução único do processo, ou None se desativado (DASHBOARD_SANDBOX=0)."""
+    global _pool
+    if not SANDBOX_ENABLED:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = SandboxPool()
+        return _pool
+
+
+if __name__ == '__main__':
+    # Processo do pool: python -m utils.sandbox <descritor do socket> <limite de memória em MB>
+    _worker_main(Connection(int(sys.argv[1])), int(sys.argv[2]))
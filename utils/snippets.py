@@ -0,0 +1,281 @@
+import functools
+import hashlib
+import json
+import os
+import pickle
+import re
+import threading
+import time
+import types
+from concurrent.futures import as_completed
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import streamlit as st
+
+from utils.cache import ResultCache
+from utils.sandbox import sandbox_pool
+
+# Memória dos resultados memoizados dos códigos salvos (0 desativa a memoização)
+SNIPPET_CACHE_MB = float(os.getenv('DASHBOARD_SNIPPET_CACHE_MB', 128))
+SNIPPET_CODE_CACHE = 256
+
+# Nomes que tornam o resultado imprevisível ou têm efeitos fora das variáveis
+# (ex.: st.write): esses códigos são executados sempre, sem memoização
+_NOMES_IMPUROS = {'st', 'random', 'rand', 'randn', 'randint', 'choice', 'now', 'today', 'time', 'open'}
+
+
+def source_hash(codigo):
+    return hashlib.sha256(codigo.encode('utf-8')).hexdigest()
+
+
+@functools.lru_cache(maxsize=SNIPPET_CODE_CACHE)
+def _compilar(hash_codigo, codigo):
+    return compile(codigo, f"<código {hash_codigo[:8]}>", 'exec')
+
+
+def compile_snippet(codigo):
+    """Objeto de código do trecho, compilado uma única vez por hash do código-fonte."""
+    return _compilar(source_hash(codigo), codigo)
+
+
+def extract_plot_code(text):
+    """Extrai código de gráfico do texto da resposta."""
+    # Procura por blocos de código que contêm px ou go
+    plot_pattern = r"```(?:python)?\s*(fig\s*=\s*(?:px|go)\.[\s\S]*?)\s*```"
+    matches = re.findall(plot_pattern, text)
+    return matches
+
+
+def _nomes(codigo_obj):
+    nomes = set(codigo_obj.co_names)
+    for constante in codigo_obj.co_consts:
+        if isinstance(constante, types.CodeType):
+            nomes |= _nomes(constante)
+    return nomes
+
+
+def is_pure(codigo):
+    """Indica se o resultado do trecho depende só do código e dos dados."""
+    return not (_nomes(compile_snippet(codigo)) & _NOMES_IMPUROS)
+
+
+def uses_streamlit(codigo):
+    """Códigos que chamam `st` precisam rodar no processo do Streamlit."""
+    return 'st' in _nomes(compile_snippet(codigo))
+
+
+_snippet_cache = None
+_snippet_lock = threading.Lock()
+
+
+def snippet_cache():
+    """Cache dos resultados dos trechos, único do processo, ou None se desativado."""
+    global _snippet_cache
+    if SNIPPET_CACHE_MB <= 0:
+        return None
+    with _snippet_lock:
+        if _snippet_cache is None:
+            _snippet_cache = ResultCache(int(SNIPPET_CACHE_MB * 1024 * 1024))
+        return _snippet_cache
+
+
+def _executar(codigo, variaveis, globais):
+    namespace = dict(globais) if globais is not None else {}
+    namespace.update({'st': st, 'pd': pd, 'np': np, 'px': px, 'go': go, 'plt': plt})
+    namespace.update(variaveis)
+    base = dict(namespace)
+
+    inicio = time.perf_counter()
+    # Um único namespace: funções e compreensões do trecho enxergam as variáveis
+    exec(compile_snippet(codigo), namespace)
+    duracao = time.perf_counter() - inicio
+
+    figuras, valores = [], {}
+    for nome, valor in namespace.items():
+        if nome.startswith('__') or (nome in base and base[nome] is valor):
+            continue
+        if isinstance(valor, (go.Figure, plt.Figure)):
+            figuras.append(valor)
+        elif not isinstance(valor, (types.ModuleType, types.FunctionType, type)):
+            valores[nome] = valor
+
+    # Figura atual do matplotlib (ex.: plt.plot sem criar a figura)
+    if plt.get_fignums():
+        atual = plt.gcf()
+        if not any(f is atual for f in figuras):
+            figuras.append(atual)
+        plt.close('all')
+
+    return {'figuras': figuras, 'valores': valores, 'duracao': duracao}
+
+
+def _resultado_isolado(resposta):
+    # json.loads e não pio.from_json: o motor JSON do plotly é importado na primeira
+    # chamada, sem lock, e as sessões leem os resultados em threads simultâneas
+    figuras = [
+        go.Figure(json.loads(figura)) if tipo == 'plotly' else figura
+        for tipo, figura in resposta['figuras']
+    ]
+    valores = {nome: pickle.loads(valor) for nome, valor in resposta['valores'].items()}
+    return {'figuras': figuras, 'valores': valores, 'duracao': resposta['duracao']}
+
+
+def _globais_usados(codigo, globais, variaveis):
+    """Variáveis da página citadas pelo código, para enviar ao processo isolado.
+
+    Retorna None se alguma não pode ser enviada (ex.: o cliente da API ou funções
+    da página): o código roda então no próprio processo, com os mesmos nomes.
+    """
+    usados = {}
+    for nome in _nomes(compile_snippet(codigo)) & set(globais or ()):
+        valor = globais[nome]
+        if nome in variaveis or nome.startswith('__'):
+            continue
+        if not isinstance(valor, (types.ModuleType, pd.DataFrame)):
+            try:
+                pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL)
+            except Exception:
+                return None
+        usados[nome] = valor
+    return usados
+
+
+def _agendar(codigo, variaveis, fingerprint, globais=None):
+    """Futuro da execução no pool de processos, ou None para executar no próprio processo."""
+    pool = sandbox_pool()
+    if pool is None or uses_streamlit(codigo):
+        return None
+    extras = _globais_usados(codigo, globais, variaveis)
+    if extras is None:
+        return None
+    return pool.submit(codigo, variaveis, fingerprint, extras=extras)
+
+
+def _concluir(codigo, futuro, variaveis, globais):
+    if futuro is None:
+        return _executar(codigo, variaveis, globais)
+    return _resultado_isolado(futuro.result())
+
+
+def run_snippet(codigo, variaveis, fingerprint=None, globais=None):
+    """Executa um trecho de código salvo e retorna (resultado, reaproveitado).
+
+    `variaveis` é uma função que retorna os dados expostos ao trecho (só é
+    chamada se o resultado não estiver memoizado). Com `fingerprint` (a
+    identificação dos dados), o resultado é memoizado por (hash do código,
+    fingerprint); o resultado traz as figuras e as variáveis criadas. As
+    variáveis de `globais` citadas pelo código também chegam ao processo
+    isolado, então o código vê os mesmos nomes nos dois caminhos.
+    """
+    cache = snippet_cache()
+    chave = None
+    if fingerprint is not None and cache is not None and is_pure(codigo):
+        chave = (source_hash(codigo), fingerprint)
+        resultado = cache.get(chave)
+        if resultado is not None:
+            return resultado, True
+
+    dados = variaveis()
+    resultado = _concluir(codigo, _agendar(codigo, dados, fingerprint, globais), dados, globais)
+    if chave is not None:
+        cache.put(chave, resultado)
+    return resultado, False
+
+
+def iter_snippets(codigos, variaveis, fingerprint=None, globais=None):
+    """Executa vários códigos de uma vez e gera (índice, resultado, reaproveitado, erro)
+    à medida que cada um termina.
+
+    Todos são agendados no pool de processos antes do primeiro resultado, e os
+    processos leem os mesmos DataFrames compartilhados (gravados uma única vez
+    por `fingerprint`). Os códigos que usam `st` rodam no próprio processo
+    enquanto os demais executam.
+    """
+    cache = snippet_cache()
+    dados = None
+    memoizados, locais, futuros = [], [], {}
+    for i, codigo in enumerate(codigos):
+        chave = None
+        try:
+            if fingerprint is not None and cache is not None and is_pure(codigo):
+                chave = (source_hash(codigo), fingerprint)
+                resultado = cache.get(chave)
+                if resultado is not None:
+                    memoizados.append((i, resultado, True, None))
+                    continue
+            if dados is None:
+                dados = variaveis()
+            futuro = _agendar(codigo, dados, fingerprint, globais)
+        except Exception as e:
+            memoizados.append((i, None, False, e))
+            continue
+        if futuro is None:
+            locais.append((i, codigo, chave))
+        else:
+            futuros[futuro] = (i, codigo, chave)
+
+    def concluir(i, codigo, chave, futuro):
+        try:
+            resultado = _concluir(codigo, futuro, dados, globais)
+        except Exception as e:
+            return i, None, False, e
+        if chave is not None:
+            cache.put(chave, resultado)
+        return i, resultado, False, None
+
+    yield from memoizados
+    for i, codigo, chave in locais:
+        yield concluir(i, codigo, chave, None)
+    for futuro in as_completed(futuros):
+        yield concluir(*futuros[futuro], futuro)
+
+
+def run_snippets(codigos, variaveis, fingerprint=None, globais=None):
+    """Executa vários códigos em paralelo e retorna, na ordem, (resultado, reaproveitado, erro)."""
+    saida = [None] * len(codigos)
+    for i, resultado, reaproveitado, erro in iter_snippets(codigos, variaveis, fingerprint, globais):
+        saida[i] = (resultado, reaproveitado, erro)
+    return saida
+
+
+def cached_result(codigo, fingerprint):
+    """Resultado memoizado do trecho para os dados atuais, sem executá-lo."""
+    cache = snippet_cache()
+    if cache is None or not is_pure(codigo):
+        return None
+    return cache.get((source_hash(codigo), fingerprint))
+
+
+def render_result(resultado, reaproveitado=False):
+    for figura in resultado['figuras']:
+        if isinstance(figura, go.Figure):
+            st.plotly_chart(figura, use_container_width=True)
+        elif isinstance(figura, bytes):
+            # Figura do matplotlib gerada no pool de processos (PNG)
+            st.image(figura)
+        else:
+            st.pyplot(figura)
+    if reaproveitado:
+        st.caption("Resultado reaproveitado do cache.")
+
+
+def render_all(itens, espacos, variaveis, fingerprint=None, globais=None, progresso=None):
+    """Executa todos os códigos salvos, exibindo cada resultado em `espacos[i]` assim que fica pronto."""
+    progresso = (progresso or st).progress(0.0, text=f"Executando {len(itens)} códigos...")
+    inicio = time.perf_counter()
+    codigos = [item['code'] for item in itens]
+    for n, (i, resultado, reaproveitado, erro) in enumerate(
+        iter_snippets(codigos, variaveis, fingerprint, globais), 1
+    ):
+        with espacos[i].container():
+            if erro is not None:
+                st.error(f"Erro ao executar o código: {str(erro)}")
+            else:
+                render_result(resultado, reaproveitado)
+                itens[i]['exibir'] = True
+        progresso.progress(n / len(itens), text=f"{n} de {len(itens)} códigos concluídos")
+    progresso.progress(1.0, text=f"{len(itens)} códigos executados em {time.perf_counter() - inicio:.1f} s")
@@ -0,0 +1,307 @@
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+import weakref
+from collections import OrderedDict
+from collections.abc import MutableMapping
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+# Memória dos DataFrames enviados mantidos em RAM, por sessão e somando todas as sessões;
+# acima disso, os usados há mais tempo vão para arquivos Arrow em disco
+SESSION_FRAMES_MB = float(os.getenv('DASHBOARD_SESSION_FRAMES_MB', 1024))
+TOTAL_FRAMES_MB = float(os.getenv('DASHBOARD_FRAMES_MB', 4096))
+SPILL_DIR = os.getenv('DASHBOARD_SPILL_DIR') or tempfile.gettempdir()
+PREVIEW_ROWS = 5
+MB = 1024 * 1024
+
+
+def memory_bytes(df):
+    # As colunas de texto dos arquivos enviados dominam a memória: conta os objetos
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def write_frame(df, base):
+    """Grava o DataFrame em `base`.arrow (Arrow IPC) ou, com tipos mistos, em `base`.pkl."""
+    caminho = base + '.arrow'
+    try:
+        tabela = pa.Table.from_pandas(df, preserve_index=True)
+        with pa.OSFile(caminho, 'wb') as arquivo, ipc.new_file(arquivo, tabela.schema) as escritor:
+            escritor.write_table(tabela)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        # Colunas com tipos mistos: sem Arrow, vai em pickle
+        if os.path.exists(caminho):
+            os.remove(caminho)
+        caminho = base + '.pkl'
+        df.to_pickle(caminho)
+    return caminho
+
+
+def read_frame(caminho):
+    """Lê um DataFrame gravado por `write_frame`; os arquivos Arrow são mapeados em memória."""
+    if caminho.endswith('.arrow'):
+        # As colunas numéricas sem nulos não são copiadas: as páginas vêm do arquivo sob demanda
+        return ipc.open_file(pa.memory_map(caminho)).read_all().to_pandas(split_blocks=True)
+    return pd.read_pickle(caminho)
+
+
+# Frames em memória de todas as sessões, do usado há mais tempo para o mais recente:
+# (id da store, nome) -> (referência fraca à store, bytes, chave do frame compartilhado)
+_quentes = OrderedDict()
+_bytes_quentes = 0
+# Frames compartilhados entre sessões (mesma leitura do cache): chave -> sessões com ele em memória
+_compartilhados = {}
+_lock = threading.RLock()
+
+
+def _contar(tamanho, compartilhado, delta):
+    """Bytes que entram (delta=1) ou saem (delta=-1) do total: um frame compartilhado conta uma vez."""
+    if compartilhado is None:
+        return tamanho * delta
+    referencias = _compartilhados.get(compartilhado, 0) + delta
+    if referencias:
+        _compartilhados[compartilhado] = referencias
+    else:
+        _compartilhados.pop(compartilhado, None)
+    primeira = delta > 0 and referencias == 1
+    ultima = delta < 0 and referencias == 0
+    return tamanho * delta if primeira or ultima else 0
+
+
+def _esquecer(uid, pasta):
+    """Remove as entradas e os arquivos de uma store que deixou de existir (sessão encerrada)."""
+    global _bytes_quentes
+    with _lock:
+        for chave in [c for c in _quentes if c[0] == uid]:
+            _, tamanho, compartilhado = _quentes.pop(chave)
+            _bytes_quentes += _contar(tamanho, compartilhado, -1)
+    shutil.rmtree(pasta, ignore_errors=True)
+
+
+def total_stats():
+    with _lock:
+        return {'frames': len(_quentes), 'bytes': _bytes_quentes, 'max_bytes': int(TOTAL_FRAMES_MB * MB)}
+
+
+class SpillStore(MutableMapping):
+    """Dicionário de DataFrames de uma sessão que mantém em memória só os mais usados.
+
+    Acima de `max_bytes` na sessão, ou de `max_total_bytes` somando todas as
+    sessões, os DataFrames usados há mais tempo são gravados em Arrow IPC em
+    disco e liberados; o próximo acesso os lê de volta mapeando o arquivo.
+    O DataFrame entregue pode ser alterado, então o arquivo é apagado quando
+    ele volta para a memória e a próxima liberação o grava de novo. Número de linhas, colunas, memória e as primeiras linhas ficam
+    disponíveis em `info` sem carregar o DataFrame.
+
+    Um DataFrame guardado com `put(..., compartilhado=chave)` usa as mesmas
+    colunas em todas as sessões com a mesma chave (a leitura do cache de
+    uploads): conta na cota de cada sessão, mas uma única vez no total.
+    """
+
+    def __init__(self, max_bytes=int(SESSION_FRAMES_MB * MB), max_total_bytes=int(TOTAL_FRAMES_MB * MB)):
+        self.max_bytes = max_bytes
+        self.max_total_bytes = max_total_bytes
+        self.uid = uuid.uuid4().hex
+        self.pasta = os.path.join(SPILL_DIR, f"dashboard-frames-{self.uid}")
+        self._itens = {}
+        self._quentes = OrderedDict()
+        self.bytes = 0
+        self.gravacoes = 0
+        self.leituras = 0
+        weakref.finalize(self, _esquecer, self.uid, self.pasta)
+
+    # -- Contabilidade (chamada com o lock adquirido) --
+
+    def _aquecer(self, nome):
+        global _bytes_quentes
+        chave = (self.uid, nome)
+        if nome in self._quentes:
+            self._quentes.move_to_end(nome)
+            _quentes.move_to_end(chave)
+            return
+        item = self._itens[nome]
+        tamanho = item['bytes']
+        self._quentes[nome] = tamanho
+        self.bytes += tamanho
+        _quentes[chave] = (weakref.ref(self), tamanho, item['compartilhado'])
+        _bytes_quentes += _contar(tamanho, item['compartilhado'], 1)
+
+    def _esfriar(self, nome):
+        global _bytes_quentes
+        tamanho = self._quentes.pop(nome, None)
+        if tamanho is None:
+            return
+        self.bytes -= tamanho
+        _, tamanho, compartilhado = _quentes.pop((self.uid, nome))
+        _bytes_quentes += _contar(tamanho, compartilhado, -1)
+
+    def _excedentes(self, protegido):
+        """Tira da conta os frames que precisam sair da memória e os retorna como (store, nome, df)."""
+        vitimas = []
+        for nome in list(self._quentes):
+            if self.bytes <= self.max_bytes:
+                break
+            if nome != protegido:
+                self._esfriar(nome)
+                vitimas.append((self, nome, self._itens[nome]['df']))
+        for uid, nome in list(_quentes):
+            if _bytes_quentes <= self.max_total_bytes:
+                break
+            store = _quentes[(uid, nome)][0]()
+            if store is None or (store is self and nome == protegido):
+                continue
+            store._esfriar(nome)
+            vitimas.append((store, nome, store._itens[nome]['df']))
+        return vitimas
+
+    # -- Gravação em disco (fora do lock) --
+
+    def _liberar(self, nome, df):
+        with _lock:
+            item = self._itens.get(nome)
+            if item is None or item['df'] is not df:
+                return
+            caminho = item['caminho']
+        if caminho is None:
+            os.makedirs(self.pasta, exist_ok=True)
+            caminho = write_frame(df, os.path.join(self.pasta, uuid.uuid4().hex))
+            self.gravacoes += 1
+        with _lock:
+            item = self._itens.get(nome)
+            if item is None or item['df'] is not df or nome in self._quentes:
+                # Substituído, removido ou entregue de novo (e talvez alterado) durante a gravação
+                if item is None or item['caminho'] != caminho:
+                    os.remove(caminho)
+                return
+            item['caminho'] = caminho
+            item['df'] = None
+
+    @staticmethod
+    def _liberar_todos(vitimas):
+        for store, nome, df in vitimas:
+            store._liberar(nome, df)
+
+    def _entregar(self, item):
+        # Chamado com o lock adquirido: o DataFrame pode ser alterado por quem o recebe,
+        # então o arquivo gravado deixa de valer
+        if item['caminho'] is not None:
+            try:
+                os.remove(item['caminho'])
+            except OSError:
+                pass
+            item['caminho'] = None
+        return item['df']
+
+    # -- Interface de dicionário --
+
+    def __setitem__(self, nome, df):
+        self.put(nome, df)
+
+    def put(self, nome, df, compartilhado=None):
+        """Guarda o DataFrame; `compartilhado` identifica colunas usadas por outras sessões."""
+        with _lock:
+            if nome in self._itens:
+                self._remover(nome)
+            self._itens[nome] = {
+                'df': df,
+                'caminho': None,
+                'compartilhado': compartilhado,
+                'bytes': memory_bytes(df),
+                'linhas': len(df),
+                'colunas': len(df.columns),
+                'amostra': df.head(PREVIEW_ROWS)
+            }
+            self._aquecer(nome)
+            vitimas = self._excedentes(protegido=nome)
+        self._liberar_todos(vitimas)
+
+    def __getitem__(self, nome):
+        with _lock:
+            item = self._itens[nome]
+            if item['df'] is not None:
+                self._aquecer(nome)
+                return self._entregar(item)
+            caminho = item['caminho']
+        df = read_frame(caminho)
+        with _lock:
+            self.leituras += 1
+            item = self._itens.get(nome)
+            if item is None or item['caminho'] != caminho:
+                return df
+            if item['df'] is not None:
+                # Outra thread leu o mesmo arquivo primeiro
+                self._aquecer(nome)
+                return self._entregar(item)
+            vitimas = []
+            if item['bytes'] <= self.max_bytes:
+                # Lido do disco: é uma cópia só desta sessão
+                item['df'] = df
+                item['compartilhado'] = None
+                self._entregar(item)
+                self._aquecer(nome)
+                vitimas = self._excedentes(protegido=nome)
+        self._liberar_todos(vitimas)
+        return df
+
+    def _remover(self, nome):
+        self._esfriar(nome)
+        item = self._itens.pop(nome)
+        if item['caminho'] is not None:
+            try:
+                os.remove(item['caminho'])
+            except OSError:
+                pass
+
+    def __delitem__(self, nome):
+        with _lock:
+            if nome not in self._itens:
+                raise KeyError(nome)
+            self._remover(nome)
+
+    def __iter__(self):
+        with _lock:
+            return iter(list(self._itens))
+
+    def __len__(self):
+        return len(self._itens)
+
+    def __contains__(self, nome):
+        return nome in self._itens
+
+    def __repr__(self):
+        return f"SpillStore({list(self._itens)})"
+
+    # -- Informações sem carregar os DataFrames --
+
+    def path(self, nome):
+        """Arquivo do DataFrame liberado para o disco (Arrow IPC ou pickle), ou None se está em memória."""
+        with _lock:
+            item = self._itens[nome]
+            return item['caminho'] if item['df'] is None else None
+
+    def info(self, nome):
+        """Linhas, colunas, memória, primeiras linhas e se o DataFrame está em memória."""
+        with _lock:
+            item = self._itens[nome]
+            return {
+                'linhas': item['linhas'],
+                'colunas': item['colunas'],
+                'bytes': item['bytes'],
+                'amostra': item['amostra'],
+                'em_memoria': item['df'] is not None
+            }
+
+    def stats(self):
+        with _lock:
+            return {
+                'frames': len(self._itens),
+                'em_memoria': len(self._quentes),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'gravacoes': self.gravacoes,
+                'leituras': self.leituras
+            }
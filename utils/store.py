@@ -0,0 +1,99 @@
+import logging
+import os
+import shutil
+import threading
+import time
+
+import pandas as pd
+
+from utils.cube import RollupCube, DIMENSOES, METRICAS
+from utils.datasource import InMemorySource, SYNC_SECONDS
+
+# Diretório monitorado para novos lotes de vendas (CSV ou Parquet)
+INBOX_DIR_ENV = 'DASHBOARD_INBOX_DIR'
+
+logger = logging.getLogger(__name__)
+
+
+def read_batch(caminho, date_column):
+    """Lê um lote de vendas (CSV ou Parquet) deixado na caixa de entrada."""
+    if caminho.endswith('.parquet'):
+        return pd.read_parquet(caminho)
+    return pd.read_csv(caminho, parse_dates=[date_column])
+
+
+class SalesStore:
+    """Fonte de vendas e cubo de agregação com ingestão incremental.
+
+    `append` acrescenta um lote à fonte em memória e soma o delta ao cubo, sem
+    reprocessar as linhas existentes. `sync` busca lotes novos na caixa de
+    entrada (fonte em memória) ou arquivos novos no dataset (fonte em arquivo).
+    """
+
+    def __init__(self, source, inbox_dir=None, sync_seconds=SYNC_SECONDS):
+        self.source = source
+        self.cube = RollupCube(source.load(DIMENSOES + METRICAS))
+        self.inbox_dir = inbox_dir or os.getenv(INBOX_DIR_ENV)
+        self.sync_seconds = sync_seconds
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._last_sync = 0.0
+        # Versão publicada só depois que fonte e cubo foram atualizados
+        self.version = source.version
+
+    def append(self, novas_linhas):
+        """Acrescenta um lote de vendas e atualiza os agregados por delta."""
+        with self._lock:
+            self.source.append(novas_linhas)
+            self.cube.append(novas_linhas)
+            self.version = self.source.version
+
+    def _sync_inbox(self):
+        if not self.inbox_dir or not os.path.isdir(self.inbox_dir):
+            return 0
+        arquivos = sorted(
+            nome for nome in os.listdir(self.inbox_dir)
+            if nome.endswith(('.csv', '.parquet'))
+        )
+        incorporados = 0
+        for nome in arquivos:
+            caminho = os.path.join(self.inbox_dir, nome)
+            try:
+                self.append(read_batch(caminho, self.source.date_column))
+                destino = 'processados'
+                incorporados += 1
+            except Exception:
+                # Um lote inválido não impede os seguintes nem é lido de novo a cada sync
+                logger.exception("Lote rejeitado na caixa de entrada: %s", caminho)
+                destino = 'rejeitados'
+            os.makedirs(os.path.join(self.inbox_dir, destino), exist_ok=True)
+            shutil.move(caminho, os.path.join(self.inbox_dir, destino, nome))
+        return incorporados
+
+    def _sync_files(self):
+        novas_linhas = self.source.refresh()
+        with self._lock:
+            if novas_linhas is None:
+                self.cube = RollupCube(self.source.load(DIMENSOES + METRICAS))
+            elif novas_linhas.empty:
+                return 0
+            else:
+                self.cube.append(novas_linhas)
+            self.version = self.source.version
+            return 1
+
+    def sync(self, force=False):
+        """Incorpora dados novos, no máximo uma vez a cada `sync_seconds`."""
+        agora = time.monotonic()
+        if not force and agora - self._last_sync < self.sync_seconds:
+            return 0
+        # Outra sessão já está sincronizando
+        if not self._sync_lock.acquire(blocking=False):
+            return 0
+        try:
+            self._last_sync = agora
+            if isinstance(self.source, InMemorySource):
+                return self._sync_inbox()
+            return self._sync_files()
+        finally:
+            self._sync_lock.release()
@@ -0,0 +1,28 @@
+import functools
+
+# Codificação dos modelos gpt-3.5/gpt-4 (usada quando o tiktoken está instalado)
+TOKEN_ENCODING = 'cl100k_base'
+# Sem o tiktoken, estimativa conservadora de caracteres por token
+CHARS_PER_TOKEN = 3.5
+
+
+@functools.lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    return tiktoken.get_encoding(TOKEN_ENCODING)
+
+
+def count_tokens(texto):
+    """Número de tokens do texto (exato com tiktoken, estimado sem ele)."""
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(texto))
+    return int(len(texto) / CHARS_PER_TOKEN) + 1
+
+
+def count_message_tokens(messages):
+    """Tokens de uma lista de mensagens da API de chat, incluindo o custo fixo por mensagem."""
+    return sum(4 + count_tokens(m['content']) for m in messages) + 3